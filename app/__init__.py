@@ -10,12 +10,17 @@ load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+    # Keep resume uploads in memory instead of spooling them to temp files
+    from app.utils.ingestion import UploadRequest
+    app.request_class = UploadRequest
     
     # Configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///careercraft.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['WTF_CSRF_ENABLED'] = True
+    # Seconds a page request may spend waiting on AI providers before falling back
+    app.config['AI_REQUEST_BUDGET'] = float(os.getenv('AI_REQUEST_BUDGET', '25'))
     
     # Initialize extensions with app
     db.init_app(app)
@@ -34,6 +39,8 @@ def create_app():
     from app.routes.interview import interview_bp
     from app.routes.jobs import jobs_bp
     from app.routes.skills import skills_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.tasks import tasks_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -42,10 +49,26 @@ def create_app():
     app.register_blueprint(interview_bp, url_prefix='/interview')
     app.register_blueprint(jobs_bp)  # No url_prefix for job tracker
     app.register_blueprint(skills_bp, url_prefix='/skills')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    app.register_blueprint(tasks_bp, url_prefix='/tasks')
     
     # Import models to ensure they are registered with SQLAlchemy
     from app.models import User
     
+    # Background AI jobs: register the task handlers, and optionally run
+    # worker threads in this process instead of a separate worker.py
+    from app.utils import ai_tasks  # noqa: F401 (registers the task handlers)
+    from app.utils.job_queue import job_config, Worker
+    if job_config.EMBEDDED_WORKERS > 0:
+        Worker(app, concurrency=job_config.EMBEDDED_WORKERS).start()
+    
+    # `flask question-bank refill` tops up popular interview question buckets
+    from app.utils.question_bank import question_bank_cli
+    app.cli.add_command(question_bank_cli)
+    # `flask bulk-analysis run <zip or directory> --user <id>` analyzes many resumes at once
+    from app.utils.bulk_analysis import bulk_analysis_cli
+    app.cli.add_command(bulk_analysis_cli)
+    
     # Register custom Jinja2 filters
     import json
     @app.template_filter('from_json')
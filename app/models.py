@@ -3,6 +3,7 @@ from app import login_manager
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import json
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -125,8 +126,18 @@ class ResumeAnalyzer(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     suggestions = db.Column(db.Text)  # Store suggestions as text/JSON
+    preanalysis = db.Column(db.Text, nullable=True)  # local pre-analysis (JSON, see app/utils/resume_preanalysis.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def get_preanalysis(self):
+        """The stored pre-analysis as a dict, or None."""
+        if not self.preanalysis:
+            return None
+        try:
+            return json.loads(self.preanalysis)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
 class JobApplication(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -248,14 +259,193 @@ class JobMatchHistory(db.Model):
     def __repr__(self):
         return f'<JobMatchHistory {self.id} for User {self.user_id}>'
 
+class ExtractedDocument(db.Model):
+    """Text extracted from an uploaded file, shared by every upload with the same bytes (see app/utils/ingestion.py)."""
+    __tablename__ = 'extracted_document'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False, index=True)  # hash of the file bytes
+    size_bytes = db.Column(db.Integer, nullable=False)
+    page_count = db.Column(db.Integer, nullable=True)  # None for plain text
+    extractor = db.Column(db.String(20), nullable=False)  # pymupdf, pdfminer or text
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ExtractedDocument {self.sha256[:12]} ({self.size_bytes} bytes)>'
+
 class JobMatchResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     resume_file_name = db.Column(db.String(255), nullable=True)  # name of the uploaded resume document
-    resume_text = db.Column(db.Text, nullable=True)  # extracted text from the resume
+    resume_text = db.Column(db.Text, nullable=True)  # extracted text from the resume (unless document_id is set)
+    document_id = db.Column(db.Integer, db.ForeignKey('extracted_document.id'), nullable=True)  # shared extracted text
     interests_or_skills = db.Column(db.Text, nullable=True)  # user input skills or interests
     matched_roles = db.Column(db.Text, nullable=False)  # roles returned by AI (JSON format)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    document = db.relationship('ExtractedDocument')
+
+    def get_resume_text(self):
+        """The resume text, whether stored inline or in the shared extracted document."""
+        if self.resume_text is not None:
+            return self.resume_text
+        return self.document.text if self.document is not None else None
+
+    def __repr__(self):
+        return f'<JobMatchResult {self.id} for User {self.user_id}>'
+
+class AIJob(db.Model):
+    """AI work queued by a route and run by a background worker (see app/utils/job_queue.py)."""
+    __tablename__ = 'ai_job'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)  # name of the registered task
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, succeeded, failed
+    payload_json = db.Column(db.Text, nullable=False, server_default='{}')
+    result_json = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    
+    # Retry and visibility-timeout bookkeeping
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'result': json.loads(self.result_json) if self.result_json else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<AIJob {self.id} {self.kind} {self.status}>'
+
+class QuestionBucket(db.Model):
+    """Interview questions for one role/skill fingerprint (see app/utils/question_bank.py)."""
+    __tablename__ = 'question_bucket'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    terms = db.Column(db.Text, nullable=False)  # normalized role/skill terms the fingerprint was built from
+    requests = db.Column(db.Integer, nullable=False, default=0)  # simulator loads for this fingerprint
+    hits = db.Column(db.Integer, nullable=False, default=0)  # loads served from the bank
+    last_requested_at = db.Column(db.DateTime, nullable=True, index=True)
+    refill_requested_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    questions = db.relationship('BankQuestion', backref='bucket', lazy='dynamic', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<QuestionBucket {self.fingerprint} ({self.terms})>'
+
+class BankQuestion(db.Model):
+    """A generated interview question kept for reuse."""
+    __tablename__ = 'bank_question'
+    __table_args__ = (db.UniqueConstraint('bucket_id', 'question_hash', name='uq_bank_question_bucket_hash'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_id = db.Column(db.Integer, db.ForeignKey('question_bucket.id'), nullable=False, index=True)
+    question = db.Column(db.Text, nullable=False)
+    question_hash = db.Column(db.String(64), nullable=False)  # of the normalized text, to skip duplicates
+    times_served = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BankQuestion {self.id} in bucket {self.bucket_id}>'
+
+class ServedBankQuestion(db.Model):
+    """Which bank questions a user has already been given."""
+    __tablename__ = 'served_bank_question'
+    __table_args__ = (db.UniqueConstraint('user_id', 'question_id', name='uq_served_bank_question_user_question'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('bank_question.id'), nullable=False)
+    served_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ServedBankQuestion {self.question_id} to User {self.user_id}>'
+
+class BulkAnalysisRun(db.Model):
+    """A batch of resumes analyzed together from a ZIP or directory (see app/utils/bulk_analysis.py)."""
+    __tablename__ = 'bulk_analysis_run'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    source = db.Column(db.String(500), nullable=False)  # path of the ZIP file or directory
+    label = db.Column(db.String(255), nullable=True)  # name shown to the user, e.g. the uploaded ZIP's name
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, completed, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    succeeded = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    duplicates = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    items = db.relationship('BulkAnalysisItem', backref='run', lazy='dynamic', cascade='all, delete-orphan')
+    
+    @property
+    def processed(self):
+        return self.succeeded + self.failed + self.duplicates
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'label': self.label,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'duplicates': self.duplicates,
+            'percent': round(100 * self.processed / self.total, 1) if self.total else 0.0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<BulkAnalysisRun {self.id} {self.status} {self.processed}/{self.total}>'
+
+class BulkAnalysisItem(db.Model):
+    """One file of a bulk run; finished items are the run's checkpoint and are skipped on resume."""
+    __tablename__ = 'bulk_analysis_item'
+    __table_args__ = (db.UniqueConstraint('run_id', 'name', name='uq_bulk_analysis_item_run_name'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('bulk_analysis_run.id'), nullable=False, index=True)
+    name = db.Column(db.String(500), nullable=False)  # path inside the ZIP or directory
+    sha256 = db.Column(db.String(64), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False)  # succeeded, failed, duplicate
+    analysis_id = db.Column(db.Integer, db.ForeignKey('resume_analyzer.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {'name': self.name, 'status': self.status, 'analysis_id': self.analysis_id, 'error': self.error}
+    
     def __repr__(self):
-        return f'<JobMatchResult {self.id} for User {self.user_id}>'
\ No newline at end of file
+        return f'<BulkAnalysisItem {self.name} {self.status}>'
@@ -1,11 +1,19 @@
 import os
 os.environ['FLASK_ENV'] = 'development'
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, session, jsonify, abort
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, session, jsonify, abort, Response, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
-from app.models import InterviewFeedback, InterviewResponse, db, User
-from app.utils.ai_utils import generate_interview_questions, analyze_resume, evaluate_interview_answers
+from app.models import InterviewFeedback, InterviewResponse, AIJob, db, User
+from app.utils.ai_utils import analyze_resume, generate_interview_questions_stream, parse_interview_questions, pick_question_count
+from app.utils.question_bank import serve_interview_questions, serve_from_bank
+from app.utils.question_prefetch import prefetch_profile_questions, take_prefetched_questions
+from app.utils.helpers import format_sse
+from app.utils.ai_resilience import ai_deadline
+from app.utils.ai_tasks import run_answer_evaluation
+from app.utils.job_queue import job_config, enqueue, QueueFullError
+from app.routes.tasks import queued_response
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from app.forms.interview_forms import InterviewQuestionsForm, InterviewAnswersForm
 import traceback
 import json
@@ -26,16 +34,18 @@ def practice():
 
 @interview_bp.route('/interview-simulator', methods=['GET', 'POST'])
 @login_required
+@ai_deadline()
 def interview_simulator():
     form = InterviewQuestionsForm()
     questions = []
     
     if request.method == 'POST' and form.validate_on_submit():
         try:
-            # Generate interview questions based on the prompt
+            # Serve questions from the question bank, or generate them from the prompt
             prompt = form.prompt.data
             if prompt and len(prompt.strip()) > 0:
-                questions = generate_interview_questions(prompt)
+                questions = (take_prefetched_questions(current_user.id, prompt)
+                             or serve_interview_questions(current_user.id, prompt))
                 if not questions:
                     flash('Failed to generate questions. Please try again with more details.', 'warning')
                 session['generated_questions'] = questions  # Store in session for reference
@@ -44,6 +54,21 @@ def interview_simulator():
             current_app.logger.error(traceback.format_exc())
             flash('An error occurred while generating questions. Please try again.', 'error')
     
+    if request.method == 'GET' and not form.prompt.data and 'job' not in request.args:
+        # Pre-fill the saved resume and start generating its questions before the user submits
+        # (not when returning from an evaluation: the user is reading results, not starting over)
+        try:
+            form.prompt.data = prefetch_profile_questions(current_user.id)
+        except Exception as e:
+            current_app.logger.error(f"Error prefetching interview questions: {str(e)}")
+    
+    # Coming back from a queued evaluation: remember its responses like an inline one
+    job_id = request.args.get('job', type=int)
+    if job_id:
+        job = db.session.get(AIJob, job_id)
+        if job is not None and job.user_id == current_user.id and job.status == 'succeeded':
+            session['last_response_ids'] = job.to_dict()['result']['response_ids']
+    
     # Check for existing evaluated questions from database
     evaluated_questions = []
     if 'last_response_ids' in session:
@@ -74,8 +99,76 @@ def interview_simulator():
         title='Interview Simulator'
     )
 
+def _question_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='interview-questions-stream')
+
+@interview_bp.route('/interview-simulator/stream', methods=['POST'])
+@login_required
+def interview_simulator_stream():
+    """Generate interview questions and push the AI output as Server-Sent Events."""
+    form = InterviewQuestionsForm()
+    error = None
+    deltas = None
+    banked = None
+    num_questions = 0
+    if not form.validate_on_submit() or not form.prompt.data.strip():
+        error = 'Please provide your resume or job description'
+    else:
+        num_questions = pick_question_count()
+        banked = (take_prefetched_questions(current_user.id, form.prompt.data)
+                  or serve_from_bank(current_user.id, form.prompt.data, num_questions))
+        if not banked:
+            deltas, num_questions, error = generate_interview_questions_stream(form.prompt.data, num_questions=num_questions)
+    serializer = _question_serializer()
+    user_id = current_user.id
+    
+    def generate():
+        if error:
+            yield format_sse('error', {'error': error})
+            return
+        if banked:
+            # Prefetched or served from the question bank: nothing to stream
+            token = serializer.dumps({'user_id': user_id, 'questions': banked})
+            yield format_sse('done', {'questions': banked, 'token': token})
+            return
+        parts = []
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield format_sse('chunk', {'text': delta})
+        except Exception as e:
+            current_app.logger.error(f"Error streaming interview questions: {str(e)}")
+            yield format_sse('error', {'error': 'An error occurred while generating questions. Please try again.'})
+            return
+        questions = parse_interview_questions(''.join(parts), num_questions)
+        # The session cookie is already sent once streaming starts, so the browser
+        # hands this signed token back to /stream/commit to store the questions.
+        token = serializer.dumps({'user_id': user_id, 'questions': questions})
+        yield format_sse('done', {'questions': questions, 'token': token})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@interview_bp.route('/interview-simulator/stream/commit', methods=['POST'])
+@login_required
+def interview_simulator_stream_commit():
+    """Store questions produced by a finished stream in the user's session."""
+    token = (request.get_json(silent=True) or {}).get('token')
+    try:
+        payload = _question_serializer().loads(token, max_age=600)
+    except (BadSignature, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid or expired question token.'}), 400
+    if payload.get('user_id') != current_user.id:
+        return jsonify({'success': False, 'error': 'Invalid or expired question token.'}), 400
+    session['generated_questions'] = payload['questions']
+    return jsonify({'success': True})
+
 @interview_bp.route('/evaluate-answers', methods=['POST'])
 @login_required
+@ai_deadline()
 def evaluate_answers():
     try:
         if 'generated_questions' not in session:
@@ -93,47 +186,32 @@ def evaluate_answers():
         if len(answers) != len(questions):
             return jsonify({'error': 'Number of answers does not match number of questions.'}), 400
         
+        # Get resume filename from session if available
+        resume_filename = session.get('uploaded_resume_filename', None)
+        
+        if job_config.ENABLED:
+            # The worker stores the responses; the page polls the job and then
+            # loads the simulator with ?job=<id> to pick up the response ids
+            try:
+                job = enqueue('answer_evaluation', {
+                    'questions': questions,
+                    'answers': answers,
+                    'resume_filename': resume_filename
+                }, current_user.id)
+            except QueueFullError as e:
+                return jsonify({'error': str(e)}), 429
+            return queued_response(job)
+        
         # Evaluate answers using AI and store individual responses
         try:
-            evaluations = evaluate_interview_answers(questions, answers)
-            
-            # Get resume filename from session if available
-            resume_filename = session.get('uploaded_resume_filename', None)
-            
-            # Store each Q&A pair as individual InterviewResponse records
-            response_ids = []
-            for i in range(len(questions)):
-                evaluation = evaluations[i]
-                
-                response = InterviewResponse(
-                    user_id=current_user.id,
-                    resume_filename=resume_filename,
-                    question=questions[i],
-                    answer=answers[i],
-                    verdict=evaluation['verdict'],
-                    feedback=evaluation['feedback'],
-                    model_answer=evaluation.get('model_answer', '')
-                )
-                db.session.add(response)
-                db.session.flush()  # This ensures the ID is generated
-                response_ids.append(response.id)
-            
-            db.session.commit()
+            response_data = run_answer_evaluation(current_user.id, questions, answers, resume_filename)
+            response_ids = response_data['response_ids']
             
             # Store response IDs in session for reference
             session['last_response_ids'] = response_ids
             
             print(f"\n=== DEBUG: Interview responses saved successfully (IDs: {response_ids}) ===\n")
             
-            # Prepare response with all feedback data
-            response_data = {
-                'success': True,
-                'questions': questions,
-                'answers': answers,
-                'evaluations': evaluations,
-                'response_ids': response_ids
-            }
-            
             # Return the successful response
             return jsonify(response_data), 200
             
@@ -0,0 +1,53 @@
+import os
+import hmac
+from flask import Blueprint, jsonify, request, abort
+from flask_login import current_user
+from app.extensions import login_manager
+from app.utils.helpers import is_staff
+from app.utils.ai_utils import get_ai_client_stats, get_async_ai_client_stats, get_ai_cache_stats, get_singleflight_stats, get_router_stats, get_circuit_breaker_stats, get_cassette_stats, get_ai_telemetry_stats, get_role_matcher_stats
+from app.utils.metrics import histogram_snapshots
+from app.utils.job_queue import job_queue_stats
+from app.utils.question_bank import question_bank_stats
+from app.utils.question_prefetch import question_prefetch_stats
+from app.utils.ingestion import ingestion_stats
+from app.utils.resume_pdf_cache import resume_pdf_cache_stats
+from app.utils.resume_prerender import resume_prerender_stats
+
+metrics_bp = Blueprint('metrics', __name__)
+
+def _has_metrics_token():
+    """True if the request carries METRICS_TOKEN as a bearer token (for scrapers)."""
+    token = os.getenv('METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    return bool(token) and header.startswith('Bearer ') and hmac.compare_digest(header[7:].strip(), token)
+
+@metrics_bp.route('/ai')
+def ai_metrics():
+    """Connection pool, cache, single-flight, routing, breaker, streaming, job queue and per-call metrics for the AI layer."""
+    # Provider, cost and cache internals: staff accounts or the metrics token only
+    if not _has_metrics_token():
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not is_staff(current_user):
+            abort(403)
+    return jsonify({
+        'connection_pool': get_ai_client_stats(),
+        'async_client': get_async_ai_client_stats(),
+        'response_cache': get_ai_cache_stats(),
+        'single_flight': get_singleflight_stats(),
+        'router': get_router_stats(),
+        'circuit_breakers': get_circuit_breaker_stats(),
+        'stream_ttfb': histogram_snapshots('ai_stream_ttfb'),
+        'calls': get_ai_telemetry_stats(),
+        'call_latency': histogram_snapshots('ai_call_latency'),
+        'call_tokens': histogram_snapshots('ai_call_tokens'),
+        'job_queue': job_queue_stats(),
+        'cassette': get_cassette_stats(),
+        'question_bank': question_bank_stats(),
+        'question_prefetch': question_prefetch_stats(),
+        'ingestion': ingestion_stats(),
+        'extraction_latency': histogram_snapshots('extraction_'),
+        'resume_pdf_cache': resume_pdf_cache_stats(),
+        'resume_pdf_prerender': resume_prerender_stats(),
+        'role_matcher': get_role_matcher_stats()
+    })
@@ -1,27 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, make_response, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, make_response, session, Response, stream_with_context, abort
 from flask_login import login_required, current_user
 from app import db
 from app.models import Resume, UserPersonalInfo, UserEducation, UserExperience, UserProjects, UserSkills
+import os
 import json
 import io
 from datetime import datetime
-from app.utils.file_utils import html_to_pdf
-from app.utils.helpers import clean_resume_data
-from xhtml2pdf import pisa
+from app.utils.resume_pdf import render_resume_pdf, resolve_pdf_template
+from app.utils.resume_pdf_cache import pdf_cache_config, get_resume_pdf_cache
+from app.utils.resume_prerender import refresh_resume_pdf, wait_for_prerendered_pdf
+from app.utils.helpers import clean_resume_data, format_sse, staff_required
 from werkzeug.utils import secure_filename
-from app.models import ResumeAnalyzer
-from app.utils.ai_utils import analyze_resume
-import tempfile
+from app.models import ResumeAnalyzer, AIJob, BulkAnalysisRun
+from app.utils.ai_utils import analyze_resume_stream
+from app.utils.ai_resilience import ai_deadline
+from app.utils.ai_tasks import run_resume_analysis, run_job_match
+from app.utils.resume_preanalysis import preanalyze_resume, format_preanalysis
+from app.utils.ingestion import extract_upload, extract_upload_text, IngestionError
+from app.utils.bulk_analysis import bulk_config, create_bulk_run, save_bulk_upload, start_bulk_analysis, is_resumable, bulk_run_summary, count_active_bulk_runs
+from app.utils.job_queue import job_config, enqueue, QueueFullError
+from app.routes.tasks import wants_json, queued_response
 from app.models import JobMatch, JobMatchHistory, JobMatchResult
 from app.utils.file_utils import export_job_match_history_txt
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
 
 resume_bp = Blueprint('resume', __name__)
 
@@ -54,6 +54,7 @@ def save_personal_info(user_id, personal_data):
             db.session.add(personal_info)
         
         db.session.commit()
+        refresh_resume_pdf(user_id)
         return True
     except Exception as e:
         db.session.rollback()
@@ -78,6 +79,7 @@ def save_education(user_id, education_data):
                 db.session.add(education)
         
         db.session.commit()
+        refresh_resume_pdf(user_id)
         return True
     except Exception as e:
         db.session.rollback()
@@ -102,6 +104,7 @@ def save_experience(user_id, experience_data):
                 db.session.add(experience)
         
         db.session.commit()
+        refresh_resume_pdf(user_id)
         return True
     except Exception as e:
         db.session.rollback()
@@ -125,6 +128,7 @@ def save_projects(user_id, projects_data):
                 db.session.add(project)
         
         db.session.commit()
+        refresh_resume_pdf(user_id)
         return True
     except Exception as e:
         db.session.rollback()
@@ -148,6 +152,7 @@ def save_skills(user_id, skills_data):
                 db.session.add(user_skill)
         
         db.session.commit()
+        refresh_resume_pdf(user_id)
         return True
     except Exception as e:
         db.session.rollback()
@@ -372,14 +377,11 @@ def save_skills_step():
 def download_resume_pdf(resume_id):
     resume = Resume.query.get_or_404(resume_id)
     data = json.loads(resume.data)
-    html = render_template('resume/pdf_template.html', data=data)
-    pdf = io.BytesIO()
-    pisa_status = pisa.CreatePDF(html, dest=pdf)
-    if pisa_status.err:
+    pdf = render_resume_pdf(data, request.args.get('template'))
+    if not pdf:
         flash('Error generating PDF.', 'danger')
         return redirect(url_for('resume.view_resume', resume_id=resume.id))
-    pdf.seek(0)
-    return send_file(pdf, as_attachment=True, download_name='resume.pdf', mimetype='application/pdf')
+    return send_file(io.BytesIO(pdf), as_attachment=True, download_name='resume.pdf', mimetype='application/pdf')
 
 @resume_bp.route('/resume/download')
 @login_required
@@ -390,12 +392,38 @@ def download_latest_resume_pdf():
         flash('No resume found. Please create one.', 'info')
         return redirect(url_for('resume.resume_builder'))
     
-    html = render_template('resume/pdf_template.html', data=data)
-    pdf = html_to_pdf(html)
-    if not pdf:
-        flash('Error generating PDF.', 'danger')
-        return redirect(url_for('resume.view_latest_resume'))
-    return send_file(pdf, as_attachment=True, download_name='resume.pdf', mimetype='application/pdf')
+    template = resolve_pdf_template(request.args.get('template'))
+    if not pdf_cache_config.ENABLED:
+        pdf = render_resume_pdf(data, template)
+        if not pdf:
+            flash('Error generating PDF.', 'danger')
+            return redirect(url_for('resume.view_latest_resume'))
+        return send_file(io.BytesIO(pdf), as_attachment=True, download_name='resume.pdf', mimetype='application/pdf')
+    
+    # Same data and template as a previous download: reuse that PDF
+    cache = get_resume_pdf_cache()
+    key = cache.key(data, template)
+    if key in request.if_none_match:
+        cache.not_modified += 1
+        return _revalidated(make_response('', 304), key)
+    # Usually rendered in the background after the last save; render here only if that isn't ready
+    path = cache.get(current_user.id, key) or wait_for_prerendered_pdf(current_user.id, key)
+    if path is None:
+        pdf = render_resume_pdf(data, template)
+        if not pdf:
+            flash('Error generating PDF.', 'danger')
+            return redirect(url_for('resume.view_latest_resume'))
+        path = cache.put(current_user.id, key, pdf) or io.BytesIO(pdf)
+    return _revalidated(send_file(path, as_attachment=True, download_name='resume.pdf',
+                                  mimetype='application/pdf', etag=key), key)
+
+def _revalidated(response, key):
+    """Tag a resume PDF response with its cache key; browsers must revalidate it before reuse."""
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = None
+    return response
 
 @resume_bp.route('/templates')
 @login_required
@@ -433,57 +461,175 @@ def edit_resume():
     data = json.loads(resume.data_json)
     return render_template('resume/resume_builder.html', edit_mode=True, existing_data=data)
 
+def _get_finished_job(job_id):
+    """The current user's job ``job_id`` if it has finished, else None."""
+    job = db.session.get(AIJob, job_id)
+    if job is None or job.user_id != current_user.id or not job.finished:
+        return None
+    return job
+
 @resume_bp.route('/resume-analyzer', methods=['GET', 'POST'])
 @login_required
+@ai_deadline()
 def resume_analyzer():
     feedback = None
+    preanalysis = None
     error = None
+    job = None
     if request.method == 'POST':
         file = request.files.get('resume_file')
         if not file:
             error = 'No file uploaded.'
         else:
-            filename = secure_filename(file.filename)
-            ext = filename.rsplit('.', 1)[-1].lower()
-            text = ''
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.'+ext) as tmp:
-                    file.save(tmp.name)
-                    tmp_path = tmp.name
-                if ext == 'pdf':
-                    if HAS_PYMUPDF:
-                        doc = fitz.open(tmp_path)
-                        text = "\n".join(page.get_text() for page in doc)
-                        doc.close()
-                    else:
-                        from pdfminer.high_level import extract_text
-                        text = extract_text(tmp_path)
-                elif ext == 'txt':
-                    with open(tmp_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        text = f.read()
-                else:
-                    error = 'Unsupported file type.'
-            except Exception as e:
-                error = f'Error extracting text: {e}'
-            finally:
-                try:
-                    import os
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+            filename, text, error = extract_upload_text(file)
             if text and not error:
-                ai_result = analyze_resume(text)
-                if 'feedback' in ai_result:
-                    feedback = ai_result['feedback']
-                    # Store in ResumeAnalyzer
-                    uploaded = ResumeAnalyzer(user_id=current_user.id, filename=filename, suggestions=feedback)
-                    db.session.add(uploaded)
-                    db.session.commit()
+                # Local checks take milliseconds: shown right away, even while the AI job is queued
+                preanalysis = preanalyze_resume(text)
+                if job_config.ENABLED:
+                    # Hand the AI call to the job worker instead of holding this request
+                    try:
+                        job = enqueue('resume_analysis', {'filename': filename, 'text': text, 'preanalysis': preanalysis},
+                                      current_user.id)
+                        if wants_json():
+                            return queued_response(job)
+                    except QueueFullError as e:
+                        error = str(e)
                 else:
-                    error = ai_result.get('error', 'Unknown error from AI analysis.')
+                    ai_result = run_resume_analysis(current_user.id, filename, text, preanalysis)
+                    if 'feedback' in ai_result:
+                        feedback = ai_result['feedback']
+                    else:
+                        error = ai_result['error']
+        if error and wants_json():
+            return jsonify({'error': error}), 400
+    elif request.args.get('job', type=int):
+        # Landing here from a finished job: show its result like an inline analysis
+        job = _get_finished_job(request.args.get('job', type=int))
+        if job is not None:
+            feedback = (job.to_dict()['result'] or {}).get('feedback')
+            preanalysis = (job.to_dict()['result'] or {}).get('preanalysis')
+            error = job.error if job.status == 'failed' else None
+            job = None
     # Fetch all past uploads for this user, most recent first
     past_uploads = ResumeAnalyzer.query.filter_by(user_id=current_user.id).order_by(ResumeAnalyzer.created_at.desc()).all()
-    return render_template('resume/resume_upload.html', feedback=feedback, error=error, past_uploads=past_uploads)
+    return render_template('resume/resume_upload.html', feedback=feedback, error=error, past_uploads=past_uploads,
+                           preanalysis_summary=format_preanalysis(preanalysis),
+                           job=job, jobs_enabled=job_config.ENABLED)
+
+@resume_bp.route('/resume-analyzer/stream', methods=['POST'])
+@login_required
+def resume_analyzer_stream():
+    """Analyze an uploaded resume and push the AI feedback as Server-Sent Events."""
+    file = request.files.get('resume_file')
+    if not file:
+        filename, text, error = None, '', 'No file uploaded.'
+    else:
+        filename, text, error = extract_upload_text(file)
+    
+    deltas = None
+    preanalysis = None
+    if text and not error:
+        preanalysis = preanalyze_resume(text)
+        deltas, error = analyze_resume_stream(text, preanalysis=preanalysis)
+    elif not error:
+        error = 'No text could be extracted from the uploaded file.'
+    user_id = current_user.id
+    
+    def generate():
+        if preanalysis:
+            # Local results first, before the AI's first token
+            yield format_sse('preanalysis', {'preanalysis': preanalysis, 'summary': format_preanalysis(preanalysis)})
+        if error:
+            yield format_sse('error', {'error': error})
+            return
+        parts = []
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield format_sse('chunk', {'text': delta})
+        except Exception as e:
+            print(f"Error streaming resume analysis: {e}")
+            yield format_sse('error', {'error': 'The AI analysis was interrupted. Please try again.'})
+            return
+        feedback = ''.join(parts)
+        # Persist the complete analysis exactly like the non-streaming route does
+        try:
+            uploaded = ResumeAnalyzer(user_id=user_id, filename=filename, suggestions=feedback,
+                                      preanalysis=json.dumps(preanalysis))
+            db.session.add(uploaded)
+            db.session.commit()
+            yield format_sse('done', {'id': uploaded.id})
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error saving streamed resume analysis: {e}")
+            yield format_sse('error', {'error': 'The analysis finished but could not be saved.'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _get_user_bulk_run(run_id):
+    run = db.session.get(BulkAnalysisRun, run_id)
+    if run is None or run.user_id != current_user.id:
+        abort(404)
+    return run
+
+def _bulk_run_limit_response():
+    """A 429 response when the user already has as many active bulk runs as allowed, else None."""
+    active = count_active_bulk_runs(current_user.id)
+    if active >= bulk_config.MAX_ACTIVE_RUNS:
+        return jsonify({'error': f'You already have {active} bulk runs in progress. Please wait for them to finish.'}), 429
+    return None
+
+# Bulk runs fan out into hundreds of AI calls, so they are a staff tool
+@resume_bp.route('/resume-analyzer/bulk', methods=['GET', 'POST'])
+@staff_required
+def bulk_resume_analysis():
+    """Start analyzing a ZIP of resumes (POST), or list the user's bulk runs (GET)."""
+    if request.method == 'GET':
+        runs = BulkAnalysisRun.query.filter_by(user_id=current_user.id).order_by(BulkAnalysisRun.created_at.desc()).all()
+        return jsonify({'runs': [bulk_run_summary(run) for run in runs]})
+    
+    file = request.files.get('archive')
+    if not file or not (file.filename or '').lower().endswith('.zip'):
+        return jsonify({'error': 'Upload a ZIP file of PDF or TXT resumes.'}), 400
+    limited = _bulk_run_limit_response()
+    if limited:
+        return limited
+    path = None
+    try:
+        path = save_bulk_upload(file)
+        run = create_bulk_run(current_user.id, path, label=secure_filename(file.filename))
+    except IngestionError as e:
+        if path and os.path.exists(path):
+            os.remove(path)
+        return jsonify({'error': str(e)}), 400
+    start_bulk_analysis(run)
+    return jsonify(dict(bulk_run_summary(run),
+                        progress_url=url_for('resume.bulk_resume_analysis_status', run_id=run.id))), 202
+
+@resume_bp.route('/resume-analyzer/bulk/<int:run_id>')
+@staff_required
+def bulk_resume_analysis_status(run_id):
+    """Progress of a bulk run; ``?items=1`` adds the files that failed."""
+    run = _get_user_bulk_run(run_id)
+    return jsonify(bulk_run_summary(run, items=request.args.get('items', type=int) == 1))
+
+@resume_bp.route('/resume-analyzer/bulk/<int:run_id>/resume', methods=['POST'])
+@staff_required
+def resume_bulk_resume_analysis(run_id):
+    """Continue an interrupted or failed bulk run from its last checkpoint."""
+    run = _get_user_bulk_run(run_id)
+    if not is_resumable(run) or run.status == 'queued':
+        return jsonify({'error': f'This run is {run.status}.'}), 409
+    limited = _bulk_run_limit_response()
+    if limited:
+        return limited
+    start_bulk_analysis(run)
+    return jsonify(dict(bulk_run_summary(run),
+                        progress_url=url_for('resume.bulk_resume_analysis_status', run_id=run.id))), 202
 
 @resume_bp.route('/download-feedback/<int:upload_id>')
 @login_required
@@ -495,6 +641,9 @@ def download_feedback(upload_id):
     # Create a text file with the feedback
     feedback_text = f"Resume Analysis Feedback\n"
     feedback_text += f"Date: {upload.created_at.strftime('%Y-%m-%d %H:%M')}\n"
+    quick_check = format_preanalysis(upload.get_preanalysis())
+    if quick_check:
+        feedback_text += f"\n=== Quick Check ===\n{quick_check}\n"
     feedback_text += f"\n=== AI Feedback ===\n{upload.suggestions}"
     
     # Create a file-like object in memory
@@ -512,6 +661,7 @@ def download_feedback(upload_id):
 
 @resume_bp.route('/job-matcher', methods=['GET', 'POST'])
 @login_required
+@ai_deadline()
 def job_matcher():
     roles = None
     error = None
@@ -519,43 +669,20 @@ def job_matcher():
     input_text = ''
     resume_file_name = None
     resume_text = None
+    document_id = None
     interests_or_skills = None
+    job = None
     
     if request.method == 'POST':
         file = request.files.get('resume_file')
         manual_input = request.form.get('manual_input', '').strip()
         
         if file and file.filename:
-            resume_file_name = secure_filename(file.filename)
-            ext = resume_file_name.rsplit('.', 1)[-1].lower()
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.'+ext) as tmp:
-                    file.save(tmp.name)
-                    tmp_path = tmp.name
-                if ext == 'pdf':
-                    if HAS_PYMUPDF:
-                        doc = fitz.open(tmp_path)
-                        input_text = "\n".join(page.get_text() for page in doc)
-                        doc.close()
-                    else:
-                        from pdfminer.high_level import extract_text
-                        input_text = extract_text(tmp_path)
-                elif ext == 'txt':
-                    with open(tmp_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        input_text = f.read()
-                else:
-                    error = 'Unsupported file type.'
-            except Exception as e:
-                error = f'Error extracting text: {e}'
-            finally:
-                try:
-                    import os
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+            resume_file_name, document, error = extract_upload(file)
             
-            if input_text and not error:
-                resume_text = input_text
+            if document and document['text'] and not error:
+                input_text = resume_text = document['text']
+                document_id = document['document_id']
         elif manual_input:
             input_text = manual_input
             interests_or_skills = manual_input
@@ -563,31 +690,34 @@ def job_matcher():
             error = 'Please upload a resume or enter your skills/interests.'
             
         if input_text and not error:
-            from app.utils.ai_utils import match_job_roles
-            ai_result = match_job_roles(input_text)
-            if 'roles' in ai_result:
-                roles = ai_result['roles']
-                # Normalize: if roles is a list of strings, convert to list of dicts with all keys
-                if roles and isinstance(roles[0], str):
-                    roles = [{'job_title': r, 'skills': None, 'certifications': None} for r in roles]
-                
-                # Save to JobMatchResult table
+            match_args = {
+                'input_text': input_text,
+                'resume_file_name': resume_file_name,
+                'resume_text': resume_text,
+                'interests_or_skills': interests_or_skills,
+                'document_id': document_id
+            }
+            if job_config.ENABLED:
                 try:
-                    job_match_result = JobMatchResult(
-                        user_id=current_user.id,
-                        resume_file_name=resume_file_name,
-                        resume_text=resume_text,
-                        interests_or_skills=interests_or_skills,
-                        matched_roles=json.dumps(roles)
-                    )
-                    db.session.add(job_match_result)
-                    db.session.commit()
-                except Exception as e:
-                    print(f"Error saving job match result: {e}")
-                    db.session.rollback()
+                    job = enqueue('job_match', match_args, current_user.id)
+                    if wants_json():
+                        return queued_response(job)
+                except QueueFullError as e:
+                    error = str(e)
             else:
-                error = ai_result.get('error', 'Unknown error from AI analysis.')
-                error_message = ai_result.get('raw', None)
+                ai_result = run_job_match(current_user.id, **match_args)
+                if 'roles' in ai_result:
+                    roles = ai_result['roles']
+                else:
+                    error = ai_result['error']
+                    error_message = ai_result.get('raw')
+        if error and wants_json():
+            return jsonify({'error': error}), 400
+    elif request.args.get('job', type=int):
+        finished_job = _get_finished_job(request.args.get('job', type=int))
+        if finished_job is not None:
+            roles = (finished_job.to_dict()['result'] or {}).get('roles')
+            error = finished_job.error if finished_job.status == 'failed' else None
     
     # Fetch all past job match results for this user, most recent first
     past_job_match_results = JobMatchResult.query.filter_by(user_id=current_user.id).order_by(JobMatchResult.created_at.desc()).all()
@@ -603,7 +733,7 @@ def job_matcher():
         parsed_past_results.append({
             'id': result.id,
             'resume_file_name': result.resume_file_name,
-            'resume_text': result.resume_text,
+            'resume_text': result.get_resume_text(),
             'interests_or_skills': result.interests_or_skills,
             'matched_roles': matched_roles,
             'created_at': result.created_at
@@ -613,7 +743,9 @@ def job_matcher():
                          roles=roles, 
                          error=error, 
                          error_message=error_message, 
-                         past_job_match_results=parsed_past_results)
+                         past_job_match_results=parsed_past_results,
+                         job=job,
+                         jobs_enabled=job_config.ENABLED)
 
 @resume_bp.route('/job-matcher/delete/<int:match_id>', methods=['POST'])
 @login_required
@@ -665,11 +797,12 @@ def job_match_history():
                 matched_roles = json.loads(result.matched_roles) if result.matched_roles else []
             except json.JSONDecodeError:
                 matched_roles = []
+            resume_text = result.get_resume_text()
             
             parsed_results.append({
                 'id': result.id,
                 'resume_file_name': result.resume_file_name,
-                'resume_text': result.resume_text[:200] + '...' if result.resume_text and len(result.resume_text) > 200 else result.resume_text,
+                'resume_text': resume_text[:200] + '...' if resume_text and len(resume_text) > 200 else resume_text,
                 'interests_or_skills': result.interests_or_skills,
                 'matched_roles': matched_roles,
                 'created_at': result.created_at
@@ -734,40 +867,12 @@ def download_resume():
             flash('No resume found.', 'warning')
             return redirect(url_for('resume.resume_builder'))
 
-        # Generate PDF
-        pdf_buffer = BytesIO()
-        pdf = canvas.Canvas(pdf_buffer, pagesize=letter)
-        pdf.setTitle("Resume")
-        pdf.drawString(100, 750, "Resume")
-        pdf.drawString(100, 730, f"Full Name: {data.get('personal', {}).get('fullName', 'N/A')}")
-        pdf.drawString(100, 710, f"Email: {data.get('personal', {}).get('email', 'N/A')}")
-        pdf.drawString(100, 690, f"Phone: {data.get('personal', {}).get('phone', 'N/A')}")
-        pdf.drawString(100, 670, f"Summary: {data.get('personal', {}).get('summary', 'N/A')}")
-        pdf.drawString(100, 650, "Education:")
-        y = 630
-        for edu in data.get('education', []):
-            pdf.drawString(100, y, f"{edu.get('institution', 'N/A')} - {edu.get('degree', 'N/A')} ({edu.get('year', 'N/A')})")
-            y -= 20
-        pdf.drawString(100, y, "Experience:")
-        y -= 20
-        for exp in data.get('experience', []):
-            pdf.drawString(100, y, f"{exp.get('title', 'N/A')} at {exp.get('company', 'N/A')} ({exp.get('duration', 'N/A')})")
-            y -= 20
-        pdf.drawString(100, y, "Projects:")
-        y -= 20
-        for proj in data.get('projects', []):
-            pdf.drawString(100, y, f"{proj.get('title', 'N/A')}: {proj.get('description', 'N/A')}")
-            y -= 20
-        pdf.drawString(100, y, "Skills:")
-        y -= 20
-        for skill in data.get('skills', []):
-            pdf.drawString(100, y, skill)
-            y -= 20
-        pdf.save()
-
-        # Return PDF as response
-        pdf_buffer.seek(0)
-        response = make_response(pdf_buffer.read())
+        # Structured layout: paginates however long the resume is
+        pdf = render_resume_pdf(data, 'structured')
+        if not pdf:
+            flash('Error generating PDF.', 'danger')
+            return redirect(url_for('resume.resume_builder'))
+        response = make_response(pdf)
         response.headers['Content-Type'] = 'application/pdf'
         response.headers['Content-Disposition'] = 'attachment; filename=resume.pdf'
         return response
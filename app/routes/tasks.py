@@ -0,0 +1,70 @@
+import time
+from flask import Blueprint, jsonify, abort, request, url_for, Response, stream_with_context
+from flask_login import login_required, current_user
+from app import db
+from app.models import AIJob
+from app.utils.helpers import format_sse
+from app.utils.job_queue import job_config
+
+tasks_bp = Blueprint('tasks', __name__)
+
+# How long an events stream follows a job before asking the page to reconnect
+EVENTS_MAX_SECONDS = 120
+
+
+def wants_json():
+    """True when the client asked for JSON (fetch/XHR) rather than a page."""
+    return request.accept_mimetypes.best == 'application/json'
+
+
+def queued_response(job):
+    """202 response telling the page where to follow a queued job."""
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('tasks.job_status', job_id=job.id),
+        'events_url': url_for('tasks.job_events', job_id=job.id)
+    }), 202
+
+
+def _get_user_job(job_id):
+    job = db.session.get(AIJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        abort(404)
+    return job
+
+
+@tasks_bp.route('/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Current status of a job, with its result once it has finished."""
+    return jsonify(_get_user_job(job_id).to_dict())
+
+
+@tasks_bp.route('/<int:job_id>/events')
+@login_required
+def job_events(job_id):
+    """Follow a job as Server-Sent Events until it finishes."""
+    job = _get_user_job(job_id)
+
+    def generate():
+        last_status = None
+        started = time.monotonic()
+        while time.monotonic() - started < EVENTS_MAX_SECONDS:
+            db.session.refresh(job)
+            if job.status != last_status:
+                last_status = job.status
+                yield format_sse('status', {'status': job.status, 'attempts': job.attempts})
+            if job.finished:
+                yield format_sse('done', job.to_dict())
+                return
+            # End the read transaction so the next refresh sees the worker's commit
+            db.session.commit()
+            time.sleep(job_config.POLL_INTERVAL)
+        yield format_sse('timeout', {'status': job.status})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,48 @@
+// CareerCraft background AI jobs
+//
+// Routes that queue AI work answer with {job_id, status_url, events_url}.
+// followJob() polls the status URL until the job finishes and resolves
+// with the finished job ({status: 'succeeded' | 'failed', result, error}).
+
+(function() {
+    const POLL_INTERVAL_MS = 1500;
+
+    async function followJob(statusUrl, onStatus) {
+        let lastStatus = null;
+        while (true) {
+            const response = await fetch(statusUrl, {
+                headers: { 'Accept': 'application/json' },
+                credentials: 'same-origin'
+            });
+            if (!response.ok) {
+                throw new Error(`Server responded with status: ${response.status}`);
+            }
+            const job = await response.json();
+            if (job.status !== lastStatus) {
+                lastStatus = job.status;
+                if (onStatus) onStatus(job);
+            }
+            if (job.status === 'succeeded' || job.status === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+        }
+    }
+
+    // Submit a form to a queueing route and wait for its job to finish
+    async function submitAndFollow(url, body, onStatus) {
+        const response = await fetch(url, {
+            method: 'POST',
+            body: body,
+            headers: { 'Accept': 'application/json' },
+            credentials: 'same-origin'
+        });
+        const data = await response.json().catch(() => ({}));
+        if (response.status !== 202) {
+            throw new Error(data.error || `Server responded with status: ${response.status}`);
+        }
+        return followJob(data.status_url, onStatus);
+    }
+
+    window.CareerCraftJobs = { followJob: followJob, submitAndFollow: submitAndFollow };
+})();
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def make_cache_key(messages: List[Dict[str, str]],
+                   model: str,
+                   temperature: float,
+                   max_tokens: int) -> str:
+    """
+    Content address for an AI request.
+
+    Everything that can change the completion goes into the hash, serialized
+    canonically so dict ordering never produces a different key.
+    """
+    payload = json.dumps(
+        {
+            "messages": messages,
+            "model": model,
+            "temperature": round(float(temperature), 4),
+            "max_tokens": int(max_tokens),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with a TTL and a maximum number of entries."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk cache shared by every worker process on the host.
+
+    Entries expire after ``ttl`` seconds; once the table grows past
+    ``max_entries`` the least recently used rows are deleted. Pruning runs
+    every ``prune_every`` writes rather than on each one, so the table can
+    briefly hold up to that many rows too many.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl: float = 86400, prune_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = max(1, prune_every)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_response_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_ai_response_cache_last_used"
+                " ON ai_response_cache (last_used_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at FROM ai_response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        now = time.time()
+        if expires_at < now:
+            conn.execute("DELETE FROM ai_response_cache WHERE key = ?", (key,))
+            with self._lock:
+                self.expirations += 1
+            return None
+        conn.execute("UPDATE ai_response_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: dict):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_response_cache (key, value, expires_at, last_used_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl, now),
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 0
+        if due:
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        expired = conn.execute(
+            "DELETE FROM ai_response_cache WHERE expires_at < ?", (now,)
+        ).rowcount
+        overflow = self.size() - self.max_entries
+        evicted = 0
+        if overflow > 0:
+            evicted = conn.execute(
+                "DELETE FROM ai_response_cache WHERE key IN ("
+                " SELECT key FROM ai_response_cache ORDER BY last_used_at LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        with self._lock:
+            self.expirations += max(expired, 0)
+            self.evictions += max(evicted, 0)
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0]
+
+    def clear(self):
+        self._connect().execute("DELETE FROM ai_response_cache")
+
+
+class AIResponseCache:
+    """Front for a cache backend that keeps hit/miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"[ERROR] AI cache read failed: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: dict):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"[ERROR] AI cache write failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            "backend": self.backend.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "expirations": self.backend.expirations,
+            "size": size,
+            "max_entries": self.backend.max_entries,
+            "ttl": self.backend.ttl,
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+
+def build_cache_from_env() -> Optional[AIResponseCache]:
+    """
+    Build the cache described by the AI_CACHE_* environment variables.
+
+    AI_CACHE_BACKEND is 'memory' (default), 'sqlite' or 'none'.
+    """
+    backend_name = os.getenv("AI_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("AI_CACHE_TTL", "3600"))
+    if backend_name == "none":
+        return None
+    if backend_name == "sqlite":
+        path = os.getenv(
+            "AI_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "careercraft_ai_cache.sqlite3"),
+        )
+        max_entries = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+        # Expired and least recently used rows are pruned every this many writes
+        prune_every = int(os.getenv("AI_CACHE_PRUNE_EVERY", "100"))
+        return AIResponseCache(SQLiteCacheBackend(path, max_entries=max_entries, ttl=ttl, prune_every=prune_every))
+    if backend_name != "memory":
+        print(f"[ERROR] Invalid AI cache backend: {backend_name}. Defaulting to 'memory'.")
+    max_entries = int(os.getenv("AI_CACHE_MAX_ENTRIES", "512"))
+    return AIResponseCache(MemoryCacheBackend(max_entries=max_entries, ttl=ttl))
+
+
+_cache = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> Optional[AIResponseCache]:
+    """Return the process-wide AI response cache, or None when disabled."""
+    global _cache, _cache_initialized
+    if not _cache_initialized:
+        with _cache_lock:
+            if not _cache_initialized:
+                _cache = build_cache_from_env()
+                _cache_initialized = True
+    return _cache
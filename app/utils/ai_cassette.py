@@ -0,0 +1,129 @@
+import os
+import json
+import threading
+from typing import Dict, List, Optional
+
+from app.utils.ai_cache import make_cache_key
+
+
+class Cassette:
+    """
+    Recorded AI responses keyed by request, stored as JSON lines.
+
+    In 'record' mode every successful provider response is appended to the
+    file; in 'replay' mode requests are answered from the file and never
+    reach a provider, so routes can be exercised (and benchmarked) offline
+    with real model output. Keys cover the messages, temperature and
+    max_tokens but not the provider, so a replay doesn't depend on which
+    provider the router would have picked. Requests recorded more than
+    once are replayed in recording order, wrapping around.
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = {}
+        self._next: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        if os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def key(messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        return make_cache_key(messages, "cassette", temperature, max_tokens)
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry["response"])
+                except (ValueError, KeyError) as e:
+                    print(f"[ERROR] Skipping bad cassette line {line_number} in {self.path}: {e}")
+
+    def lookup(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Optional[dict]:
+        """The recorded response for this request, or None if it was never recorded."""
+        key = self.key(messages, temperature, max_tokens)
+        with self._lock:
+            responses = self._entries.get(key)
+            if not responses:
+                self.misses += 1
+                return None
+            position = self._next.get(key, 0)
+            self._next[key] = (position + 1) % len(responses)
+            self.hits += 1
+            return responses[position]
+
+    def record(self,
+               provider: str,
+               messages: List[Dict[str, str]],
+               temperature: float,
+               max_tokens: int,
+               response: dict):
+        key = self.key(messages, temperature, max_tokens)
+        line = json.dumps({
+            "key": key,
+            "provider": provider,
+            "request": {"messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            "response": response,
+        }, ensure_ascii=False)
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"[ERROR] Could not write AI cassette {self.path}: {e}")
+                return
+            self._entries.setdefault(key, []).append(response)
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "requests": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "recorded": self.recorded,
+            }
+
+
+def build_cassette_from_env() -> Optional[Cassette]:
+    """
+    Build the cassette described by AI_CASSETTE (a .jsonl path) and
+    AI_CASSETTE_MODE ('record' or 'replay', default 'replay').
+    """
+    path = os.getenv("AI_CASSETTE")
+    if not path:
+        return None
+    mode = os.getenv("AI_CASSETTE_MODE", "replay").lower()
+    if mode not in Cassette.MODES:
+        print(f"[ERROR] Invalid AI cassette mode: {mode}. Defaulting to 'replay'.")
+        mode = "replay"
+    return Cassette(path, mode)
+
+
+_cassette = None
+_cassette_initialized = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette, or None when recording/replay is off."""
+    global _cassette, _cassette_initialized
+    if not _cassette_initialized:
+        with _cassette_lock:
+            if not _cassette_initialized:
+                _cassette = build_cassette_from_env()
+                _cassette_initialized = True
+    return _cassette
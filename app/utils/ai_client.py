@@ -0,0 +1,305 @@
+import os
+import time
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.utils.ai_telemetry import count_retries
+from app.utils.ai_resilience import deadline_remaining
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def _capped_timeout(config: "AIClientConfig", budget: Optional[float]):
+    if budget is None:
+        return (config.CONNECT_TIMEOUT, config.READ_TIMEOUT)
+    budget = max(budget, 0.001)
+    return (min(config.CONNECT_TIMEOUT, budget), min(config.READ_TIMEOUT, budget))
+
+
+def _retry_delay(config: "AIClientConfig", headers, attempt: int) -> float:
+    """Seconds to wait before retrying: the provider's Retry-After, else exponential backoff."""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return config.BACKOFF_FACTOR * (2 ** attempt)
+
+
+class _DeadlineRetry(Retry):
+    """urllib3 connection retries that stop once the request deadline can't cover the next backoff."""
+
+    def is_exhausted(self) -> bool:
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= self.get_backoff_time():
+            return True
+        return super().is_exhausted()
+
+
+class AIClientConfig:
+    def __init__(self):
+        # Connection pool sizing (per provider host)
+        self.POOL_CONNECTIONS = int(os.getenv("AI_POOL_CONNECTIONS", "4"))
+        self.POOL_MAXSIZE = int(os.getenv("AI_POOL_MAXSIZE", "16"))
+        self.POOL_BLOCK = os.getenv("AI_POOL_BLOCK", "false").lower() == "true"
+
+        # Keep-alive is on by default; set to false to close after every call
+        self.KEEP_ALIVE = os.getenv("AI_KEEP_ALIVE", "true").lower() == "true"
+
+        # Timeouts in seconds
+        self.CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+        self.READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "120"))
+
+        # Retry with exponential backoff on 429/5xx and connection errors
+        self.MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+        self.BACKOFF_FACTOR = float(os.getenv("AI_BACKOFF_FACTOR", "0.5"))
+
+        # Connection cap of the asyncio client (one pool shared by every coroutine)
+        self.ASYNC_MAX_CONNECTIONS = int(os.getenv("AI_ASYNC_MAX_CONNECTIONS", "100"))
+
+
+class ProviderClient:
+    """
+    Shared HTTP client for AI provider calls.
+
+    Keeps one ``requests.Session`` per provider host so every call reuses a
+    pooled keep-alive connection instead of paying a fresh TCP and TLS
+    handshake. Sessions are created lazily under a lock and are safe to
+    share between request threads.
+
+    Connection errors are retried inside the adapter; 429/5xx responses are
+    retried by ``post`` itself, so that every attempt's timeout and backoff
+    can be taken out of the same time budget.
+    """
+
+    def __init__(self, config: AIClientConfig = None):
+        self.config = config or AIClientConfig()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _build_retry(self) -> Retry:
+        return _DeadlineRetry(
+            total=self.config.MAX_RETRIES,
+            connect=self.config.MAX_RETRIES,
+            read=0,  # never replay a request the provider may already be generating
+            status=0,  # status codes are retried by post(), within the caller's budget
+            backoff_factor=self.config.BACKOFF_FACTOR,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.POOL_CONNECTIONS,
+            pool_maxsize=self.config.POOL_MAXSIZE,
+            pool_block=self.config.POOL_BLOCK,
+            max_retries=self._build_retry(),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.config.KEEP_ALIVE:
+            session.headers["Connection"] = "close"
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled session for the host of ``url``."""
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[host] = session
+        return session
+
+    def timeout(self, budget: Optional[float] = None):
+        """
+        (connect, read) timeout tuple.
+
+        ``budget`` caps both parts, e.g. the time left before a request
+        deadline, so a call can never outlive it.
+        """
+        return _capped_timeout(self.config, budget)
+
+    def post(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        POST through the pooled session for ``url``'s host, retrying 429/5xx
+        with exponential backoff.
+
+        ``timeout`` is the budget for the whole call, retries included: each
+        attempt gets what is left of it, and no retry is made once the rest
+        can't cover the wait before it.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        session = self.session_for(url)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            response = session.post(url, timeout=self.timeout(remaining), **kwargs)
+            # Connection retries happen inside the adapter; report them for call telemetry
+            retries = getattr(getattr(response.raw, "retries", None), "history", None)
+            if retries:
+                count_retries(len(retries))
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.config.MAX_RETRIES:
+                return response
+            delay = _retry_delay(self.config, response.headers, attempt)
+            if deadline is not None and delay >= deadline - time.monotonic():
+                return response  # not enough budget left to wait and try again
+            response.close()
+            count_retries()
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Pool hit/miss counters per host.
+
+        A miss is a request that had to open a new connection; every other
+        request was served from an already open keep-alive connection.
+        """
+        result = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for host, session in sessions:
+            requests_made = 0
+            connections_opened = 0
+            adapter = session.get_adapter(f"https://{host}")
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_made += pool.num_requests
+                connections_opened += pool.num_connections
+            result[host] = {
+                "requests": requests_made,
+                "pool_hits": max(requests_made - connections_opened, 0),
+                "pool_misses": connections_opened,
+            }
+        return result
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ai_client() -> ProviderClient:
+    """Return the process-wide provider client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ProviderClient()
+    return _client
+
+
+class AsyncProviderClient:
+    """
+    Shared asyncio HTTP client for AI provider calls.
+
+    Wraps one ``httpx.AsyncClient`` whose connection pool is shared by every
+    coroutine on the event loop, so a single loop can keep hundreds of
+    provider calls in flight. Retries on 429/5xx follow the same
+    AI_MAX_RETRIES / AI_BACKOFF_FACTOR settings as the blocking client.
+    """
+
+    def __init__(self, config: AIClientConfig = None):
+        if not HAS_HTTPX:
+            raise RuntimeError("httpx is required for async AI calls (pip install httpx)")
+        self.config = config or AIClientConfig()
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.config.ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=self.config.ASYNC_MAX_CONNECTIONS if self.config.KEEP_ALIVE else 0,
+            ),
+            # Connection errors are retried by the transport; status codes below
+            transport=httpx.AsyncHTTPTransport(retries=self.config.MAX_RETRIES),
+        )
+        self.requests = 0
+        self.retries = 0
+
+    def timeout(self, budget: Optional[float] = None) -> "httpx.Timeout":
+        connect, read = _capped_timeout(self.config, budget)
+        return httpx.Timeout(read, connect=connect)
+
+    async def post(self, url: str, timeout: Optional[float] = None, **kwargs) -> "httpx.Response":
+        """
+        POST through the shared pool, retrying 429/5xx with exponential backoff.
+
+        As with ProviderClient.post, ``timeout`` budgets the whole call:
+        each attempt gets what is left of it, and no retry is made once the
+        rest can't cover the wait before it.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            self.requests += 1
+            response = await self._client.post(url, timeout=self.timeout(remaining), **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.config.MAX_RETRIES:
+                return response
+            delay = _retry_delay(self.config, response.headers, attempt)
+            if deadline is not None and delay >= deadline - time.monotonic():
+                return response  # not enough budget left to wait and try again
+            await response.aclose()
+            self.retries += 1
+            count_retries()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "retries": self.retries}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# httpx clients are bound to the loop they were first used on, so keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_ai_client() -> AsyncProviderClient:
+    """Return the async provider client of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncProviderClient()
+            _async_clients[loop] = client
+    return client
+
+
+def async_ai_client_stats() -> Dict[str, int]:
+    """Request and retry counters summed over every live async client."""
+    with _async_clients_lock:
+        clients = list(_async_clients.values())
+    return {
+        "event_loops": len(clients),
+        "requests": sum(client.requests for client in clients),
+        "retries": sum(client.retries for client in clients),
+    }
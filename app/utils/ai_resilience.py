@@ -0,0 +1,224 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import current_app
+
+
+# ---------------------------------------------------------------------------
+# Circuit breakers
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    CLOSED: calls flow normally; ``failure_threshold`` consecutive failures
+    open the circuit.
+    OPEN: calls are rejected immediately until ``recovery_timeout`` seconds
+    have passed.
+    HALF_OPEN: up to ``half_open_max_calls`` probe calls are let through; a
+    success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 recovery_timeout: float = 30, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _refresh(self):
+        # Caller holds the lock
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def is_available(self) -> bool:
+        """True if a call would currently be let through (does not reserve a probe)."""
+        with self._lock:
+            self._refresh()
+            if self._state == self.HALF_OPEN:
+                return self._half_open_calls < self.half_open_max_calls
+            return self._state == self.CLOSED
+
+    def allow(self) -> bool:
+        """Reserve permission for one call; False means fail fast."""
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Give back a probe reserved by ``allow`` for a call that was abandoned."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            self._refresh()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Return the circuit breaker for ``provider``, creating it on first use."""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    provider,
+                    failure_threshold=int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5")),
+                    recovery_timeout=float(os.getenv("AI_BREAKER_RECOVERY_TIMEOUT", "30")),
+                    half_open_max_calls=int(os.getenv("AI_BREAKER_HALF_OPEN_CALLS", "1")),
+                )
+                _breakers[provider] = breaker
+    return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {name: breaker.snapshot() for name, breaker in breakers}
+
+
+# Provider errors read "<status> <body>" or "<Provider> API error: <status> <detail>"
+_ERROR_STATUS_RE = re.compile(r"^(?:[\w ]+ API error: )?([1-5]\d\d)\b")
+
+
+def error_status(error: Optional[str]) -> Optional[int]:
+    """The HTTP status in a provider error message, or None for transport errors and the like."""
+    match = _ERROR_STATUS_RE.match(error or "")
+    return int(match.group(1)) if match else None
+
+
+def is_provider_failure(error: Optional[str]) -> bool:
+    """
+    Whether a failed call says the provider is unhealthy: transport errors,
+    timeouts, 429 and 5xx. Other 4xx responses are about the request or
+    the account, and must not open the breaker for every user.
+    """
+    status = error_status(error)
+    return status is None or status in (408, 429) or status >= 500
+
+
+def is_request_error(error: Optional[str]) -> bool:
+    """A 4xx caused by the request itself (invalid, too long): another provider won't do better."""
+    status = error_status(error)
+    return status is not None and 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+
+# ---------------------------------------------------------------------------
+# Request-scoped deadlines
+# ---------------------------------------------------------------------------
+
+# Absolute time.monotonic() by which AI work for the current request must finish
+_deadline: contextvars.ContextVar = contextvars.ContextVar("ai_deadline", default=None)
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left in the current deadline, or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def deadline_exceeded() -> bool:
+    remaining = deadline_remaining()
+    return remaining is not None and remaining <= 0
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Run a block under a deadline ``seconds`` from now.
+
+    A nested scope can only shorten an enclosing deadline, never extend it.
+    ``None`` leaves the current deadline untouched.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def ai_deadline(seconds: float = None):
+    """
+    Route decorator giving AI calls made by the view a time budget.
+
+    Defaults to the app's AI_REQUEST_BUDGET. Once the budget is spent,
+    ai_request fails fast with an error instead of holding the worker.
+    The deadline lives in a context variable; code that hands work to other
+    threads must run it with ``contextvars.copy_context().run``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            budget = seconds if seconds is not None else current_app.config.get('AI_REQUEST_BUDGET')
+            with deadline_scope(budget):
+                return view(*args, **kwargs)
+        return wrapped
+    return decorator
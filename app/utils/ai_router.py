@@ -0,0 +1,349 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.ai_resilience import get_circuit_breaker, deadline_remaining, is_provider_failure, is_request_error
+
+# (response_dict, error_message), the same shape ai_request returns
+Outcome = Tuple[Optional[dict], Optional[str]]
+# (provider, model)
+Route = Tuple[str, str]
+
+
+class RouteStats:
+    """Rolling latency and error statistics for one provider/model pair."""
+
+    def __init__(self, window: int = 50):
+        self._samples = deque(maxlen=window)  # (latency_seconds, ok)
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((latency, ok))
+            self.requests += 1
+            if ok:
+                self.consecutive_failures = 0
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of successful call latencies in the window."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, int(round(q / 100.0 * (len(latencies) - 1)))))
+        return latencies[index]
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "window_error_rate": round(self.error_rate(), 4),
+            "consecutive_failures": self.consecutive_failures,
+            "p50": self.latency_percentile(50),
+            "p95": self.latency_percentile(95),
+        }
+
+
+class ProviderRouter:
+    """
+    Route AI calls to the fastest healthy provider.
+
+    Routes are ranked by their median latency, penalised by their recent
+    error rate. A provider whose circuit breaker is open is skipped (see
+    ``app.utils.ai_resilience``). Failed calls fail over to the next route
+    while the request deadline allows. With hedging enabled, a duplicate
+    request goes to the runner-up route once the primary has been slower
+    than its own p95, and whichever answers first wins.
+    """
+
+    def __init__(self,
+                 window: int = 50,
+                 hedge: bool = False,
+                 hedge_percentile: float = 95,
+                 hedge_min_samples: int = 10,
+                 hedge_min_delay: float = 0.5):
+        self.window = window
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._stats: Dict[Route, RouteStats] = {}
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.failovers = 0
+
+    def stats_for(self, route: Route) -> RouteStats:
+        stats = self._stats.get(route)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(route, RouteStats(self.window))
+        return stats
+
+    def record(self, route: Route, latency: float, ok: bool):
+        self.stats_for(route).record(latency, ok)
+
+    def is_healthy(self, route: Route) -> bool:
+        return get_circuit_breaker(route[0]).is_available()
+
+    def _score(self, route: Route) -> float:
+        stats = self.stats_for(route)
+        p50 = stats.latency_percentile(50)
+        if p50 is None:
+            return 0.0  # no data yet: try it so it gets measured
+        return p50 * (1 + 4 * stats.error_rate())
+
+    def rank(self, routes: List[Route]) -> List[Route]:
+        """Healthy routes fastest first, followed by unhealthy ones as a last resort."""
+        healthy = [route for route in routes if self.is_healthy(route)]
+        unhealthy = [route for route in routes if route not in healthy]
+        # sorted() is stable, so ties keep the configured preference order
+        return sorted(healthy, key=self._score) + unhealthy
+
+    def hedge_delay(self, route: Route) -> Optional[float]:
+        stats = self.stats_for(route)
+        if stats.sample_count() < self.hedge_min_samples:
+            return None
+        delay = stats.latency_percentile(self.hedge_percentile)
+        if delay is None:
+            return None
+        return max(delay, self.hedge_min_delay)
+
+    def _timed(self, route: Route, fn: Callable[[Route], Outcome]) -> Outcome:
+        breaker = get_circuit_breaker(route[0])
+        if not breaker.allow():
+            return None, f"{route[0]} is temporarily unavailable (circuit open)"
+        started = time.monotonic()
+        try:
+            result, error = fn(route)
+        except Exception as e:
+            result, error = None, str(e)
+        self._settle(route, breaker, time.monotonic() - started, result, error)
+        return result, error
+
+    def _settle(self, route: Route, breaker, latency: float, result, error: Optional[str]):
+        """Record a finished call against the route's stats and breaker."""
+        if result:
+            self.record(route, latency, True)
+            breaker.record_success()
+        elif is_provider_failure(error):
+            self.record(route, latency, False)
+            breaker.record_failure()
+        else:
+            # A 4xx for this request says nothing about the provider's health
+            breaker.release()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._hedge_executor is None:
+            with self._lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ai-hedge")
+        return self._hedge_executor
+
+    def call(self, routes: List[Route], fn: Callable[[Route], Outcome]) -> Outcome:
+        """
+        Run ``fn(route)`` against the best route, failing over on errors.
+
+        ``fn`` must return ``(result, error)`` like ai_request.
+        """
+        ordered = self.rank(routes)
+        if not ordered:
+            return None, "No AI provider is configured"
+
+        error = None
+        start_index = 0
+        if self.hedge and len(ordered) > 1:
+            delay = self.hedge_delay(ordered[0])
+            if delay is not None:
+                result, error = self._call_hedged(ordered[0], ordered[1], delay, fn)
+                if result or is_request_error(error):
+                    return result, error
+                start_index = 2
+
+        for position, route in enumerate(ordered[start_index:], start=start_index):
+            remaining = deadline_remaining()
+            if remaining is not None and remaining <= 0:
+                return None, error or "AI request deadline exceeded"
+            if position > 0:
+                with self._lock:
+                    self.failovers += 1
+                print(f"[INFO] Failing over to {route[0]} after error: {error}")
+            result, error = self._timed(route, fn)
+            if result:
+                return result, None
+            if is_request_error(error):
+                # The next provider would reject the same request
+                return None, error
+        return None, error
+
+    def _call_hedged(self, primary: Route, secondary: Route, delay: float,
+                     fn: Callable[[Route], Outcome]) -> Outcome:
+        executor = self._executor()
+        # Each worker runs in a copy of the caller's context so the deadline carries over
+        futures = {executor.submit(contextvars.copy_context().run, self._timed, primary, fn): primary}
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            with self._lock:
+                self.hedges_fired += 1
+            futures[executor.submit(contextvars.copy_context().run, self._timed, secondary, fn)] = secondary
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=deadline_remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                return None, "AI request deadline exceeded"
+            for future in done:
+                result, error = future.result()
+                if result:
+                    if futures[future] == secondary:
+                        with self._lock:
+                            self.hedges_won += 1
+                    # The loser keeps running in the background; its result is discarded
+                    return result, None
+        if len(futures) == 1 and not is_request_error(error):
+            # Primary failed before the hedge fired: let the failover path try the runner-up
+            return self._timed(secondary, fn)
+        return None, error
+
+    async def _timed_async(self, route: Route, fn: Callable[[Route], Awaitable[Outcome]]) -> Outcome:
+        breaker = get_circuit_breaker(route[0])
+        if not breaker.allow():
+            return None, f"{route[0]} is temporarily unavailable (circuit open)"
+        started = time.monotonic()
+        try:
+            result, error = await fn(route)
+        except asyncio.CancelledError:
+            # A cancelled hedge says nothing about the provider's health
+            breaker.release()
+            raise
+        except Exception as e:
+            result, error = None, str(e)
+        self._settle(route, breaker, time.monotonic() - started, result, error)
+        return result, error
+
+    async def call_async(self, routes: List[Route], fn: Callable[[Route], Awaitable[Outcome]]) -> Outcome:
+        """Asyncio counterpart of ``call``; ``fn(route)`` is a coroutine function."""
+        ordered = self.rank(routes)
+        if not ordered:
+            return None, "No AI provider is configured"
+
+        error = None
+        start_index = 0
+        if self.hedge and len(ordered) > 1:
+            delay = self.hedge_delay(ordered[0])
+            if delay is not None:
+                result, error = await self._call_hedged_async(ordered[0], ordered[1], delay, fn)
+                if result or is_request_error(error):
+                    return result, error
+                start_index = 2
+
+        for position, route in enumerate(ordered[start_index:], start=start_index):
+            remaining = deadline_remaining()
+            if remaining is not None and remaining <= 0:
+                return None, error or "AI request deadline exceeded"
+            if position > 0:
+                with self._lock:
+                    self.failovers += 1
+                print(f"[INFO] Failing over to {route[0]} after error: {error}")
+            result, error = await self._timed_async(route, fn)
+            if result:
+                return result, None
+            if is_request_error(error):
+                return None, error
+        return None, error
+
+    async def _call_hedged_async(self, primary: Route, secondary: Route, delay: float,
+                                 fn: Callable[[Route], Awaitable[Outcome]]) -> Outcome:
+        # Tasks copy the caller's context, so the deadline carries over
+        tasks = {asyncio.ensure_future(self._timed_async(primary, fn)): primary}
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            with self._lock:
+                self.hedges_fired += 1
+            tasks[asyncio.ensure_future(self._timed_async(secondary, fn))] = secondary
+
+        error = None
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=deadline_remaining(),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    return None, "AI request deadline exceeded"
+                for task in done:
+                    result, error = task.result()
+                    if result:
+                        if tasks[task] == secondary:
+                            with self._lock:
+                                self.hedges_won += 1
+                        return result, None
+        finally:
+            # Unlike threads, the losing coroutine can simply be cancelled
+            for task in pending:
+                task.cancel()
+        if len(tasks) == 1 and not is_request_error(error):
+            return await self._timed_async(secondary, fn)
+        return None, error
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            routes = list(self._stats.items())
+            counters = {
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "failovers": self.failovers,
+            }
+        return {
+            "routes": {
+                f"{provider}/{model}": dict(stats.snapshot(), healthy=self.is_healthy((provider, model)))
+                for (provider, model), stats in routes
+            },
+            **counters,
+        }
+
+
+def build_router_from_env() -> ProviderRouter:
+    return ProviderRouter(
+        window=int(os.getenv("AI_ROUTER_WINDOW", "50")),
+        hedge=os.getenv("AI_HEDGE", "false").lower() == "true",
+        hedge_percentile=float(os.getenv("AI_HEDGE_PERCENTILE", "95")),
+        hedge_min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", "10")),
+        hedge_min_delay=float(os.getenv("AI_HEDGE_MIN_DELAY", "0.5")),
+    )
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_ai_router() -> ProviderRouter:
+    """Return the process-wide provider router, creating it on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = build_router_from_env()
+    return _router
@@ -0,0 +1,319 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import tempfile
+import threading
+import uuid
+import weakref
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.utils.ai_resilience import deadline_remaining, deadline_exceeded
+
+# (response_dict, error_message), the same shape ai_request returns
+Outcome = Tuple[Optional[dict], Optional[str]]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.outcome: Outcome = (None, None)
+
+
+class SharedFlightRegistry:
+    """
+    SQLite table of in-flight AI calls, shared by every process on the host.
+
+    The first process to insert a row for a key owns the upstream call;
+    the others poll the row until the owner writes the outcome. A claim
+    older than ``claim_timeout`` is treated as abandoned (the owner died
+    or hung) and can be taken over.
+    """
+
+    def __init__(self, path: str, claim_timeout: float = 130, poll_interval: float = 0.05):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self.owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_inflight ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " completed_at REAL,"
+                " outcome TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def claim(self, key: str, arrived_at: float) -> Tuple[bool, Optional[Outcome]]:
+        """
+        Try to become the owner of ``key``.
+
+        Returns (True, None) when this process should make the upstream call,
+        or (False, outcome) when another process finished a call that was
+        already in flight when we arrived. Waiting is bounded by the request
+        deadline too; past it the outcome is a deadline error.
+        """
+        conn = self._connect()
+        deadline = arrived_at + self.claim_timeout
+        remaining = deadline_remaining()
+        request_deadline = None if remaining is None else time.time() + remaining
+        while True:
+            now = time.time()
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO ai_inflight (key, owner, started_at) VALUES (?, ?, ?)",
+                (key, self.owner_id, now),
+            ).rowcount
+            if inserted:
+                return True, None
+
+            row = conn.execute(
+                "SELECT started_at, completed_at, outcome FROM ai_inflight WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                continue  # deleted between our insert and select; try again
+            started_at, completed_at, outcome = row
+
+            if completed_at is not None:
+                if started_at <= arrived_at <= completed_at:
+                    result, error = json.loads(outcome)
+                    return False, (result, error)
+                # A finished call from before we arrived: start a fresh flight
+                if self._take_over(conn, key, started_at, now):
+                    return True, None
+            elif started_at < now - self.claim_timeout:
+                if self._take_over(conn, key, started_at, now):
+                    return True, None
+
+            if request_deadline is not None and now >= request_deadline:
+                return False, (None, "AI request deadline exceeded")
+            if now > deadline:
+                # Give up waiting and make our own call without a claim
+                return True, None
+            wait = self.poll_interval
+            if request_deadline is not None:
+                wait = max(0.0, min(wait, request_deadline - now))
+            time.sleep(wait)
+
+    def _take_over(self, conn: sqlite3.Connection, key: str, started_at: float, now: float) -> bool:
+        return conn.execute(
+            "UPDATE ai_inflight SET owner = ?, started_at = ?, completed_at = NULL, outcome = NULL"
+            " WHERE key = ? AND started_at = ?",
+            (self.owner_id, now, key, started_at),
+        ).rowcount == 1
+
+    def complete(self, key: str, outcome: Outcome):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "UPDATE ai_inflight SET completed_at = ?, outcome = ? WHERE key = ? AND owner = ?",
+            (now, json.dumps(outcome), key, self.owner_id),
+        )
+        # Finished flights are only useful to callers that were already waiting
+        conn.execute(
+            "DELETE FROM ai_inflight WHERE completed_at IS NOT NULL AND completed_at < ?",
+            (now - 60,),
+        )
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical AI calls into one upstream request.
+
+    Within a process, callers with the same key wait on the first caller's
+    call. With a ``SharedFlightRegistry`` the same happens across the worker
+    processes on one host.
+    """
+
+    def __init__(self, registry: SharedFlightRegistry = None, wait_timeout: float = 130):
+        self.registry = registry
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.shared_coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Outcome]) -> Outcome:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            with self._stats_lock:
+                self.coalesced += 1
+            wait_timeout = self.wait_timeout
+            remaining = deadline_remaining()
+            if remaining is not None:
+                wait_timeout = max(min(wait_timeout, remaining), 0)
+            if call.done.wait(wait_timeout):
+                return call.outcome
+            if deadline_exceeded():
+                return None, "AI request deadline exceeded"
+            return fn()
+
+        try:
+            call.outcome = self._lead(key, fn)
+            return call.outcome
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key: str, fn: Callable[[], Outcome]) -> Outcome:
+        if self.registry is None:
+            with self._stats_lock:
+                self.leaders += 1
+            return fn()
+
+        try:
+            owner, outcome = self.registry.claim(key, time.time())
+        except Exception as e:
+            print(f"[ERROR] Single-flight registry unavailable: {e}")
+            with self._stats_lock:
+                self.leaders += 1
+            return fn()
+
+        if not owner:
+            with self._stats_lock:
+                self.shared_coalesced += 1
+            return outcome
+
+        with self._stats_lock:
+            self.leaders += 1
+        outcome = (None, "AI request failed")
+        try:
+            outcome = fn()
+            return outcome
+        finally:
+            try:
+                self.registry.complete(key, outcome)
+            except Exception as e:
+                print(f"[ERROR] Single-flight registry write failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            stats = {
+                "upstream_calls": self.leaders,
+                "coalesced_in_process": self.coalesced,
+                "coalesced_across_processes": self.shared_coalesced,
+            }
+        with self._lock:
+            stats["in_flight"] = len(self._calls)
+        stats["shared"] = self.registry is not None
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce identical in-flight coroutine calls on one event loop.
+
+    The asyncio counterpart of ``SingleFlight``. It stays within the loop:
+    cross-process coalescing would mean blocking on the SQLite registry
+    from inside the loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Outcome]]) -> Outcome:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                # shield(): a follower timing out must not cancel the leader's call
+                return await asyncio.wait_for(asyncio.shield(future), deadline_remaining())
+            except asyncio.TimeoutError:
+                return None, "AI request deadline exceeded"
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        outcome = (None, "AI request failed")
+        try:
+            outcome = await fn()
+            return outcome
+        finally:
+            self._calls.pop(key, None)
+            future.set_result(outcome)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.leaders,
+            "coalesced_in_process": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+def build_singleflight_from_env() -> Optional[SingleFlight]:
+    """
+    Build the single-flight layer described by AI_SINGLEFLIGHT_* variables.
+
+    AI_SINGLEFLIGHT=false disables coalescing entirely. Coalescing stays
+    within the current process unless AI_SINGLEFLIGHT_SHARED=true, which
+    adds the on-disk registry shared by every worker process on the host.
+    """
+    if os.getenv("AI_SINGLEFLIGHT", "true").lower() != "true":
+        return None
+    wait_timeout = float(os.getenv("AI_SINGLEFLIGHT_TIMEOUT", "130"))
+    registry = None
+    if os.getenv("AI_SINGLEFLIGHT_SHARED", "false").lower() == "true":
+        path = os.getenv(
+            "AI_SINGLEFLIGHT_PATH",
+            os.path.join(tempfile.gettempdir(), "careercraft_ai_inflight.sqlite3"),
+        )
+        try:
+            registry = SharedFlightRegistry(path, claim_timeout=wait_timeout)
+        except Exception as e:
+            print(f"[ERROR] Could not open single-flight registry at {path}: {e}")
+    return SingleFlight(registry, wait_timeout=wait_timeout)
+
+
+_singleflight = None
+_singleflight_initialized = False
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> Optional[SingleFlight]:
+    """Return the process-wide single-flight layer, or None when disabled."""
+    global _singleflight, _singleflight_initialized
+    if not _singleflight_initialized:
+        with _singleflight_lock:
+            if not _singleflight_initialized:
+                _singleflight = build_singleflight_from_env()
+                _singleflight_initialized = True
+    return _singleflight
+
+
+# One coalescing table per event loop: futures can't be awaited across loops
+_async_singleflights = weakref.WeakKeyDictionary()
+
+
+def get_async_singleflight() -> Optional[AsyncSingleFlight]:
+    """Return the running loop's single-flight layer, or None when disabled."""
+    if os.getenv("AI_SINGLEFLIGHT", "true").lower() != "true":
+        return None
+    loop = asyncio.get_running_loop()
+    singleflight = _async_singleflights.get(loop)
+    if singleflight is None:
+        singleflight = _async_singleflights[loop] = AsyncSingleFlight()
+    return singleflight
@@ -0,0 +1,370 @@
+"""
+Local stand-in for the AI providers, speaking the OpenAI-compatible
+chat completions protocol (blocking and ``stream: true``).
+
+Point the app at it with TOGETHER_API_URL / OPENROUTER_API_URL and any API
+key, then exercise or load-test the AI routes offline:
+
+    python -m app.utils.ai_stub_server --port 8089 --latency lognormal:0.6,0.4
+    TOGETHER_API_URL=http://127.0.0.1:8089/v1/chat/completions TOGETHER_API_KEY=stub flask run
+
+Answers are synthesized in the shape each CareerCraft prompt asks for
+(question arrays, evaluation objects, job role arrays, feedback bullets)
+and respect max_tokens. With --cassette, recorded real responses (see
+``app.utils.ai_cassette``) are served instead where they exist.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.ai_cassette import Cassette
+
+# Same rough chars-per-token estimate the app uses (see text_chunking)
+CHARS_PER_TOKEN = 4
+
+_QUESTIONS = [
+    "Tell me about a project you are proud of and your role in it.",
+    "How would you design a rate limiter for a public API?",
+    "Describe a time you disagreed with a teammate. How did you resolve it?",
+    "What happens between typing a URL into a browser and the page rendering?",
+    "How do you decide what to test in a new feature?",
+    "Explain the difference between a process and a thread.",
+    "Tell me about a production incident you helped resolve.",
+    "How would you find the bottleneck in a slow web request?",
+]
+_ROLES = [
+    ("Backend Engineer", ["Python", "SQL", "REST APIs"], ["AWS Certified Developer"]),
+    ("Data Engineer", ["Spark", "Airflow", "SQL"], ["Google Professional Data Engineer"]),
+    ("DevOps Engineer", ["Docker", "Kubernetes", "Terraform"], ["CKA"]),
+    ("Full Stack Developer", ["JavaScript", "React", "Flask"], []),
+    ("Machine Learning Engineer", ["PyTorch", "scikit-learn", "MLOps"], ["TensorFlow Developer"]),
+    ("Site Reliability Engineer", ["Linux", "Prometheus", "Go"], ["AWS SysOps Administrator"]),
+    ("Solutions Architect", ["System Design", "Cloud", "Communication"], ["AWS Solutions Architect"]),
+]
+_FEEDBACK = [
+    "Quantify the impact of each role (latency, revenue, users) instead of listing duties.",
+    "Add the keywords from the target job description to the skills section.",
+    "Lead every bullet with a strong action verb.",
+    "Move the most relevant project above older work experience.",
+    "Remove the objective statement; a two-line summary reads better.",
+    "List certifications with the year they were earned.",
+    "Keep the resume to one page unless you have ten or more years of experience.",
+    "Use a consistent date format across all positions.",
+]
+_VERDICTS = ["Correct", "Partially Correct", "Incorrect"]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Turn a latency spec into a sampler, in seconds:
+    ``fixed:S``, ``uniform:LOW,HIGH``, ``normal:MEAN,SD`` or ``lognormal:MEDIAN,SIGMA``.
+    """
+    name, _, args = spec.partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+        if name == 'fixed' and len(values) == 1:
+            return lambda rng: values[0]
+        if name == 'uniform' and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if name == 'normal' and len(values) == 2:
+            return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+        if name == 'lognormal' and len(values) == 2:
+            # MEDIAN is exp(mu); SIGMA controls the tail
+            mu = math.log(values[0]) if values[0] > 0 else 0.0
+            return lambda rng: rng.lognormvariate(mu, values[1]) if values[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+class StubProvider:
+    """Produces the answer, delay and failures for each stubbed completion request."""
+
+    def __init__(self,
+                 latency: str = 'fixed:0.2',
+                 token_delay: float = 0.0,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 seed: int = 0,
+                 cassette: Optional[str] = None,
+                 strict: bool = False):
+        self.sample_latency = parse_latency(latency)
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.cassette = Cassette(cassette, 'replay') if cassette else None
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.streams = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.replayed = 0
+
+    def _draw(self) -> Tuple[float, float]:
+        with self._lock:
+            return self._rng.random(), self.sample_latency(self._rng)
+
+    def complete(self, payload: dict) -> Tuple[int, Dict[str, str], dict, float]:
+        """
+        Decide the outcome of one request.
+
+        Returns (HTTP status, extra headers, body, seconds to first token).
+        A 200 body is a complete chat.completion object.
+        """
+        roll, first_token = self._draw()
+        with self._lock:
+            self.requests += 1
+            if payload.get('stream'):
+                self.streams += 1
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.rate_limited += 1
+            return 429, {'Retry-After': '1'}, _error_body('Rate limit exceeded (stub)', 'rate_limit_error'), 0.0
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return 503, {}, _error_body('Upstream overloaded (stub)', 'server_error'), first_token
+
+        messages = payload.get('messages') or []
+        max_tokens = int(payload.get('max_tokens') or 512)
+        temperature = payload.get('temperature', 0.7)
+        content = None
+        if self.cassette is not None:
+            recorded = self.cassette.lookup(messages, temperature, max_tokens)
+            if recorded is not None:
+                content = recorded.get('choices', [{}])[0].get('message', {}).get('content', '')
+                with self._lock:
+                    self.replayed += 1
+            elif self.strict:
+                return 404, {}, _error_body('No recorded response for this request', 'not_found'), 0.0
+        if content is None:
+            content = synthesize(messages, self.seed)
+
+        finish_reason = 'stop'
+        if len(content) > max_tokens * CHARS_PER_TOKEN:
+            content = content[:max_tokens * CHARS_PER_TOKEN]
+            finish_reason = 'length'
+        prompt_tokens = sum(len(m.get('content') or '') for m in messages) // CHARS_PER_TOKEN + 1
+        completion_tokens = len(content) // CHARS_PER_TOKEN + 1
+        body = {
+            'id': f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model') or 'stub',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': finish_reason,
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+        return 200, {}, body, first_token
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats = {
+                'requests': self.requests,
+                'streams': self.streams,
+                'errors': self.errors,
+                'rate_limited': self.rate_limited,
+                'replayed': self.replayed,
+            }
+        if self.cassette is not None:
+            stats['cassette'] = self.cassette.stats()
+        return stats
+
+
+def _error_body(message: str, error_type: str) -> dict:
+    return {'error': {'message': message, 'type': error_type}}
+
+
+def synthesize(messages: List[Dict[str, str]], seed: int = 0) -> str:
+    """An answer in the format the CareerCraft prompt in ``messages`` asks for."""
+    prompt = (messages[-1].get('content') or '') if messages else ''
+    digest = hashlib.sha256(f"{seed}:{prompt}".encode('utf-8')).digest()
+    rng = random.Random(int.from_bytes(digest[:8], 'big'))
+
+    wanted = re.search(r'generate exactly (\d+)', prompt)
+    if wanted and 'interview questions' in prompt:
+        return json.dumps(rng.sample(_QUESTIONS, min(int(wanted.group(1)), len(_QUESTIONS))))
+
+    if 'Evaluate each of the following interview questions' in prompt:
+        items = [int(n) for n in re.findall(r'^Item (\d+)$', prompt, re.MULTILINE)]
+        return json.dumps([_evaluation(rng, item) for item in items], indent=2)
+
+    if 'Evaluate the following interview question and answer' in prompt:
+        return json.dumps(_evaluation(rng), indent=2)
+
+    if 'relevant job roles' in prompt:
+        roles = rng.sample(_ROLES, 6)
+        return json.dumps([
+            {'job_title': title, 'skills': skills, 'certifications': certs}
+            for title, skills, certs in roles
+        ], indent=2)
+
+    # Resume feedback (single pass, per section, or merged): bullets, more for longer prompts
+    count = max(3, min(len(_FEEDBACK) * 3, len(prompt) // 400))
+    return "\n".join(f"- {_FEEDBACK[(i + rng.randrange(len(_FEEDBACK))) % len(_FEEDBACK)]}" for i in range(count))
+
+
+def _evaluation(rng: random.Random, item: Optional[int] = None) -> dict:
+    verdict = rng.choice(_VERDICTS)
+    evaluation = {
+        'verdict': verdict,
+        'feedback': "The answer covers the main idea. Add a concrete example and explain the trade-offs.",
+        'model_answer': "" if verdict == 'Correct' else
+        "Start with the core concept, give a short example from your own work, then discuss alternatives.",
+    }
+    if item is not None:
+        evaluation = {'item': item, **evaluation}
+    return evaluation
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    provider: StubProvider = None
+    quiet = True
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict, headers: Dict[str, str] = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('', '/health'):
+            self._send_json(200, {'status': 'ok'})
+        elif self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.provider.stats())
+        else:
+            self._send_json(404, _error_body('Not found', 'not_found'))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, _error_body('Invalid JSON body', 'invalid_request_error'))
+            return
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, _error_body('Not found', 'not_found'))
+            return
+
+        status, headers, body, first_token = self.provider.complete(payload)
+        time.sleep(first_token)
+        if status != 200:
+            self._send_json(status, body, headers)
+            return
+        content = body['choices'][0]['message']['content']
+        if not payload.get('stream'):
+            time.sleep(self.provider.token_delay * body['usage']['completion_tokens'])
+            self._send_json(200, body)
+            return
+        self._stream(body, content)
+
+    def _stream(self, body: dict, content: str):
+        """Send the answer as chat.completion.chunk events, pacing each word like decoding."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: dict, finish_reason=None) -> bytes:
+            chunk = {
+                'id': body['id'],
+                'object': 'chat.completion.chunk',
+                'created': body['created'],
+                'model': body['model'],
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+        try:
+            self.wfile.write(event({'role': 'assistant'}))
+            for word in re.findall(r'\S+\s*|\s+', content):
+                time.sleep(self.provider.token_delay * max(1, len(word) // CHARS_PER_TOKEN))
+                self.wfile.write(event({'content': word}))
+                self.wfile.flush()
+            self.wfile.write(event({}, body['choices'][0]['finish_reason']))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading (cancelled stream)
+
+
+def make_stub_server(host: str = '127.0.0.1', port: int = 8089, quiet: bool = True, **options) -> ThreadingHTTPServer:
+    """HTTP server answering chat completion requests with a StubProvider built from ``options``."""
+    handler = type('StubHandler', (_StubHandler,), {'provider': StubProvider(**options), 'quiet': quiet})
+    # The default listen backlog of 5 drops connections under load tests
+    server_class = type('StubHTTPServer', (ThreadingHTTPServer,), {'request_queue_size': 128, 'daemon_threads': True})
+    return server_class((host, port), handler)
+
+
+def start_stub_server(host: str = '127.0.0.1', port: int = 0, **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve the stub from a background thread (port 0 picks a free one).
+
+    Returns the server (call ``shutdown()`` to stop it) and its chat
+    completions URL.
+    """
+    server = make_stub_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, name='ai-stub-server', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1/chat/completions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for the AI providers.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='fixed:0.2',
+                        help="time to first token: fixed:S, uniform:LOW,HIGH, normal:MEAN,SD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="seconds per completion token")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cassette', help="replay recorded responses from this .jsonl file")
+    parser.add_argument('--strict', action='store_true', help="answer 404 for requests missing from the cassette")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    server = make_stub_server(
+        args.host, args.port, quiet=not args.verbose,
+        latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed, cassette=args.cassette, strict=args.strict
+    )
+    print(f"[INFO] AI stub listening on http://{args.host}:{server.server_address[1]}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import json
+from typing import Dict, List, Optional
+
+from app.extensions import db
+from app.models import ResumeAnalyzer, JobMatchResult, InterviewResponse
+from app.utils.ai_utils import analyze_resume, match_job_roles, evaluate_interview_answers
+from app.utils.job_queue import task
+from app.utils.question_bank import refill_bucket
+from app.utils.resume_preanalysis import preanalyze_resume
+
+
+# ---------------------------------------------------------------------------
+# AI work shared by the routes (inline) and the job worker (queued)
+# ---------------------------------------------------------------------------
+
+def run_resume_analysis(user_id: int,
+                        filename: str,
+                        text: str,
+                        preanalysis: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """
+    Analyze a resume and store the feedback with its local pre-analysis.
+
+    Returns {'feedback', 'preanalysis', 'id'} or {'error'}. Routes that
+    already showed the pre-analysis pass it in rather than recomputing it.
+    """
+    preanalysis = preanalysis or preanalyze_resume(text)
+    ai_result = analyze_resume(text, preanalysis=preanalysis)
+    if 'feedback' not in ai_result:
+        return {'error': ai_result.get('error', 'Unknown error from AI analysis.')}
+    uploaded = ResumeAnalyzer(user_id=user_id, filename=filename, suggestions=ai_result['feedback'],
+                              preanalysis=json.dumps(preanalysis))
+    db.session.add(uploaded)
+    db.session.commit()
+    return {'feedback': ai_result['feedback'], 'preanalysis': preanalysis, 'id': uploaded.id}
+
+
+def run_job_match(user_id: int,
+                  input_text: str,
+                  resume_file_name: Optional[str] = None,
+                  resume_text: Optional[str] = None,
+                  interests_or_skills: Optional[str] = None,
+                  document_id: Optional[int] = None) -> Dict[str, object]:
+    """
+    Match job roles and store the result; returns {'roles', 'id'} or {'error', 'raw'}.
+
+    With a ``document_id`` (an ExtractedDocument) the result references the
+    shared extracted text instead of storing its own copy.
+    """
+    ai_result = match_job_roles(input_text)
+    if 'roles' not in ai_result:
+        return {
+            'error': ai_result.get('error', 'Unknown error from AI analysis.'),
+            'raw': ai_result.get('raw', None)
+        }
+    roles = ai_result['roles']
+    # Normalize: if roles is a list of strings, convert to list of dicts with all keys
+    if roles and isinstance(roles[0], str):
+        roles = [{'job_title': r, 'skills': None, 'certifications': None} for r in roles]
+
+    # Save to JobMatchResult table
+    result_id = None
+    try:
+        job_match_result = JobMatchResult(
+            user_id=user_id,
+            resume_file_name=resume_file_name,
+            resume_text=None if document_id else resume_text,
+            document_id=document_id,
+            interests_or_skills=interests_or_skills,
+            matched_roles=json.dumps(roles)
+        )
+        db.session.add(job_match_result)
+        db.session.commit()
+        result_id = job_match_result.id
+    except Exception as e:
+        print(f"Error saving job match result: {e}")
+        db.session.rollback()
+    return {'roles': roles, 'id': result_id}
+
+
+def run_answer_evaluation(user_id: int,
+                          questions: List[str],
+                          answers: List[str],
+                          resume_filename: Optional[str] = None) -> Dict[str, object]:
+    """
+    Evaluate interview answers and store one InterviewResponse per pair.
+
+    Returns the payload the evaluate-answers endpoint responds with.
+    Database errors are raised to the caller.
+    """
+    evaluations = evaluate_interview_answers(questions, answers)
+
+    response_ids = []
+    for i in range(len(questions)):
+        evaluation = evaluations[i]
+
+        response = InterviewResponse(
+            user_id=user_id,
+            resume_filename=resume_filename,
+            question=questions[i],
+            answer=answers[i],
+            verdict=evaluation['verdict'],
+            feedback=evaluation['feedback'],
+            model_answer=evaluation.get('model_answer', '')
+        )
+        db.session.add(response)
+        db.session.flush()  # This ensures the ID is generated
+        response_ids.append(response.id)
+
+    db.session.commit()
+
+    return {
+        'success': True,
+        'questions': questions,
+        'answers': answers,
+        'evaluations': evaluations,
+        'response_ids': response_ids
+    }
+
+
+# ---------------------------------------------------------------------------
+# Queued variants (see app.utils.job_queue). An AI error raises so the job
+# is retried with backoff; the last attempt's error is shown to the user.
+# ---------------------------------------------------------------------------
+
+@task('resume_analysis')
+def resume_analysis_task(user_id: int, payload: dict) -> Dict[str, object]:
+    result = run_resume_analysis(user_id, payload['filename'], payload['text'], payload.get('preanalysis'))
+    if 'error' in result:
+        raise Exception(result['error'])
+    return result
+
+
+@task('job_match')
+def job_match_task(user_id: int, payload: dict) -> Dict[str, object]:
+    result = run_job_match(user_id, **payload)
+    if 'error' in result:
+        raise Exception(result['error'])
+    return result
+
+
+@task('answer_evaluation')
+def answer_evaluation_task(user_id: int, payload: dict) -> Dict[str, object]:
+    return run_answer_evaluation(user_id, **payload)
+
+
+@task('question_bank_refill', per_user_limit=False)
+def question_bank_refill_task(user_id: int, payload: dict) -> Dict[str, object]:
+    return {'added': refill_bucket(payload['bucket_id'])}
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.metrics import get_histogram
+
+# Token count buckets, from short classification answers to long resume prompts
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# USD per million (prompt, completion) tokens; override with AI_TOKEN_PRICES
+DEFAULT_PRICES = {
+    "mistralai/Mixtral-8x7B-Instruct-v0.1": (0.60, 0.60),
+    "openai/gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+class TelemetryConfig:
+    def __init__(self):
+        # Optional per-call SQLite ledger for offline analysis
+        self.LEDGER_PATH = os.getenv("AI_TELEMETRY_LEDGER") or None
+        self.PRICES = dict(DEFAULT_PRICES)
+        overrides = os.getenv("AI_TOKEN_PRICES")
+        if overrides:
+            try:
+                self.PRICES.update({model: tuple(prices) for model, prices in json.loads(overrides).items()})
+            except (ValueError, TypeError) as e:
+                print(f"[ERROR] Invalid AI_TOKEN_PRICES, using the defaults: {e}")
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+        """USD cost of a call, or None for models without a known price."""
+        prices = self.PRICES.get(model)
+        if prices is None:
+            return None
+        return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+telemetry_config = TelemetryConfig()
+
+
+# ---------------------------------------------------------------------------
+# Per-call context: which route a call belongs to and how often it was retried
+# ---------------------------------------------------------------------------
+
+_route: ContextVar[Optional[str]] = ContextVar("ai_telemetry_route", default=None)
+_retries: ContextVar[Optional[List[int]]] = ContextVar("ai_telemetry_retries", default=None)
+
+
+@contextmanager
+def telemetry_route(name: str):
+    """Attribute AI calls made inside the block to ``name`` (e.g. a job kind)."""
+    token = _route.set(name)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def current_route() -> str:
+    """The telemetry route of the current call: an explicit scope, else the Flask endpoint."""
+    route = _route.get()
+    if route:
+        return route
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return request.endpoint or request.path
+    except ImportError:
+        pass
+    return "background"
+
+
+@contextmanager
+def retry_counter():
+    """Collect the HTTP retries made by the provider call inside the block."""
+    counter = [0]
+    token = _retries.set(counter)
+    try:
+        yield counter
+    finally:
+        _retries.reset(token)
+
+
+def count_retries(n: int = 1):
+    """Called by the provider clients for every retried HTTP attempt."""
+    counter = _retries.get()
+    if counter is not None and n:
+        counter[0] += n
+
+
+# ---------------------------------------------------------------------------
+# Ledger
+# ---------------------------------------------------------------------------
+
+class SQLiteLedger:
+    """
+    Append-only table with one row per AI call.
+
+    Rows are queued and written in batches by a background thread, so
+    request threads never wait on the disk. When the queue is full, rows
+    are dropped and counted rather than blocking.
+    """
+
+    COLUMNS = ("ts", "route", "provider", "model", "cache", "status", "error", "latency",
+               "prompt_tokens", "completion_tokens", "tokens_estimated", "retries", "streamed", "cost_usd")
+
+    def __init__(self, path: str, max_queue: int = 10000, batch_size: int = 200):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_calls ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " ts REAL NOT NULL, route TEXT, provider TEXT, model TEXT,"
+                " cache TEXT, status TEXT, error TEXT, latency REAL,"
+                " prompt_tokens INTEGER, completion_tokens INTEGER, tokens_estimated INTEGER,"
+                " retries INTEGER, streamed INTEGER, cost_usd REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_calls_route_ts ON ai_calls (route, ts)")
+        threading.Thread(target=self._writer, name="ai-telemetry-ledger", daemon=True).start()
+
+    def write(self, record: Dict[str, object]):
+        try:
+            self._queue.put_nowait(tuple(record.get(column) for column in self.COLUMNS))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        insert = (f"INSERT INTO ai_calls ({', '.join(self.COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in self.COLUMNS)})")
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(insert, rows)
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                self.dropped += len(rows)
+                print(f"[ERROR] AI telemetry ledger write failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {"path": self.path, "written": self.written, "dropped": self.dropped,
+                "queued": self._queue.qsize()}
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+def _empty_totals() -> Dict[str, object]:
+    return {"calls": 0, "errors": 0, "cache_hits": 0, "retries": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+class AITelemetry:
+    """
+    Records every AI call: latency and token histograms per route, running
+    totals per route and per provider/model, and optionally a ledger row.
+    """
+
+    def __init__(self, config: TelemetryConfig = None):
+        self.config = config or telemetry_config
+        self.ledger = SQLiteLedger(self.config.LEDGER_PATH) if self.config.LEDGER_PATH else None
+        self._lock = threading.Lock()
+        self._by_route: Dict[str, Dict[str, object]] = {}
+        self._by_model: Dict[Tuple[str, str], Dict[str, object]] = {}
+
+    def record(self,
+               provider: str,
+               model: str,
+               latency: float,
+               prompt_tokens: int = 0,
+               completion_tokens: int = 0,
+               tokens_estimated: bool = False,
+               retries: int = 0,
+               cache: str = "bypass",
+               error: Optional[str] = None,
+               streamed: bool = False,
+               route: Optional[str] = None):
+        """
+        Record one call.
+
+        ``cache`` is 'hit' (answered from the response cache, no provider
+        call), 'miss' (cache consulted, provider called), 'bypass' (cache
+        not used) or 'replay' (answered from a cassette).
+        """
+        route = route or current_route()
+        # Cache hits and replays reach no provider: they cost nothing and don't count towards token totals
+        billed = cache not in ("hit", "replay")
+        cost = self.config.cost(model, prompt_tokens, completion_tokens) if billed else None
+
+        get_histogram("ai_call_latency_seconds", route=route, provider=provider).observe(latency)
+        if billed and not error:
+            get_histogram("ai_call_tokens", buckets=TOKEN_BUCKETS, route=route, kind="prompt").observe(prompt_tokens)
+            get_histogram("ai_call_tokens", buckets=TOKEN_BUCKETS, route=route, kind="completion").observe(completion_tokens)
+
+        with self._lock:
+            for totals in (self._by_route.setdefault(route, _empty_totals()),
+                           self._by_model.setdefault((provider, model), _empty_totals())):
+                totals["calls"] += 1
+                totals["errors"] += bool(error)
+                totals["cache_hits"] += cache == "hit"
+                totals["retries"] += retries
+                if billed:
+                    totals["prompt_tokens"] += prompt_tokens
+                    totals["completion_tokens"] += completion_tokens
+                totals["cost_usd"] += cost or 0.0
+
+        if self.ledger is not None:
+            self.ledger.write({
+                "ts": time.time(), "route": route, "provider": provider, "model": model,
+                "cache": cache, "status": "error" if error else "ok", "error": (error or None) and error[:500],
+                "latency": round(latency, 6), "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens, "tokens_estimated": int(tokens_estimated),
+                "retries": retries, "streamed": int(streamed), "cost_usd": cost,
+            })
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            by_route = {route: dict(totals) for route, totals in self._by_route.items()}
+            by_model = {f"{provider}:{model}": dict(totals) for (provider, model), totals in self._by_model.items()}
+        for totals in list(by_route.values()) + list(by_model.values()):
+            totals["cost_usd"] = round(totals["cost_usd"], 6)
+            calls = totals["calls"]
+            totals["mean_tokens_per_call"] = round(
+                (totals["prompt_tokens"] + totals["completion_tokens"]) / calls, 1) if calls else 0
+        return {
+            "routes": by_route,
+            "models": by_model,
+            "ledger": self.ledger.stats() if self.ledger is not None else None,
+        }
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_ai_telemetry() -> AITelemetry:
+    """Return the process-wide AI call telemetry, creating it on first use."""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = AITelemetry()
+    return _telemetry
@@ -1,11 +1,28 @@
 import os
 import re
 import json
+import time
 import logging
 import traceback
+import asyncio
+import threading
+import contextvars
 import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from app.utils.ai_client import get_ai_client, get_async_ai_client, async_ai_client_stats, HAS_HTTPX
+from app.utils.ai_cache import get_ai_cache, make_cache_key
+from app.utils.ai_cassette import get_cassette
+from app.utils.ai_telemetry import get_ai_telemetry, retry_counter, current_route
+from app.utils.ai_singleflight import get_singleflight, get_async_singleflight
+from app.utils.ai_router import get_ai_router
+from app.utils.ai_resilience import deadline_remaining, deadline_exceeded, deadline_scope, get_circuit_breaker, circuit_breaker_stats, is_provider_failure, is_request_error
+from app.utils.metrics import get_histogram
+from app.utils.text_chunking import estimate_tokens, chunk_text
+from app.utils.json_extract import extract_json, JSONExtractionError
+from app.utils.role_matcher import get_role_matcher, role_matcher_config
+from app.utils.resume_preanalysis import preanalysis_gaps
 
 # Model Configuration
 TOGETHER_MODEL = "mistralai/Mixtral-8x7B-Instruct-v0.1"
@@ -25,17 +42,41 @@ class AIConfig:
     def __init__(self):
         # Together AI
         self.TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
-        self.TOGETHER_API_URL = "https://api.together.xyz/v1/chat/completions"
+        # API URLs can point at any OpenAI-compatible server, e.g. the local stub
+        # (python -m app.utils.ai_stub_server) for offline load tests
+        self.TOGETHER_API_URL = os.getenv("TOGETHER_API_URL", "https://api.together.xyz/v1/chat/completions")
         self.TOGETHER_MODEL = os.getenv("TOGETHER_MODEL", "mistralai/Mixtral-8x7B-Instruct-v0.1")
         
         # OpenRouter
         self.OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-        self.OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+        self.OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
         self.OPENROUTER_MODEL = "openai/gpt-3.5-turbo"  # Can be overridden
         
         # Default provider (can be 'together' or 'openrouter')
         self.DEFAULT_PROVIDER = os.getenv("DEFAULT_AI_PROVIDER", "together").lower()
         
+        # Interview answer evaluation fan-out
+        self.EVAL_CONCURRENCY = int(os.getenv("AI_EVAL_CONCURRENCY", "5"))
+        self.EVAL_ITEM_TIMEOUT = float(os.getenv("AI_EVAL_ITEM_TIMEOUT", "60"))
+        self.EVAL_MODE = os.getenv("AI_EVAL_MODE", "parallel").lower()  # 'parallel' or 'batch'
+        
+        # Response cache: call sites opt in with cache=True unless enabled globally
+        self.CACHE_DEFAULT = os.getenv("AI_CACHE_DEFAULT", "false").lower() == "true"
+        
+        # Provider routing: 'latency' picks the fastest healthy provider for calls
+        # that don't ask for one; 'static' always uses DEFAULT_PROVIDER
+        self.ROUTING = os.getenv("AI_ROUTING", "latency").lower()
+        
+        # Long resumes are analysed map-reduce style: sections concurrently, then one merge call
+        self.ANALYSIS_SINGLE_PASS_TOKENS = int(os.getenv("AI_ANALYSIS_SINGLE_PASS_TOKENS", "2500"))
+        self.ANALYSIS_CHUNK_TOKENS = int(os.getenv("AI_ANALYSIS_CHUNK_TOKENS", "800"))
+        self.ANALYSIS_MAX_CHUNKS = int(os.getenv("AI_ANALYSIS_MAX_CHUNKS", "8"))
+        self.ANALYSIS_MAP_CONCURRENCY = int(os.getenv("AI_ANALYSIS_MAP_CONCURRENCY", "8"))
+        self.ANALYSIS_MAP_MAX_TOKENS = int(os.getenv("AI_ANALYSIS_MAP_MAX_TOKENS", "384"))
+        self.ANALYSIS_REDUCE_MAX_TOKENS = int(os.getenv("AI_ANALYSIS_REDUCE_MAX_TOKENS", "768"))
+        # Answer budget when the prompt only asks about the local pre-analysis gaps
+        self.ANALYSIS_GAP_MAX_TOKENS = int(os.getenv("AI_ANALYSIS_GAP_MAX_TOKENS", "384"))
+        
     def get_provider(self, provider: str = None) -> str:
         """Get the provider to use, falling back to default if not specified."""
         provider = (provider or self.DEFAULT_PROVIDER).lower()
@@ -43,6 +84,29 @@ class AIConfig:
             log_error(f"Invalid provider: {provider}. Defaulting to 'together'.")
             return "together"
         return provider
+    
+    def get_model(self, provider: str) -> str:
+        """Model that requests to the given provider are sent with."""
+        if provider == "openrouter":
+            return self.OPENROUTER_MODEL
+        return TOGETHER_MODEL
+    
+    def is_routed(self, provider: str = None) -> bool:
+        """Whether a call for ``provider`` should go through the latency router."""
+        return provider is None and self.ROUTING == "latency"
+    
+    def get_routes(self) -> List[Tuple[str, str]]:
+        """(provider, model) pairs that have an API key, default provider first."""
+        configured = [
+            name for name, key in (("together", self.TOGETHER_API_KEY), ("openrouter", self.OPENROUTER_API_KEY))
+            if key
+        ]
+        default = self.get_provider()
+        if not configured:
+            # Nothing configured: keep the default so callers get its "not configured" error
+            configured = [default]
+        configured.sort(key=lambda name: name != default)
+        return [(name, self.get_model(name)) for name in configured]
 
 # Initialize config
 ai_config = AIConfig()
@@ -84,7 +148,7 @@ def openrouter_request(messages: List[Dict[str, str]],
     }
     
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_ai_client().post(url, headers=headers, json=payload, timeout=deadline_remaining())
         response.raise_for_status()
         return response.json(), None
     except requests.exceptions.RequestException as e:
@@ -92,34 +156,203 @@ def openrouter_request(messages: List[Dict[str, str]],
         if hasattr(e, 'response') and e.response is not None:
             try:
                 error_detail = e.response.json().get('error', {}).get('message', str(e))
-                error_msg = f"OpenRouter API error: {error_detail}"
+                error_msg = f"OpenRouter API error: {e.response.status_code} {error_detail}"
             except:
-                error_msg = f"OpenRouter API error: {e.response.text or str(e)}"
+                error_msg = f"OpenRouter API error: {e.response.status_code} {e.response.text or str(e)}"
         return None, error_msg
 
 
 def ai_request(messages: List[Dict[str, str]], 
                temperature: float = 0.7, 
                max_tokens: int = 512,
-               provider: str = None) -> Tuple[Optional[dict], Optional[str]]:
+               provider: str = None,
+               cache: bool = None) -> Tuple[Optional[dict], Optional[str]]:
     """
     Unified AI request function that routes to the appropriate provider.
     
+    Both providers go through the shared pooled client (see
+    ``app.utils.ai_client``), so connections are reused across calls.
+    Successful responses can be served from the response cache (see
+    ``app.utils.ai_cache``); call sites opt in with ``cache=True``.
+    Concurrent identical cacheable requests are coalesced into a single
+    upstream call (see ``app.utils.ai_singleflight``); uncached calls are
+    sampled independently, so they are never merged. Calls honour the request
+    deadline set by ``ai_deadline`` and skip providers whose circuit
+    breaker is open (see ``app.utils.ai_resilience``).
+    
     Args:
         messages: List of message dicts with 'role' and 'content'
         temperature: Controls randomness (0.0 to 2.0)
         max_tokens: Maximum number of tokens to generate
-        provider: AI provider to use ('together' or 'openrouter')
+        provider: AI provider to use ('together' or 'openrouter'); leave
+            unset to let the latency router pick one (see ``app.utils.ai_router``)
+        cache: True to read/write the response cache, False to bypass it
+            (defaults to AI_CACHE_DEFAULT)
         
     Returns:
         Tuple of (response_dict, error_message)
     """
-    provider = ai_config.get_provider(provider)
+    routed = ai_config.is_routed(provider)
+    if not routed:
+        provider = ai_config.get_provider(provider)
+    
+    response_cache = get_ai_cache() if (ai_config.CACHE_DEFAULT if cache is None else cache) else None
+    # Only cacheable calls share a response; anything else wants its own sample
+    singleflight = get_singleflight() if response_cache is not None else None
+    request_key = None
+    if response_cache is not None:
+        # Routed calls may be answered by either provider, so they share one key
+        model = "auto" if routed else ai_config.get_model(provider)
+        request_key = make_cache_key(messages, model, temperature, max_tokens)
+    
+    if response_cache is not None:
+        cached = response_cache.get(request_key)
+        if cached is not None:
+            _record_cache_hit(messages, cached, "auto" if routed else provider)
+            return cached, None
+    
+    # Past the route's budget: fail fast so the caller can use its fallback payload
+    if deadline_exceeded():
+        return None, "AI request deadline exceeded"
+    
+    cache_status = "miss" if response_cache is not None else "bypass"
     
-    if provider == "openrouter":
-        return openrouter_request(messages, temperature, max_tokens)
-    else:  # together
-        return together_ai_request(messages, temperature, max_tokens)
+    def call_route(route):
+        if route[0] == "openrouter":
+            send = lambda: openrouter_request(messages, temperature, max_tokens)
+        else:
+            send = lambda: together_ai_request(messages, temperature, max_tokens)
+        return _send_to_provider(route, messages, temperature, max_tokens, send, cache_status)
+    
+    def upstream():
+        router = get_ai_router()
+        if routed:
+            return router.call(ai_config.get_routes(), call_route)
+        # Pinned calls still feed the router's latency statistics
+        return router.call([(provider, ai_config.get_model(provider))], call_route)
+    
+    if singleflight is not None:
+        # Identical prompts already in flight (double submits, other workers) share one call
+        result, error = singleflight.do(f"{'auto' if routed else provider}:{request_key}", upstream)
+    else:
+        result, error = upstream()
+    
+    if result and response_cache is not None:
+        response_cache.set(request_key, result)
+    return result, error
+
+
+def _usage(result: Optional[dict], messages: List[Dict[str, str]]) -> Tuple[int, int, bool]:
+    """(prompt_tokens, completion_tokens, estimated) from a response's usage block, else estimated from text."""
+    usage = (result or {}).get('usage') or {}
+    if usage.get('prompt_tokens') is not None:
+        return int(usage.get('prompt_tokens') or 0), int(usage.get('completion_tokens') or 0), False
+    prompt_tokens = estimate_tokens("".join(m.get('content') or '' for m in messages))
+    content = ((result or {}).get('choices') or [{}])[0].get('message', {}).get('content') or ''
+    return prompt_tokens, estimate_tokens(content) if result else 0, True
+
+
+def _record_call(route: Tuple[str, str],
+                 messages: List[Dict[str, str]],
+                 started: float,
+                 result: Optional[dict],
+                 error: Optional[str],
+                 retries: int,
+                 cache_status: str,
+                 streamed: bool = False,
+                 route_name: Optional[str] = None):
+    prompt_tokens, completion_tokens, estimated = _usage(result, messages)
+    get_ai_telemetry().record(
+        provider=route[0], model=route[1], latency=time.monotonic() - started,
+        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, tokens_estimated=estimated,
+        retries=retries, cache=cache_status, error=error, streamed=streamed, route=route_name
+    )
+
+
+def _record_cache_hit(messages: List[Dict[str, str]], cached: dict, provider: str):
+    prompt_tokens, completion_tokens, estimated = _usage(cached, messages)
+    get_ai_telemetry().record(
+        provider="cache", model=provider, latency=0.0, prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens, tokens_estimated=estimated, cache="hit"
+    )
+
+
+def _send_to_provider(route: Tuple[str, str],
+                      messages: List[Dict[str, str]],
+                      temperature: float,
+                      max_tokens: int,
+                      send,
+                      cache_status: str) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Make one provider call, through the cassette if one is configured.
+    
+    Replay answers from the recording without touching the network; record
+    passes the call through and saves successful responses (see
+    ``app.utils.ai_cassette``). Every call is recorded in the AI telemetry
+    (see ``app.utils.ai_telemetry``).
+    """
+    provider = route[0]
+    cassette = get_cassette()
+    started = time.monotonic()
+    if cassette is not None and cassette.mode == "replay":
+        recorded = cassette.lookup(messages, temperature, max_tokens)
+        error = None if recorded is not None else "No recorded AI response for this request (cassette replay)"
+        _record_call(route, messages, started, recorded, error, 0, "replay")
+        return recorded, error
+    with retry_counter() as retries:
+        result, error = send()
+    _record_call(route, messages, started, result, error, retries[0], cache_status)
+    if result and cassette is not None:
+        cassette.record(provider, messages, temperature, max_tokens, result)
+    return result, error
+
+
+def get_router_stats() -> Dict[str, object]:
+    """Per-provider latency/error statistics and hedge/failover counters."""
+    return get_ai_router().snapshot()
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, object]]:
+    """State and rejection counters of each provider's circuit breaker."""
+    return circuit_breaker_stats()
+
+
+def get_singleflight_stats() -> Optional[Dict[str, object]]:
+    """Upstream vs. coalesced call counters (None if single-flight is disabled)."""
+    singleflight = get_singleflight()
+    return singleflight.stats() if singleflight is not None else None
+
+
+def get_ai_cache_stats() -> Optional[Dict[str, object]]:
+    """Hit, miss and eviction counters of the response cache (None if disabled)."""
+    response_cache = get_ai_cache()
+    return response_cache.stats() if response_cache is not None else None
+
+
+def get_ai_client_stats() -> Dict[str, Dict[str, int]]:
+    """Connection pool hit/miss counters for each provider host."""
+    return get_ai_client().stats()
+
+
+def get_async_ai_client_stats() -> Dict[str, int]:
+    """Request/retry counters of the asyncio clients (see ai_request_async)."""
+    return async_ai_client_stats()
+
+
+def get_ai_telemetry_stats() -> Dict[str, object]:
+    """Calls, errors, tokens and cost per route and per provider/model."""
+    return get_ai_telemetry().snapshot()
+
+
+def get_role_matcher_stats() -> Optional[Dict[str, object]]:
+    """Index size and local/AI split of the job role matcher (None if it is off)."""
+    return get_role_matcher().stats() if role_matcher_config.ENABLED else None
+
+
+def get_cassette_stats() -> Optional[Dict[str, object]]:
+    """Record/replay counters of the AI cassette (None if it is off)."""
+    cassette = get_cassette()
+    return cassette.stats() if cassette is not None else None
 
 
 def together_ai_request(messages: List[Dict[str, str]], 
@@ -140,8 +373,9 @@ def together_ai_request(messages: List[Dict[str, str]],
         return None, "Together API key not configured"
     
     try:
-        response = requests.post(
-            "https://api.together.xyz/v1/chat/completions",
+        response = get_ai_client().post(
+            ai_config.TOGETHER_API_URL,
+            timeout=deadline_remaining(),
             headers={
                 "Authorization": f"Bearer {ai_config.TOGETHER_API_KEY}",
                 "Content-Type": "application/json"
@@ -151,8 +385,7 @@ def together_ai_request(messages: List[Dict[str, str]],
                 "messages": messages,
                 "temperature": temperature,
                 "max_tokens": max_tokens
-            },
-            timeout=120
+            }
         )
         
         if response.status_code == 200:
@@ -162,16 +395,367 @@ def together_ai_request(messages: List[Dict[str, str]],
         return None, str(e)
 
 
-def analyze_resume(text):
+def _iter_stream_deltas(response: requests.Response) -> Iterator[str]:
+    """Yield the text deltas of an OpenAI-compatible ``stream: true`` response."""
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            choice = (chunk.get('choices') or [{}])[0]
+            delta = (choice.get('delta') or {}).get('content') or choice.get('text') or ''
+            if delta:
+                yield delta
+    finally:
+        response.close()
+
+
+def _open_stream(url: str,
+                 headers: Dict[str, str],
+                 payload: dict,
+                 provider_label: str) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """POST a streaming completion request and return its delta iterator."""
+    try:
+        response = get_ai_client().post(url, headers=headers, json=payload, stream=True,
+                                        timeout=deadline_remaining())
+    except requests.exceptions.RequestException as e:
+        return None, f"{provider_label} API request failed: {str(e)}"
+    if response.status_code != 200:
+        error = f"{provider_label} API error: {response.status_code} {response.text}"
+        response.close()
+        return None, error
+    return _iter_stream_deltas(response), None
+
+
+def together_ai_stream(messages: List[Dict[str, str]], 
+                       temperature: float = 0.7, 
+                       max_tokens: int = 512) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """
+    Streaming variant of together_ai_request.
+    
+    Returns:
+        Tuple of (iterator of text deltas, error_message)
+    """
+    if not ai_config.TOGETHER_API_KEY:
+        return None, "Together API key not configured"
+    
+    return _open_stream(
+        ai_config.TOGETHER_API_URL,
+        {
+            "Authorization": f"Bearer {ai_config.TOGETHER_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        {
+            "model": TOGETHER_MODEL,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        },
+        "Together"
+    )
+
+
+def openrouter_stream(messages: List[Dict[str, str]], 
+                      temperature: float = 0.7, 
+                      max_tokens: int = 512,
+                      model: str = None) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """
+    Streaming variant of openrouter_request.
+    
+    Returns:
+        Tuple of (iterator of text deltas, error_message)
+    """
+    if not ai_config.OPENROUTER_API_KEY:
+        return None, "OpenRouter API key not configured"
+    
+    return _open_stream(
+        ai_config.OPENROUTER_API_URL,
+        {
+            "Authorization": f"Bearer {ai_config.OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": os.getenv("APP_URL", "http://localhost:5000"),
+            "X-Title": "CareerCraft Interview Simulator"
+        },
+        {
+            "model": model or ai_config.OPENROUTER_MODEL,
+            "messages": messages,
+            "temperature": max(0, min(2.0, temperature)),
+            "max_tokens": max_tokens,
+            "stream": True
+        },
+        "OpenRouter"
+    )
+
+
+def ai_request_stream(messages: List[Dict[str, str]], 
+                      temperature: float = 0.7, 
+                      max_tokens: int = 512,
+                      provider: str = None,
+                      cache: bool = None) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """
+    Streaming counterpart of ai_request.
+    
+    A cached response is replayed as a single chunk. A completed stream is
+    written back to the response cache in the same shape ai_request stores,
+    so streaming and blocking callers share entries. Time to first token is
+    recorded in the ``ai_stream_ttfb_seconds`` histogram.
+    
+    Returns:
+        Tuple of (iterator of text deltas, error_message)
+    """
+    routed = ai_config.is_routed(provider)
+    
+    response_cache = get_ai_cache() if (ai_config.CACHE_DEFAULT if cache is None else cache) else None
+    request_key = None
+    if response_cache is not None:
+        model = "auto" if routed else ai_config.get_model(ai_config.get_provider(provider))
+        request_key = make_cache_key(messages, model, temperature, max_tokens)
+        cached = response_cache.get(request_key)
+        if cached is not None:
+            _record_cache_hit(messages, cached, "auto" if routed else ai_config.get_provider(provider))
+            content = cached.get('choices', [{}])[0].get('message', {}).get('content', '')
+            return iter([content]), None
+    
+    if deadline_exceeded():
+        return None, "AI request deadline exceeded"
+    
+    if routed:
+        routes = get_ai_router().rank(ai_config.get_routes())
+    else:
+        provider = ai_config.get_provider(provider)
+        routes = [(provider, ai_config.get_model(provider))]
+    if not routes:
+        return None, "No AI provider is configured"
+    
+    cassette = get_cassette()
+    replaying = cassette is not None and cassette.mode == "replay"
+    cache_status = "replay" if replaying else ("miss" if response_cache is not None else "bypass")
+    # The stream is consumed later (e.g. by a streaming response); attribute it to the caller now
+    route_name = current_route()
+    
+    # Fail over while opening the stream; once tokens flow we stay on that provider
+    error = None
+    for route in routes:
+        provider = route[0]
+        breaker = get_circuit_breaker(provider)
+        if not breaker.allow():
+            error = f"{provider} is temporarily unavailable (circuit open)"
+            continue
+        started = time.monotonic()
+        with retry_counter() as retries:
+            if replaying:
+                deltas, error = _replay_stream(cassette, messages, temperature, max_tokens)
+            elif provider == "openrouter":
+                deltas, error = openrouter_stream(messages, temperature, max_tokens)
+            else:  # together
+                deltas, error = together_ai_stream(messages, temperature, max_tokens)
+        if not error:
+            break
+        _record_call(route, messages, started, None, error, retries[0], cache_status, True, route_name)
+        if not is_provider_failure(error):
+            # A 4xx says nothing about the provider's health
+            breaker.release()
+            if is_request_error(error):
+                break  # the next provider would reject the same request
+            continue
+        get_ai_router().record(route, time.monotonic() - started, False)
+        breaker.record_failure()
+    if error:
+        return None, error
+    
+    def tracked():
+        parts = []
+        error = "Empty stream"
+        # Whether the provider is to blame if the stream ends early
+        provider_failed = True
+        try:
+            for delta in deltas:
+                if not parts:
+                    get_histogram("ai_stream_ttfb_seconds", provider=provider).observe(time.monotonic() - started)
+                parts.append(delta)
+                yield delta
+            error = None if parts else "Empty stream"
+        except GeneratorExit:
+            # The consumer went away (e.g. the SSE client disconnected)
+            error = "Stream closed by the client"
+            provider_failed = False
+            raise
+        except Exception as e:
+            error = f"Stream failed: {str(e)}"
+            raise
+        finally:
+            close = getattr(deltas, 'close', None)
+            if close is not None:
+                close()
+            if error is None or (parts and not provider_failed):
+                get_ai_router().record(route, time.monotonic() - started, True)
+                breaker.record_success()
+            elif provider_failed:
+                get_ai_router().record(route, time.monotonic() - started, False)
+                breaker.record_failure()
+            else:
+                # Abandoned before the provider sent anything: no verdict either way
+                breaker.release()
+            # Partial output still counts towards the call's tokens
+            content = {'choices': [{'message': {'content': ''.join(parts)}}]} if parts else None
+            _record_call(route, messages, started, content, error,
+                         retries[0], cache_status, True, route_name)
+            if error is None and response_cache is not None:
+                response_cache.set(request_key, content)
+            if error is None and cassette is not None and cassette.mode == "record":
+                cassette.record(provider, messages, temperature, max_tokens, content)
+    
+    return tracked(), None
+
+
+def _replay_stream(cassette, messages, temperature, max_tokens) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """Replay a recorded response as a stream of word-sized deltas."""
+    recorded = cassette.lookup(messages, temperature, max_tokens)
+    if recorded is None:
+        return None, "No recorded AI response for this request (cassette replay)"
+    content = recorded.get('choices', [{}])[0].get('message', {}).get('content', '')
+    return iter(re.findall(r'\S+\s*|\s+', content)), None
+
+
+def _build_resume_analysis_messages(text: str) -> List[Dict[str, str]]:
     prompt = (
         "You are a resume expert. Analyze the following resume text and suggest improvements, missing keywords, and any weaknesses. "
         "Return your feedback as a bullet list.\n\nResume:\n" + text
     )
-    messages = [
+    return [
         {"role": "system", "content": "You are a helpful assistant."},
         {"role": "user", "content": prompt}
     ]
-    result, error = ai_request(messages)
+
+
+def _build_resume_gap_messages(text: str, gaps: List[str]) -> List[Dict[str, str]]:
+    """Shorter analysis prompt: only the gaps the local pre-analysis found, plus what it can't check."""
+    if gaps:
+        focus = (
+            "An automated check of this resume found these gaps:\n" + "\n".join(f"- {gap}" for gap in gaps) +
+            "\n\nFor each gap, give one specific fix based on the resume's content. Then add at most three "
+            "weaknesses the check cannot see (clarity, impact, relevance)."
+        )
+    else:
+        focus = ("An automated check found no structural gaps. List at most five weaknesses in clarity, impact "
+                 "or relevance, each with a specific fix.")
+    prompt = "You are a resume expert. " + focus + " Return a concise bullet list.\n\nResume:\n" + text
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _resume_analysis_request(text: str, preanalysis: Optional[Dict[str, object]]) -> Tuple[List[Dict[str, str]], int]:
+    """Messages and answer budget for a single-pass analysis, narrowed to the pre-analysis gaps if given."""
+    if preanalysis:
+        return _build_resume_gap_messages(text, preanalysis_gaps(preanalysis)), ai_config.ANALYSIS_GAP_MAX_TOKENS
+    return _build_resume_analysis_messages(text), 512
+
+
+def _build_resume_chunk_messages(chunk: str, index: int, total: int) -> List[Dict[str, str]]:
+    """Map step: feedback on one section of a long resume."""
+    prompt = (
+        f"You are a resume expert. The following is part {index + 1} of {total} of a resume. "
+        "Analyze this part and suggest improvements, missing keywords, and any weaknesses. "
+        "Only comment on what this part contains; the other parts are reviewed separately. "
+        "Return your feedback as a concise bullet list.\n\nResume part:\n" + chunk
+    )
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _build_resume_reduce_messages(partials: List[str], preanalysis: Optional[Dict[str, object]] = None) -> List[Dict[str, str]]:
+    """Reduce step: merge the per-section feedback into one list."""
+    sections = "\n\n".join(
+        f"Feedback on part {i + 1}:\n{feedback}" for i, feedback in enumerate(partials)
+    )
+    gaps = preanalysis_gaps(preanalysis) if preanalysis else []
+    if gaps:
+        sections += "\n\nAn automated check of the whole resume also found:\n" + "\n".join(f"- {gap}" for gap in gaps)
+    prompt = (
+        "You are a resume expert. Below is feedback on the separate parts of one resume. "
+        "Merge it into a single bullet list of improvements, missing keywords, and weaknesses for the whole resume: "
+        "remove duplicates, resolve contradictions, and put the most important points first.\n\n" + sections
+    )
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _resume_chunks(text: str) -> Optional[List[str]]:
+    """Chunks for a map-reduce analysis, or None when the resume fits in a single prompt."""
+    if estimate_tokens(text) <= ai_config.ANALYSIS_SINGLE_PASS_TOKENS:
+        return None
+    chunks = chunk_text(text, ai_config.ANALYSIS_CHUNK_TOKENS, max_chunks=ai_config.ANALYSIS_MAX_CHUNKS)
+    return chunks if len(chunks) > 1 else None
+
+
+def _analyze_resume_chunk(index: int, total: int, chunk: str, cache: bool) -> Tuple[Optional[str], Optional[str]]:
+    result, error = ai_request(
+        _build_resume_chunk_messages(chunk, index, total),
+        max_tokens=ai_config.ANALYSIS_MAP_MAX_TOKENS,
+        cache=cache
+    )
+    if not result:
+        log_error(f"Analysis of resume part {index + 1}/{total} failed: {error}")
+        return None, error
+    return result.get('choices', [{}])[0].get('message', {}).get('content', ''), None
+
+
+def _map_resume_chunks(chunks: List[str], cache: bool) -> Tuple[List[str], Optional[str]]:
+    """
+    Analyze every chunk concurrently.
+    
+    Returns the feedback of the chunks that succeeded, in document order,
+    and the last error seen (so a total failure can be reported).
+    """
+    concurrency = max(1, min(ai_config.ANALYSIS_MAP_CONCURRENCY, len(chunks)))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ai-resume-map") as executor:
+        # Workers run in a copy of the request context so they share its deadline
+        futures = [
+            executor.submit(contextvars.copy_context().run, _analyze_resume_chunk, i, len(chunks), chunk, cache)
+            for i, chunk in enumerate(chunks)
+        ]
+        outcomes = [future.result() for future in futures]
+    partials = [feedback for feedback, _ in outcomes if feedback]
+    errors = [error for _, error in outcomes if error]
+    return partials, (errors[-1] if errors else None)
+
+
+def _reduce_fallback(partials: List[str]) -> str:
+    """Per-part feedback, used when the merge call fails."""
+    return "\n\n".join(partials)
+
+
+def analyze_resume(text, cache=True, preanalysis=None):
+    """
+    AI feedback on a resume, as {'feedback': ...} or {'error': ...}.
+    
+    Resumes longer than AI_ANALYSIS_SINGLE_PASS_TOKENS are split into
+    sections that are analysed concurrently and then merged by one final
+    call, so latency stays roughly flat as documents grow and long
+    resumes are not cut off by a single call's token limit.
+    
+    With a ``preanalysis`` (see app.utils.resume_preanalysis) the prompt
+    asks only about the gaps it found, which keeps the answer short.
+    """
+    chunks = _resume_chunks(text)
+    if chunks:
+        return _analyze_resume_map_reduce(chunks, cache, preanalysis)
+    
+    messages, max_tokens = _resume_analysis_request(text, preanalysis)
+    result, error = ai_request(messages, max_tokens=max_tokens, cache=cache)
     if result:
         feedback = result.get('choices', [{}])[0].get('message', {}).get('content', '')
         return {'feedback': feedback}
@@ -179,9 +763,53 @@ def analyze_resume(text):
         return {'error': error}
 
 
-def match_job_roles(input_text):
-    import re
-    import json
+def _analyze_resume_map_reduce(chunks: List[str], cache: bool, preanalysis: Optional[Dict[str, object]] = None) -> Dict[str, str]:
+    partials, error = _map_resume_chunks(chunks, cache)
+    if not partials:
+        return {'error': error}
+    if len(partials) == 1:
+        return {'feedback': partials[0]}
+    
+    result, error = ai_request(
+        _build_resume_reduce_messages(partials, preanalysis),
+        max_tokens=ai_config.ANALYSIS_REDUCE_MAX_TOKENS,
+        cache=cache
+    )
+    if result:
+        return {'feedback': result.get('choices', [{}])[0].get('message', {}).get('content', '')}
+    log_error(f"Merging resume feedback failed, returning per-part feedback: {error}")
+    return {'feedback': _reduce_fallback(partials)}
+
+
+def analyze_resume_stream(text, cache=True, preanalysis=None) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+    """
+    Streaming variant of analyze_resume; returns (iterator of text deltas, error).
+    
+    For long resumes the section analyses run first and only the final
+    merge is streamed.
+    """
+    chunks = _resume_chunks(text)
+    if not chunks:
+        messages, max_tokens = _resume_analysis_request(text, preanalysis)
+        return ai_request_stream(messages, max_tokens=max_tokens, cache=cache)
+    
+    partials, error = _map_resume_chunks(chunks, cache)
+    if not partials:
+        return None, error
+    if len(partials) == 1:
+        return iter(partials), None
+    deltas, error = ai_request_stream(
+        _build_resume_reduce_messages(partials, preanalysis),
+        max_tokens=ai_config.ANALYSIS_REDUCE_MAX_TOKENS,
+        cache=cache
+    )
+    if error:
+        log_error(f"Merging resume feedback failed, returning per-part feedback: {error}")
+        return iter([_reduce_fallback(partials)]), None
+    return deltas, None
+
+
+def _build_job_match_messages(input_text: str) -> List[Dict[str, str]]:
     prompt = f"""
 Based on the following skills or resume content, suggest 5–7 relevant job roles.
 For each job role, return the response in the following JSON format:
@@ -200,25 +828,60 @@ Only return a valid JSON array. Do not include explanations or extra text.
 Input:
 {input_text}
 """
-    messages = [
+    return [
         {"role": "system", "content": "You are a helpful assistant."},
         {"role": "user", "content": prompt}
     ]
-    result, error = ai_request(messages)
+
+
+def _parse_job_roles(content: str) -> List[Dict[str, object]]:
+    try:
+        roles = extract_json(content, expect=list)
+    except JSONExtractionError:
+        # fallback: parse as list of strings
+        roles = [line.strip('- ').strip() for line in content.split('\n') if line.strip().startswith('-')]
+    # Normalize: if roles is a list of strings, convert to list of dicts with all keys
+    if roles and isinstance(roles[0], str):
+        roles = [{"job_title": r, "skills": None, "certifications": None} for r in roles]
+    return roles
+
+
+def _match_job_roles_locally(input_text: str) -> Optional[Dict[str, object]]:
+    """The local role matcher's answer, or None when the AI should be asked."""
+    if not role_matcher_config.ENABLED:
+        return None
+    try:
+        matched, confidence = get_role_matcher().match(input_text)
+    except Exception as e:
+        log_error(f"Local role matching failed: {str(e)}")
+        return None
+    if matched:
+        log_info(f"Matched job roles locally (confidence {confidence})")
+    return matched
+
+
+def _learn_job_roles(roles: List[Dict[str, object]]):
+    """Feed AI-suggested roles to the local matcher so similar inputs match locally next time."""
+    if role_matcher_config.ENABLED and roles:
+        get_role_matcher().learn(roles)
+
+
+def match_job_roles(input_text, cache=True, local=True):
+    """
+    Suggest 5-7 job roles for a resume or skill list.
+
+    Answered by the local role matcher when it is confident, otherwise by
+    the AI; either way the result is {"roles": [...]} or {"error": ...}.
+    """
+    if local:
+        matched = _match_job_roles_locally(input_text)
+        if matched:
+            return matched
+    result, error = ai_request(_build_job_match_messages(input_text), cache=cache)
     if result:
         content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
-        try:
-            match = re.search(r'\[.*\]', content, re.DOTALL)
-            if match:
-                roles = json.loads(match.group())
-            else:
-                roles = json.loads(content)
-        except Exception:
-            # fallback: parse as list of strings
-            roles = [line.strip('- ').strip() for line in content.split('\n') if line.strip().startswith('-')]
-        # Normalize: if roles is a list of strings, convert to list of dicts with all keys
-        if roles and isinstance(roles[0], str):
-            roles = [{"job_title": r, "skills": None, "certifications": None} for r in roles]
+        roles = _parse_job_roles(content)
+        _learn_job_roles(roles)
         return {"roles": roles}
     else:
         return {"error": error}
@@ -226,9 +889,14 @@ Input:
 
 import random
 
-def generate_interview_questions(input_text):
-    # Generate 3-5 questions as specified
-    num_questions = random.randint(3, 5)
+def pick_question_count() -> int:
+    """Number of questions a simulator round asks: 3-5, as specified."""
+    return random.randint(3, 5)
+
+
+def _build_interview_question_messages(input_text: str, num_questions: int = None) -> Tuple[List[Dict[str, str]], int]:
+    """Prompt for generate_interview_questions and the number of questions it asks for."""
+    num_questions = num_questions or pick_question_count()
     
     prompt = f"""
 You are an expert interviewer. Given the following user profile (resume, job description, or skills), 
@@ -250,61 +918,70 @@ User Input:
         {"role": "system", "content": "You are a helpful assistant that generates interview questions."},
         {"role": "user", "content": prompt}
     ]
+    return messages, num_questions
+
+
+def parse_interview_questions(content: str, num_questions: int) -> List[str]:
+    """Turn the AI's question-generation output into a list of questions."""
+    try:
+        # Extract JSON array from the response
+        questions = extract_json(content, expect=list)
+        # Ensure we have the right number of questions
+        if len(questions) > num_questions:
+            questions = questions[:num_questions]
+        return questions
+    except JSONExtractionError:
+        # If JSON parsing fails, try to extract questions using regex
+        questions = re.findall(r'\d+\.\s*(.+?)(?=\n\d+\.|$)', content, re.DOTALL)
+        if questions:
+            return questions[:num_questions] if len(questions) > num_questions else questions
+        return ["Error: Could not parse questions from the AI response."]
+    except Exception as e:
+        return [f"Error generating questions: {str(e)}"]
+
+
+def generate_interview_questions(input_text, cache=True, provider=None, num_questions=None):
+    messages, num_questions = _build_interview_question_messages(input_text, num_questions)
     
-    result, error = ai_request(messages, temperature=0.8, max_tokens=1024, provider="together")
+    result, error = ai_request(messages, temperature=0.8, max_tokens=1024, provider=provider, cache=cache)
     
     if result:
         content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
-        import json
-        import re
-        try:
-            # Extract JSON array from the response
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                questions = json.loads(json_str)
-                # Ensure we have the right number of questions
-                if len(questions) > num_questions:
-                    questions = questions[:num_questions]
-                return questions
-            else:
-                # Fallback: Try to parse as is
-                questions = json.loads(content)
-                if isinstance(questions, list):
-                    return questions[:num_questions] if len(questions) > num_questions else questions
-                return questions
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract questions using regex
-            questions = re.findall(r'\d+\.\s*(.+?)(?=\n\d+\.|$)', content, re.DOTALL)
-            if questions:
-                return questions[:num_questions] if len(questions) > num_questions else questions
-            return ["Error: Could not parse questions from the AI response."]
-        except Exception as e:
-            return [f"Error generating questions: {str(e)}"]
+        return parse_interview_questions(content, num_questions)
     else:
         return [f"Error: {error}" if error else "Failed to generate questions"]
 
 
-def evaluate_interview_answers(questions: List[str], 
-                             answers: List[str],
-                             provider: str = None) -> List[Dict[str, str]]:
+def generate_interview_questions_stream(input_text, cache=True, provider=None, num_questions=None) -> Tuple[Optional[Iterator[str]], int, Optional[str]]:
     """
-    Evaluate interview answers using AI.
+    Streaming variant of generate_interview_questions.
     
-    Args:
-        questions: List of questions that were asked
-        answers: List of corresponding user answers
-        provider: AI provider to use ('together' or 'openrouter')
-        
     Returns:
-        List of dicts with evaluation for each answer
+        Tuple of (iterator of text deltas, number of questions requested,
+        error_message). Pass the joined text and the question count to
+        parse_interview_questions once the stream is exhausted.
     """
-    evaluations = []
+    messages, num_questions = _build_interview_question_messages(input_text, num_questions)
+    deltas, error = ai_request_stream(messages, temperature=0.8, max_tokens=1024, provider=provider, cache=cache)
+    return deltas, num_questions, error
+
+
+def _evaluation_fallback(question: str, answer: str, feedback: str) -> Dict[str, str]:
+    """Error entry used when a single answer could not be evaluated."""
+    return {
+        'question': question,
+        'answer': answer,
+        'verdict': 'Error',
+        'feedback': feedback,
+        'model_answer': ''
+    }
+
+
+def _build_single_evaluation_messages(question: str, answer: str) -> List[Dict[str, str]]:
+    """Prompt asking for the evaluation of one question/answer pair."""
+    system_prompt = """You are an AI assistant."""
     
-    for i, (question, answer) in enumerate(zip(questions, answers)):
-        system_prompt = """You are an AI assistant."""
-        
-        user_prompt = f"""
+    user_prompt = f"""
 You are an AI interview coach.
 
 Evaluate the following interview question and answer:
@@ -326,125 +1003,729 @@ Respond in this exact JSON format:
   "feedback": "Your feedback here",
   "model_answer": "Model answer here if needed"
 }}"""
+    
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    return messages
+
+
+def _parse_single_evaluation(index: int,
+                             total: int,
+                             question: str,
+                             answer: str,
+                             result: Optional[dict],
+                             error: Optional[str]) -> Dict[str, str]:
+    """Turn the (result, error) of a single-answer evaluation call into an evaluation entry."""
+    if not result:
+        error_msg = error or "No response from AI service"
+        log_error(f"AI API Error: {error_msg}")
+        return _evaluation_fallback(
+            question, answer,
+            'The AI evaluation service is currently unavailable. Please try again later.'
+        )
+    
+    try:
+        # Handle different response formats from different providers
+        if 'choices' in result:  # OpenRouter/Together AI format
+            content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        elif 'output' in result:  # Some providers might use 'output'
+            content = result.get('output', '')
+        else:  # Direct response
+            content = json.dumps(result)
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
+        # Extract the evaluation object; HTML entities in its text are decoded after parsing
+        try:
+            evaluation = extract_json(content, expect=dict, unescape_entities=True)
+            log_info(f"Successfully evaluated answer {index+1}/{total}")
+        except JSONExtractionError as json_error:
+            # If no usable JSON found, create a fallback evaluation
+            log_error(f"Could not parse JSON from AI response ({json_error}). Content: {content[:200]}...")
+            evaluation = {
+                'verdict': 'Partially Correct',
+                'feedback': 'The AI evaluation encountered a technical issue. Please review your answer and consider providing more specific details.',
+                'model_answer': ''
+            }
+        
+        return _normalize_evaluation(question, answer, evaluation)
+            
+    except Exception as e:
+        log_error(f"Error parsing AI response: {str(e)}")
+        log_error(f"Content: {content[:500] if 'content' in locals() else 'No content'}")
+        log_error(traceback.format_exc())
+        return _evaluation_fallback(
+            question, answer,
+            'Error processing the evaluation. The AI service returned an unexpected response format.'
+        )
+
+
+def _evaluate_single_answer(index: int,
+                            total: int,
+                            question: str,
+                            answer: str,
+                            provider: str = None) -> Dict[str, str]:
+    """
+    Evaluate one question/answer pair with a single AI call.
+    
+    Never raises: any failure is turned into the same fallback entries the
+    sequential evaluator has always produced, so callers can fan these out
+    and collect the results in question order.
+    """
+    messages = _build_single_evaluation_messages(question, answer)
+    try:
+        result, error = ai_request(
+            messages, 
+            temperature=0.7, 
+            max_tokens=512,
+            provider=provider
+        )
+    except Exception as e:
+        log_error(f"Error in evaluate_interview_answers: {str(e)}")
+        log_error(traceback.format_exc())
+        return _evaluation_fallback(
+            question, answer,
+            'The AI evaluation service is currently unavailable. Please try again later.'
+        )
+    return _parse_single_evaluation(index, total, question, answer, result, error)
+
+
+def _normalize_evaluation(question: str, answer: str, evaluation: dict) -> Dict[str, str]:
+    """Turn a parsed AI evaluation into the dict shape the routes store."""
+    # Handle model_answer properly - it might be a string or dict
+    model_answer = evaluation.get('model_answer', '')
+    if isinstance(model_answer, dict):
+        model_answer = json.dumps(model_answer)
+    elif isinstance(model_answer, str):
+        model_answer = model_answer.strip()
+    else:
+        model_answer = str(model_answer)
+    
+    # Normalize verdict to title case for consistency
+    verdict = evaluation.get('verdict', 'Incomplete')
+    if verdict.lower() == 'partially correct':
+        verdict = 'Partially Correct'
+    elif verdict.lower() == 'correct':
+        verdict = 'Correct'
+    elif verdict.lower() == 'incorrect':
+        verdict = 'Incorrect'
+    else:
+        verdict = verdict.capitalize()
+    
+    return {
+        'question': question,
+        'answer': answer,
+        'verdict': verdict,
+        'feedback': evaluation.get('feedback', 'No feedback provided.').strip(),
+        'model_answer': model_answer if evaluation.get('verdict', '').lower() != 'correct' else ''
+    }
+
+
+class _TimeSlices:
+    """
+    Shares the request's remaining AI budget between evaluations.
+    
+    Each call takes its slice when it starts: the time left divided by the
+    waves of ``concurrency`` calls still to run, capped at ``item_timeout``.
+    A slow answer then runs out of its own slice instead of the budget the
+    answers after it need.
+    """
+    
+    def __init__(self, pending: int, concurrency: int, item_timeout: float):
+        self.pending = pending
+        self.concurrency = concurrency
+        self.item_timeout = item_timeout
+        self._lock = threading.Lock()
+    
+    def take(self) -> float:
+        with self._lock:
+            waves = -(-self.pending // self.concurrency)
+            self.pending = max(0, self.pending - 1)
+        remaining = deadline_remaining()
+        if remaining is None:
+            return self.item_timeout
+        return max(0.0, min(self.item_timeout, remaining / max(1, waves)))
+
+
+def _evaluate_answer_in_slice(slices: _TimeSlices,
+                              deadlines: Dict[int, float],
+                              started: threading.Event,
+                              index: int,
+                              total: int,
+                              question: str,
+                              answer: str,
+                              provider: str = None) -> Dict[str, str]:
+    """_evaluate_single_answer under its own deadline; publishes that deadline for the collector."""
+    seconds = slices.take()
+    deadlines[index] = time.monotonic() + seconds
+    started.set()
+    with deadline_scope(seconds):
+        return _evaluate_single_answer(index, total, question, answer, provider)
+
+
+def _evaluate_answers_parallel(items: List[Tuple[int, str, str]],
+                               total: int,
+                               provider: str,
+                               concurrency: int,
+                               item_timeout: float) -> List[Dict[str, str]]:
+    """
+    Evaluate (index, question, answer) items with one AI call each.
+    
+    Calls run on a bounded thread pool; results are returned in item order.
+    Every call gets its own time slice (see _TimeSlices), enforced both by
+    the call's deadline and by how long its result is waited for.
+    """
+    concurrency = max(1, min(concurrency, len(items)))
+    slices = _TimeSlices(len(items), concurrency, item_timeout)
+    
+    if concurrency == 1:
+        evaluations = []
+        for i, question, answer in items:
+            with deadline_scope(slices.take()):
+                evaluations.append(_evaluate_single_answer(i, total, question, answer, provider))
+        return evaluations
+    
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ai-eval")
+    try:
+        start = time.monotonic()
+        deadlines: Dict[int, float] = {}
+        started = [threading.Event() for _ in items]
+        # Workers run in a copy of the request context so they share its deadline
+        futures = [
+            executor.submit(contextvars.copy_context().run, _evaluate_answer_in_slice,
+                            slices, deadlines, started[position], i, total, question, answer, provider)
+            for position, (i, question, answer) in enumerate(items)
         ]
+        request_deadline = deadline_remaining()
+        if request_deadline is not None:
+            request_deadline += start
         
+        evaluations = []
+        for position, future in enumerate(futures):
+            i, question, answer = items[position]
+            # A call starts once the calls ahead of it have finished or run out of time
+            start_by = start + item_timeout * (position // concurrency + 1)
+            if request_deadline is not None:
+                start_by = min(start_by, request_deadline)
+            try:
+                if not started[position].wait(timeout=max(0, start_by - time.monotonic())):
+                    raise FuturesTimeoutError()
+                evaluations.append(future.result(timeout=max(0, deadlines[i] - time.monotonic())))
+            except FuturesTimeoutError:
+                future.cancel()
+                log_error(f"Evaluation of answer {i+1}/{total} timed out")
+                evaluations.append(_evaluation_fallback(
+                    question, answer,
+                    'The AI evaluation took too long to respond. Please try again later.'
+                ))
+        return evaluations
+    finally:
+        # Don't hold the request thread for calls that already blew their deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _build_batch_evaluation_messages(items: List[Tuple[int, str, str]]) -> List[Dict[str, str]]:
+    """Single prompt asking for an evaluation of every question/answer pair."""
+    pairs_text = "\n\n".join(
+        f"Item {i + 1}\nQuestion: {question}\nAnswer: {answer}"
+        for i, question, answer in items
+    )
+    user_prompt = f"""
+You are an AI interview coach.
+
+Evaluate each of the following interview questions and answers:
+
+{pairs_text}
+
+For every item:
+1. Tell whether the answer is correct, partially correct, or incorrect.
+2. Explain why.
+3. Suggest **specific improvements**, even for correct answers.
+4. If the answer is weak or incorrect, provide a **model answer**.
+
+IMPORTANT: Respond ONLY with a valid JSON array containing exactly {len(items)} objects, one per item, in the same order. Do not include any text before or after the JSON. Use proper JSON formatting with double quotes and no HTML entities.
+
+Respond in this exact JSON format:
+[
+  {{
+    "item": 1,
+    "verdict": "Correct",
+    "feedback": "Your feedback here",
+    "model_answer": "Model answer here if needed"
+  }}
+]"""
+    return [
+        {"role": "system", "content": "You are an AI assistant."},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def _parse_batch_evaluations(content: str, items: List[Tuple[int, str, str]]) -> Dict[int, dict]:
+    """
+    Map question index -> raw evaluation dict for every usable array entry.
+    
+    Entries are matched on their "item" number when present and on their
+    position otherwise. Anything missing or malformed is simply left out so
+    the caller can re-evaluate it on its own.
+    """
+    try:
+        parsed = extract_json(content, expect=list, unescape_entities=True)
+    except JSONExtractionError as e:
+        log_error(f"Could not parse batched evaluation JSON: {e}")
+        return {}
+    
+    by_item_number = {i + 1: i for i, _, _ in items}
+    wanted = {i for i, _, _ in items}
+    found = {}
+    for position, entry in enumerate(parsed):
+        if not isinstance(entry, dict) or not isinstance(entry.get('verdict'), str) \
+                or not isinstance(entry.get('feedback'), str):
+            continue
         try:
-            # Use the new AI provider system
-            result, error = ai_request(
-                messages, 
-                temperature=0.7, 
-                max_tokens=512,
-                provider="together"
+            index = by_item_number.get(int(entry.get('item')))
+        except (TypeError, ValueError):
+            index = None
+        if index is None and position < len(items):
+            index = items[position][0]
+        if index in wanted and index not in found:
+            found[index] = entry
+    return found
+
+
+def _evaluate_answers_batched(items: List[Tuple[int, str, str]],
+                              total: int,
+                              provider: str,
+                              concurrency: int,
+                              item_timeout: float) -> List[Dict[str, str]]:
+    """
+    Evaluate all items with one AI call, retrying failed items individually.
+    """
+    messages = _build_batch_evaluation_messages(items)
+    found = {}
+    try:
+        result, error = ai_request(
+            messages,
+            temperature=0.7,
+            max_tokens=min(400 * len(items), 4096),
+            provider=provider
+        )
+        if result:
+            content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+            found = _parse_batch_evaluations(content, items)
+        else:
+            log_error(f"Batched evaluation failed: {error}")
+    except Exception as e:
+        log_error(f"Error in batched evaluation: {str(e)}")
+        log_error(traceback.format_exc())
+    
+    evaluations = {
+        i: _normalize_evaluation(question, answer, found[i])
+        for i, question, answer in items if i in found
+    }
+    
+    retry_items = [item for item in items if item[0] not in evaluations]
+    if retry_items:
+        log_info(f"Batched evaluation returned {len(evaluations)}/{len(items)} items, "
+                 f"retrying {len(retry_items)} individually")
+        retried = _evaluate_answers_parallel(retry_items, total, provider, concurrency, item_timeout)
+        for (i, _, _), evaluation in zip(retry_items, retried):
+            evaluations[i] = evaluation
+    
+    return [evaluations[i] for i, _, _ in items]
+
+
+def evaluate_interview_answers(questions: List[str], 
+                             answers: List[str],
+                             provider: str = None,
+                             concurrency: int = None,
+                             item_timeout: float = None,
+                             mode: str = None) -> List[Dict[str, str]]:
+    """
+    Evaluate interview answers using AI.
+    
+    Two modes are available:
+    
+    - ``"parallel"``: one AI call per question/answer pair, fanned out on a
+      bounded thread pool, so the total latency is roughly one round-trip.
+    - ``"batch"``: a single AI call that evaluates every pair at once and
+      returns a JSON array; items that are missing or fail to parse are
+      retried individually. Fewer requests and no repeated system prompt.
+    
+    Results are always returned in question order.
+    
+    Args:
+        questions: List of questions that were asked
+        answers: List of corresponding user answers
+        provider: AI provider to use ('together' or 'openrouter')
+        concurrency: Maximum number of parallel AI calls
+            (defaults to AI_EVAL_CONCURRENCY; 1 evaluates sequentially)
+        item_timeout: Seconds each answer may take before it is reported
+            as an error (defaults to AI_EVAL_ITEM_TIMEOUT)
+        mode: 'parallel' or 'batch' (defaults to AI_EVAL_MODE)
+        
+    Returns:
+        List of dicts with evaluation for each answer
+    """
+    items = [(i, question, answer) for i, (question, answer) in enumerate(zip(questions, answers))]
+    total = len(items)
+    if not items:
+        return []
+    
+    concurrency = concurrency or ai_config.EVAL_CONCURRENCY
+    item_timeout = item_timeout or ai_config.EVAL_ITEM_TIMEOUT
+    mode = (mode or ai_config.EVAL_MODE).lower()
+    
+    if mode == "batch":
+        return _evaluate_answers_batched(items, total, provider, concurrency, item_timeout)
+    if mode != "parallel":
+        log_error(f"Invalid evaluation mode: {mode}. Defaulting to 'parallel'.")
+    return _evaluate_answers_parallel(items, total, provider, concurrency, item_timeout)
+
+
+# ---------------------------------------------------------------------------
+# Asyncio API
+#
+# Coroutine counterparts of the blocking functions above. They share the
+# prompts, parsers, response cache, router statistics and circuit breakers,
+# but go through one httpx connection pool per event loop, so a single loop
+# (a batch job, an async route) can keep many AI calls in flight without a
+# thread per call.
+# ---------------------------------------------------------------------------
+
+async def openrouter_request_async(messages: List[Dict[str, str]], 
+                                   temperature: float = 0.7, 
+                                   max_tokens: int = 512,
+                                   model: str = None) -> Tuple[Optional[dict], Optional[str]]:
+    """Asyncio variant of openrouter_request."""
+    if not ai_config.OPENROUTER_API_KEY:
+        return None, "OpenRouter API key not configured"
+    
+    try:
+        response = await get_async_ai_client().post(
+            ai_config.OPENROUTER_API_URL,
+            timeout=deadline_remaining(),
+            headers={
+                "Authorization": f"Bearer {ai_config.OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": os.getenv("APP_URL", "http://localhost:5000"),
+                "X-Title": "CareerCraft Interview Simulator"
+            },
+            json={
+                "model": model or ai_config.OPENROUTER_MODEL,
+                "messages": messages,
+                "temperature": max(0, min(2.0, temperature)),
+                "max_tokens": max_tokens,
+            }
+        )
+    except Exception as e:
+        return None, f"OpenRouter API request failed: {str(e)}"
+    
+    if response.status_code == 200:
+        return response.json(), None
+    try:
+        error_detail = response.json().get('error', {}).get('message') or response.text
+    except Exception:
+        error_detail = response.text
+    return None, f"OpenRouter API error: {response.status_code} {error_detail}"
+
+
+async def together_ai_request_async(messages: List[Dict[str, str]], 
+                                    temperature: float = 0.7, 
+                                    max_tokens: int = 512) -> Tuple[Optional[dict], Optional[str]]:
+    """Asyncio variant of together_ai_request."""
+    if not ai_config.TOGETHER_API_KEY:
+        return None, "Together API key not configured"
+    
+    try:
+        response = await get_async_ai_client().post(
+            ai_config.TOGETHER_API_URL,
+            timeout=deadline_remaining(),
+            headers={
+                "Authorization": f"Bearer {ai_config.TOGETHER_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": TOGETHER_MODEL,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
+        )
+        
+        if response.status_code == 200:
+            return response.json(), None
+        return None, f"{response.status_code} {response.text}"
+    except Exception as e:
+        return None, str(e)
+
+
+async def _send_to_provider_async(route: Tuple[str, str],
+                                  messages: List[Dict[str, str]],
+                                  temperature: float,
+                                  max_tokens: int,
+                                  send,
+                                  cache_status: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Asyncio variant of _send_to_provider; ``send`` returns the provider coroutine."""
+    provider = route[0]
+    cassette = get_cassette()
+    started = time.monotonic()
+    if cassette is not None and cassette.mode == "replay":
+        recorded = cassette.lookup(messages, temperature, max_tokens)
+        error = None if recorded is not None else "No recorded AI response for this request (cassette replay)"
+        _record_call(route, messages, started, recorded, error, 0, "replay")
+        return recorded, error
+    with retry_counter() as retries:
+        result, error = await send()
+    _record_call(route, messages, started, result, error, retries[0], cache_status)
+    if result and cassette is not None:
+        cassette.record(provider, messages, temperature, max_tokens, result)
+    return result, error
+
+
+async def ai_request_async(messages: List[Dict[str, str]], 
+                           temperature: float = 0.7, 
+                           max_tokens: int = 512,
+                           provider: str = None,
+                           cache: bool = None) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Asyncio counterpart of ai_request, with the same arguments and return shape.
+    
+    Identical cacheable calls in flight on the same event loop are
+    coalesced; the cross-process single-flight registry is only used by
+    ai_request.
+    """
+    if not HAS_HTTPX:
+        return None, "httpx is not installed; async AI calls are unavailable"
+    
+    routed = ai_config.is_routed(provider)
+    if not routed:
+        provider = ai_config.get_provider(provider)
+    
+    response_cache = get_ai_cache() if (ai_config.CACHE_DEFAULT if cache is None else cache) else None
+    singleflight = get_async_singleflight() if response_cache is not None else None
+    request_key = None
+    if response_cache is not None:
+        model = "auto" if routed else ai_config.get_model(provider)
+        request_key = make_cache_key(messages, model, temperature, max_tokens)
+    
+    if response_cache is not None:
+        cached = response_cache.get(request_key)
+        if cached is not None:
+            _record_cache_hit(messages, cached, "auto" if routed else provider)
+            return cached, None
+    
+    if deadline_exceeded():
+        return None, "AI request deadline exceeded"
+    
+    cache_status = "miss" if response_cache is not None else "bypass"
+    
+    async def call_route(route):
+        if route[0] == "openrouter":
+            send = lambda: openrouter_request_async(messages, temperature, max_tokens)
+        else:
+            send = lambda: together_ai_request_async(messages, temperature, max_tokens)
+        return await _send_to_provider_async(route, messages, temperature, max_tokens, send, cache_status)
+    
+    async def upstream():
+        routes = ai_config.get_routes() if routed else [(provider, ai_config.get_model(provider))]
+        return await get_ai_router().call_async(routes, call_route)
+    
+    if singleflight is not None:
+        result, error = await singleflight.do(f"{'auto' if routed else provider}:{request_key}", upstream)
+    else:
+        result, error = await upstream()
+    
+    if result and response_cache is not None:
+        response_cache.set(request_key, result)
+    return result, error
+
+
+async def _analyze_resume_map_reduce_async(chunks: List[str], cache: bool, preanalysis: Optional[Dict[str, object]] = None) -> Dict[str, str]:
+    semaphore = asyncio.Semaphore(max(1, ai_config.ANALYSIS_MAP_CONCURRENCY))
+    
+    async def analyze_chunk(index, chunk):
+        async with semaphore:
+            result, error = await ai_request_async(
+                _build_resume_chunk_messages(chunk, index, len(chunks)),
+                max_tokens=ai_config.ANALYSIS_MAP_MAX_TOKENS,
+                cache=cache
             )
-            
-            if result:
-                try:
-                    # Handle different response formats from different providers
-                    if 'choices' in result:  # OpenRouter/Together AI format
-                        content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
-                    elif 'output' in result:  # Some providers might use 'output'
-                        content = result.get('output', '')
-                    else:  # Direct response
-                        content = json.dumps(result)
-                    
-                    # Clean up the response to extract JSON
-                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                        
-                        # Clean up common JSON issues
-                        json_str = json_str.replace('&quot;', '"')  # Fix HTML entities
-                        json_str = json_str.replace('&amp;', '&')   # Fix HTML entities
-                        json_str = json_str.replace('&lt;', '<')    # Fix HTML entities
-                        json_str = json_str.replace('&gt;', '>')    # Fix HTML entities
-                        
-                        # Remove invalid control characters
-                        json_str = ''.join(char for char in json_str if ord(char) >= 32 or char in '\n\r\t')
-                        
-                        # Fix common escape sequence issues
-                        json_str = json_str.replace('\\"', '"')  # Fix double escaped quotes
-                        json_str = json_str.replace('\\\\', '\\')  # Fix double escaped backslashes
-                        
-                        try:
-                            evaluation = json.loads(json_str)
-                        except json.JSONDecodeError as json_error:
-                            # If still fails, try to fix the JSON structure
-                            log_error(f"JSON decode error after cleaning: {json_error}")
-                            log_error(f"Cleaned JSON: {json_str[:500]}...")
-                            
-                            # Fallback: create a basic evaluation
-                            evaluation = {
-                                'verdict': 'Partially Correct',
-                                'feedback': 'The AI evaluation encountered a technical issue. Please review your answer and consider providing more specific details.',
-                                'model_answer': ''
-                            }
-                        
-                        # Handle model_answer properly - it might be a string or dict
-                        model_answer = evaluation.get('model_answer', '')
-                        if isinstance(model_answer, dict):
-                            model_answer = json.dumps(model_answer)
-                        elif isinstance(model_answer, str):
-                            model_answer = model_answer.strip()
-                        else:
-                            model_answer = str(model_answer)
-                        
-                        # Normalize verdict to title case for consistency
-                        verdict = evaluation.get('verdict', 'Incomplete')
-                        if verdict.lower() == 'partially correct':
-                            verdict = 'Partially Correct'
-                        elif verdict.lower() == 'correct':
-                            verdict = 'Correct'
-                        elif verdict.lower() == 'incorrect':
-                            verdict = 'Incorrect'
-                        else:
-                            verdict = verdict.capitalize()
-                        
-                        evaluations.append({
-                            'question': question,
-                            'answer': answer,
-                            'verdict': verdict,
-                            'feedback': evaluation.get('feedback', 'No feedback provided.').strip(),
-                            'model_answer': model_answer if evaluation.get('verdict', '').lower() != 'correct' else ''
-                        })
-                        log_info(f"Successfully evaluated answer {i+1}/{len(questions)}")
-                    else:
-                        # If no JSON found, create a fallback evaluation
-                        log_error(f"Could not parse JSON from AI response. Content: {content[:200]}...")
-                        evaluation = {
-                            'verdict': 'Partially Correct',
-                            'feedback': 'The AI evaluation encountered a technical issue. Please review your answer and consider providing more specific details.',
-                            'model_answer': ''
-                        }
-                        
-                except Exception as e:
-                    log_error(f"Error parsing AI response: {str(e)}")
-                    log_error(f"Content: {content[:500] if 'content' in locals() else 'No content'}")
-                    log_error(traceback.format_exc())
-                    evaluations.append({
-                        'question': question,
-                        'answer': answer,
-                        'verdict': 'Error',
-                        'feedback': 'Error processing the evaluation. The AI service returned an unexpected response format.',
-                        'model_answer': ''
-                    })
-            else:
-                error_msg = error or "No response from AI service"
-                log_error(f"AI API Error: {error_msg}")
-                raise Exception(f"AI service error: {error_msg}")
-                
-        except Exception as e:
-            log_error(f"Error in evaluate_interview_answers: {str(e)}")
-            log_error(traceback.format_exc())
-            evaluations.append({
-                'question': question,
-                'answer': answer,
-                'verdict': 'Error',
-                'feedback': 'The AI evaluation service is currently unavailable. Please try again later.',
-                'model_answer': ''
-            })
+        if not result:
+            log_error(f"Analysis of resume part {index + 1}/{len(chunks)} failed: {error}")
+            return None, error
+        return result.get('choices', [{}])[0].get('message', {}).get('content', ''), None
+    
+    outcomes = await asyncio.gather(*(analyze_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    partials = [feedback for feedback, _ in outcomes if feedback]
+    if not partials:
+        return {'error': [error for _, error in outcomes if error][-1]}
+    if len(partials) == 1:
+        return {'feedback': partials[0]}
+    
+    result, error = await ai_request_async(
+        _build_resume_reduce_messages(partials, preanalysis),
+        max_tokens=ai_config.ANALYSIS_REDUCE_MAX_TOKENS,
+        cache=cache
+    )
+    if result:
+        return {'feedback': result.get('choices', [{}])[0].get('message', {}).get('content', '')}
+    log_error(f"Merging resume feedback failed, returning per-part feedback: {error}")
+    return {'feedback': _reduce_fallback(partials)}
+
+
+async def analyze_resume_async(text, cache=True, preanalysis=None):
+    chunks = _resume_chunks(text)
+    if chunks:
+        return await _analyze_resume_map_reduce_async(chunks, cache, preanalysis)
+    messages, max_tokens = _resume_analysis_request(text, preanalysis)
+    result, error = await ai_request_async(messages, max_tokens=max_tokens, cache=cache)
+    if result:
+        feedback = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        return {'feedback': feedback}
+    else:
+        return {'error': error}
+
+
+async def match_job_roles_async(input_text, cache=True, local=True):
+    if local:
+        matched = _match_job_roles_locally(input_text)
+        if matched:
+            return matched
+    result, error = await ai_request_async(_build_job_match_messages(input_text), cache=cache)
+    if result:
+        content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        roles = _parse_job_roles(content)
+        _learn_job_roles(roles)
+        return {"roles": roles}
+    else:
+        return {"error": error}
+
+
+async def generate_interview_questions_async(input_text, cache=True, provider=None, num_questions=None):
+    messages, num_questions = _build_interview_question_messages(input_text, num_questions)
+    
+    result, error = await ai_request_async(messages, temperature=0.8, max_tokens=1024, provider=provider, cache=cache)
+    
+    if result:
+        content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        return parse_interview_questions(content, num_questions)
+    else:
+        return [f"Error: {error}" if error else "Failed to generate questions"]
+
+
+async def _evaluate_single_answer_async(index: int,
+                                        total: int,
+                                        question: str,
+                                        answer: str,
+                                        provider: str = None) -> Dict[str, str]:
+    """Asyncio variant of _evaluate_single_answer; never raises either."""
+    try:
+        result, error = await ai_request_async(
+            _build_single_evaluation_messages(question, answer),
+            temperature=0.7,
+            max_tokens=512,
+            provider=provider
+        )
+    except Exception as e:
+        log_error(f"Error in evaluate_interview_answers_async: {str(e)}")
+        log_error(traceback.format_exc())
+        return _evaluation_fallback(
+            question, answer,
+            'The AI evaluation service is currently unavailable. Please try again later.'
+        )
+    return _parse_single_evaluation(index, total, question, answer, result, error)
+
+
+async def _evaluate_answers_parallel_async(items: List[Tuple[int, str, str]],
+                                           total: int,
+                                           provider: str,
+                                           concurrency: int,
+                                           item_timeout: float) -> List[Dict[str, str]]:
+    """Evaluate items with one AI call each, at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    slices = _TimeSlices(len(items), max(1, min(concurrency, len(items))), item_timeout)
+    
+    async def evaluate(i, question, answer):
+        async with semaphore:
+            seconds = slices.take()
+            try:
+                with deadline_scope(seconds):
+                    return await asyncio.wait_for(
+                        _evaluate_single_answer_async(i, total, question, answer, provider),
+                        seconds
+                    )
+            except asyncio.TimeoutError:
+                log_error(f"Evaluation of answer {i+1}/{total} timed out")
+                return _evaluation_fallback(
+                    question, answer,
+                    'The AI evaluation took too long to respond. Please try again later.'
+                )
+    
+    return list(await asyncio.gather(*(evaluate(*item) for item in items)))
+
+
+async def _evaluate_answers_batched_async(items: List[Tuple[int, str, str]],
+                                          total: int,
+                                          provider: str,
+                                          concurrency: int,
+                                          item_timeout: float) -> List[Dict[str, str]]:
+    """Asyncio variant of _evaluate_answers_batched."""
+    found = {}
+    try:
+        result, error = await ai_request_async(
+            _build_batch_evaluation_messages(items),
+            temperature=0.7,
+            max_tokens=min(400 * len(items), 4096),
+            provider=provider
+        )
+        if result:
+            content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+            found = _parse_batch_evaluations(content, items)
+        else:
+            log_error(f"Batched evaluation failed: {error}")
+    except Exception as e:
+        log_error(f"Error in batched evaluation: {str(e)}")
+        log_error(traceback.format_exc())
+    
+    evaluations = {
+        i: _normalize_evaluation(question, answer, found[i])
+        for i, question, answer in items if i in found
+    }
+    
+    retry_items = [item for item in items if item[0] not in evaluations]
+    if retry_items:
+        log_info(f"Batched evaluation returned {len(evaluations)}/{len(items)} items, "
+                 f"retrying {len(retry_items)} individually")
+        retried = await _evaluate_answers_parallel_async(retry_items, total, provider, concurrency, item_timeout)
+        for (i, _, _), evaluation in zip(retry_items, retried):
+            evaluations[i] = evaluation
+    
+    return [evaluations[i] for i, _, _ in items]
+
+
+async def evaluate_interview_answers_async(questions: List[str], 
+                                           answers: List[str],
+                                           provider: str = None,
+                                           concurrency: int = None,
+                                           item_timeout: float = None,
+                                           mode: str = None) -> List[Dict[str, str]]:
+    """
+    Asyncio variant of evaluate_interview_answers, with the same arguments.
+    
+    In parallel mode the calls are coroutines on the current event loop,
+    bounded by a semaphore instead of a thread pool.
+    """
+    items = [(i, question, answer) for i, (question, answer) in enumerate(zip(questions, answers))]
+    total = len(items)
+    if not items:
+        return []
+    
+    concurrency = concurrency or ai_config.EVAL_CONCURRENCY
+    item_timeout = item_timeout or ai_config.EVAL_ITEM_TIMEOUT
+    mode = (mode or ai_config.EVAL_MODE).lower()
     
-    return evaluations
\ No newline at end of file
+    if mode == "batch":
+        return await _evaluate_answers_batched_async(items, total, provider, concurrency, item_timeout)
+    if mode != "parallel":
+        log_error(f"Invalid evaluation mode: {mode}. Defaulting to 'parallel'.")
+    return await _evaluate_answers_parallel_async(items, total, provider, concurrency, item_timeout)
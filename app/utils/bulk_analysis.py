@@ -0,0 +1,515 @@
+import os
+import json
+import queue
+import uuid
+import hashlib
+import zipfile
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, or_
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.models import BulkAnalysisRun, BulkAnalysisItem, ResumeAnalyzer, User
+from app.utils.ai_telemetry import telemetry_route
+from app.utils.ai_utils import analyze_resume
+from app.utils.ingestion import IngestionError, ALLOWED_EXTENSIONS, ingestion_config, get_extraction_cache
+from app.utils.resume_preanalysis import preanalyze_resume
+
+
+class BulkAnalysisConfig:
+    def __init__(self):
+        # Where uploaded ZIPs are kept until their run has finished
+        self.UPLOAD_DIR = os.getenv("BULK_ANALYSIS_UPLOAD_DIR", os.path.join('instance', 'bulk_uploads'))
+        self.MAX_UPLOAD_BYTES = int(os.getenv("BULK_ANALYSIS_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+        # Resumes per run
+        self.MAX_FILES = int(os.getenv("BULK_ANALYSIS_MAX_FILES", "1000"))
+        # Queued or running runs per user started from the web app
+        self.MAX_ACTIVE_RUNS = int(os.getenv("BULK_ANALYSIS_MAX_ACTIVE_RUNS", "1"))
+        # Threads feeding the extraction pool and running the local pre-analysis
+        self.EXTRACT_THREADS = int(os.getenv("BULK_ANALYSIS_EXTRACT_THREADS", "2"))
+        # analyze_resume calls in flight at once
+        self.AI_CONCURRENCY = int(os.getenv("BULK_ANALYSIS_AI_CONCURRENCY", "4"))
+        # Results written per commit; each commit is also the run's checkpoint
+        self.BATCH_SIZE = int(os.getenv("BULK_ANALYSIS_BATCH_SIZE", "25"))
+        # Longest a finished result waits before its batch is written anyway
+        self.FLUSH_INTERVAL = float(os.getenv("BULK_ANALYSIS_FLUSH_INTERVAL", "5"))
+        # A running run that hasn't written anything for this long is treated as interrupted
+        self.STALE_AFTER = float(os.getenv("BULK_ANALYSIS_STALE_AFTER", "300"))
+
+
+bulk_config = BulkAnalysisConfig()
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+# ---------------------------------------------------------------------------
+# Sources: a ZIP file or a directory of PDF/TXT resumes
+# ---------------------------------------------------------------------------
+
+def _is_resume(name: str) -> bool:
+    parts = name.replace('\\', '/').split('/')
+    if any(part.startswith('.') or part == '__MACOSX' for part in parts):
+        return False
+    return '.' in parts[-1] and parts[-1].rsplit('.', 1)[-1].lower() in ALLOWED_EXTENSIONS
+
+
+class _Source:
+    """Resume files of a ZIP or directory, by their path inside it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = None
+        if os.path.isdir(path):
+            names = []
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file in sorted(files):
+                    names.append(os.path.relpath(os.path.join(root, file), path).replace(os.sep, '/'))
+        elif zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+            names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            raise IngestionError('Bulk analysis needs a ZIP file or a directory.')
+        self.names = [name for name in names if _is_resume(name)]
+        if not self.names:
+            raise IngestionError('No PDF or TXT resumes were found.')
+        if len(self.names) > bulk_config.MAX_FILES:
+            raise IngestionError(f'Found {len(self.names)} resumes; at most {bulk_config.MAX_FILES} are supported per run.')
+
+    def read(self, name: str) -> bytes:
+        max_bytes = ingestion_config.MAX_BYTES
+        if self._zip is not None:
+            # Bounded read: the sizes in a ZIP's directory can't be trusted
+            with self._zip.open(name) as f:
+                data = f.read(max_bytes + 1)
+        else:
+            with open(os.path.join(self.path, *name.split('/')), 'rb') as f:
+                data = f.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise IngestionError(f'The file is too large (maximum {max_bytes // (1024 * 1024) or 1} MB).')
+        return data
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class _Result:
+    def __init__(self, name: str, sha256: Optional[str], status: str, feedback: str = None,
+                 preanalysis: Dict[str, object] = None, error: str = None, first: str = None):
+        self.name = name
+        self.sha256 = sha256
+        self.status = status  # succeeded, failed or duplicate
+        self.feedback = feedback
+        self.preanalysis = preanalysis
+        self.error = error
+        self.first = first  # for duplicates, the item whose analysis they share
+
+
+class BulkPipeline:
+    """
+    Analyze every resume of a run as a streaming pipeline.
+
+    A reader hashes each file and drops repeats, extraction threads parse
+    files (in the extraction pool) and run the local pre-analysis, AI
+    threads call analyze_resume with bounded concurrency, and the calling
+    thread writes results in batches. Bounded queues between the stages
+    keep only a few files in memory at a time. Each batch commit records
+    the finished items, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, run: BulkAnalysisRun, config: BulkAnalysisConfig = None,
+                 progress: Callable[[BulkAnalysisRun], None] = None):
+        self.run = run
+        self.config = config or bulk_config
+        self.progress = progress
+        self.app = current_app._get_current_object()
+        self._extract_queue = queue.Queue(maxsize=max(1, self.config.EXTRACT_THREADS) * 2)
+        self._ai_queue = queue.Queue(maxsize=max(1, self.config.AI_CONCURRENCY) * 2)
+        self._results = queue.Queue()
+        self._extractors_left = max(1, self.config.EXTRACT_THREADS)
+        self._lock = threading.Lock()
+
+    def _read(self, source: _Source, pending: List[str], analysis_by_sha: Dict[str, int]):
+        first_by_sha: Dict[str, str] = {}
+        try:
+            for name in pending:
+                try:
+                    data = source.read(name)
+                except Exception as e:
+                    self._results.put(_Result(name, None, 'failed', error=str(e)))
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                if digest in analysis_by_sha or digest in first_by_sha:
+                    self._results.put(_Result(name, digest, 'duplicate', first=first_by_sha.get(digest)))
+                    continue
+                first_by_sha[digest] = name
+                self._extract_queue.put((name, digest, data))
+        finally:
+            for _ in range(max(1, self.config.EXTRACT_THREADS)):
+                self._extract_queue.put(_DONE)
+
+    def _extract(self):
+        with self.app.app_context():
+            try:
+                while True:
+                    item = self._extract_queue.get()
+                    if item is _DONE:
+                        return
+                    name, digest, data = item
+                    try:
+                        document = get_extraction_cache().get_or_extract(os.path.basename(name), data)
+                        if not document['text'].strip():
+                            raise IngestionError('No text could be extracted from the file.')
+                        self._ai_queue.put((name, digest, document['text'], preanalyze_resume(document['text'])))
+                    except Exception as e:
+                        self._results.put(_Result(name, digest, 'failed', error=str(e)))
+            finally:
+                with self._lock:
+                    self._extractors_left -= 1
+                    last = self._extractors_left == 0
+                if last:
+                    for _ in range(max(1, self.config.AI_CONCURRENCY)):
+                        self._ai_queue.put(_DONE)
+
+    def _analyze(self):
+        with self.app.app_context(), telemetry_route('bulk_resume_analysis'):
+            try:
+                while True:
+                    item = self._ai_queue.get()
+                    if item is _DONE:
+                        return
+                    name, digest, text, preanalysis = item
+                    try:
+                        ai_result = analyze_resume(text, preanalysis=preanalysis)
+                    except Exception as e:
+                        ai_result = {'error': str(e)}
+                    if 'feedback' in ai_result:
+                        self._results.put(_Result(name, digest, 'succeeded', feedback=ai_result['feedback'],
+                                                  preanalysis=preanalysis))
+                    else:
+                        self._results.put(_Result(name, digest, 'failed',
+                                                  error=ai_result.get('error', 'Unknown error from AI analysis.')))
+            finally:
+                self._results.put(_DONE)
+
+    def _write(self, batch: List[_Result], analysis_by_sha: Dict[str, int], waiting: Dict[str, List[_Result]]):
+        """Insert a batch of results and the run's counters in one commit."""
+        run = self.run
+        analyses = []
+        for result in batch:
+            if result.status == 'succeeded':
+                analyses.append((result, ResumeAnalyzer(user_id=run.user_id,
+                                                        filename=secure_filename(os.path.basename(result.name)) or 'resume',
+                                                        suggestions=result.feedback,
+                                                        preanalysis=json.dumps(result.preanalysis))))
+        db.session.add_all([analysis for _, analysis in analyses])
+        db.session.flush()  # assigns the analysis ids the items point to
+
+        items = []
+        for result, analysis in analyses:
+            analysis_by_sha[result.sha256] = analysis.id
+            items.append(BulkAnalysisItem(run_id=run.id, name=result.name, sha256=result.sha256,
+                                          status='succeeded', analysis_id=analysis.id))
+            run.succeeded += 1
+            # Copies of this file that arrived before its analysis did
+            for duplicate in waiting.pop(result.sha256, []):
+                batch.append(duplicate)
+        for result in batch:
+            if result.status == 'failed':
+                items.append(BulkAnalysisItem(run_id=run.id, name=result.name, sha256=result.sha256,
+                                              status='failed', error=(result.error or '')[:2000]))
+                run.failed += 1
+                for duplicate in waiting.pop(result.sha256, []) if result.sha256 else []:
+                    items.append(BulkAnalysisItem(run_id=run.id, name=duplicate.name, sha256=duplicate.sha256,
+                                                  status='failed', error=f'Same file as {result.name}, which failed.'))
+                    run.failed += 1
+            elif result.status == 'duplicate':
+                if result.sha256 not in analysis_by_sha:
+                    waiting.setdefault(result.sha256, []).append(result)
+                    continue
+                items.append(BulkAnalysisItem(run_id=run.id, name=result.name, sha256=result.sha256,
+                                              status='duplicate', analysis_id=analysis_by_sha[result.sha256]))
+                run.duplicates += 1
+        db.session.add_all(items)
+        run.updated_at = datetime.utcnow()
+        db.session.commit()
+        if self.progress and (analyses or items):
+            self.progress(run)
+
+    def execute(self, source: _Source):
+        run = self.run
+        done = {item.name: item for item in run.items.filter(BulkAnalysisItem.status.in_(('succeeded', 'duplicate')))}
+        analysis_by_sha = {item.sha256: item.analysis_id for item in done.values()
+                           if item.status == 'succeeded' and item.sha256}
+        pending = [name for name in source.names if name not in done]
+
+        threads = [threading.Thread(target=self._read, args=(source, pending, analysis_by_sha),
+                                    name=f'bulk-{run.id}-read', daemon=True)]
+        threads += [threading.Thread(target=self._extract, name=f'bulk-{run.id}-extract-{i}', daemon=True)
+                    for i in range(max(1, self.config.EXTRACT_THREADS))]
+        threads += [threading.Thread(target=self._analyze, name=f'bulk-{run.id}-ai-{i}', daemon=True)
+                    for i in range(max(1, self.config.AI_CONCURRENCY))]
+        for thread in threads:
+            thread.start()
+
+        batch: List[_Result] = []
+        waiting: Dict[str, List[_Result]] = {}
+        analyzers_left = max(1, self.config.AI_CONCURRENCY)
+        last_write = datetime.utcnow()
+        while analyzers_left:
+            try:
+                result = self._results.get(timeout=self.config.FLUSH_INTERVAL)
+            except queue.Empty:
+                result = None
+            if result is _DONE:
+                analyzers_left -= 1
+            elif result is not None:
+                batch.append(result)
+            # Write when the batch is full, or when results (or the heartbeat) have waited long enough
+            due = datetime.utcnow() - last_write >= timedelta(seconds=self.config.FLUSH_INTERVAL)
+            if len(batch) >= self.config.BATCH_SIZE or due:
+                self._write(batch, analysis_by_sha, waiting)
+                batch, last_write = [], datetime.utcnow()
+        for thread in threads:
+            thread.join()
+        # Everything that's left, including duplicates of a file analyzed in an earlier session
+        while not self._results.empty():
+            result = self._results.get()
+            if result is not _DONE:
+                batch.append(result)
+        self._write(batch, analysis_by_sha, waiting)
+        for duplicates in waiting.values():
+            for duplicate in duplicates:
+                db.session.add(BulkAnalysisItem(run_id=run.id, name=duplicate.name, sha256=duplicate.sha256,
+                                                status='failed', error=f'Same file as {duplicate.first or "an earlier file"}, which was not analyzed.'))
+                run.failed += 1
+        db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Runs
+# ---------------------------------------------------------------------------
+
+def create_bulk_run(user_id: int, source: str, label: str = None) -> BulkAnalysisRun:
+    """Record a run over ``source`` (ZIP or directory); raises IngestionError if it has no usable resumes."""
+    reader = _Source(source)
+    try:
+        total = len(reader.names)
+    finally:
+        reader.close()
+    run = BulkAnalysisRun(user_id=user_id, source=source, label=label or os.path.basename(source.rstrip('/\\')),
+                          status='queued', total=total)
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def save_bulk_upload(file) -> str:
+    """Store an uploaded ZIP for a bulk run; returns its path."""
+    os.makedirs(bulk_config.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(bulk_config.UPLOAD_DIR, f'{uuid.uuid4().hex}.zip')
+    written = 0
+    with open(path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(1024 * 1024)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > bulk_config.MAX_UPLOAD_BYTES:
+                out.close()
+                os.remove(path)
+                raise IngestionError(f'The ZIP is too large (maximum {bulk_config.MAX_UPLOAD_BYTES // (1024 * 1024)} MB).')
+            out.write(chunk)
+    return path
+
+
+def is_resumable(run: BulkAnalysisRun) -> bool:
+    """True unless the run finished without failures or is still making progress."""
+    if run.status == 'completed':
+        return run.failed > 0
+    if run.status == 'running':
+        return datetime.utcnow() - (run.updated_at or run.created_at) > timedelta(seconds=bulk_config.STALE_AFTER)
+    return True
+
+
+def count_active_bulk_runs(user_id: int) -> int:
+    """The user's runs that are queued or still making progress."""
+    stale = datetime.utcnow() - timedelta(seconds=bulk_config.STALE_AFTER)
+    return BulkAnalysisRun.query.filter(
+        BulkAnalysisRun.user_id == user_id,
+        or_(BulkAnalysisRun.status == 'queued',
+            and_(BulkAnalysisRun.status == 'running',
+                 func.coalesce(BulkAnalysisRun.updated_at, BulkAnalysisRun.created_at) >= stale))
+    ).count()
+
+
+def run_bulk_analysis(run_id: int, progress: Callable[[BulkAnalysisRun], None] = None) -> BulkAnalysisRun:
+    """
+    Process a run, or the remainder of an interrupted one.
+
+    Failed items are retried; finished ones are skipped. Raises
+    IngestionError when the run can't be (re)started.
+    """
+    run = db.session.get(BulkAnalysisRun, run_id)
+    if run is None:
+        raise IngestionError(f'Bulk run {run_id} does not exist.')
+    if not is_resumable(run):
+        raise IngestionError(f'Bulk run {run_id} is {run.status}.')
+    # Claim the run, so two resumes of the same run don't both process it
+    claimed = BulkAnalysisRun.query.filter(
+        BulkAnalysisRun.id == run.id,
+        BulkAnalysisRun.status == run.status,
+        BulkAnalysisRun.updated_at == run.updated_at
+    ).update({'status': 'running', 'error': None, 'finished_at': None, 'updated_at': datetime.utcnow()},
+             synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        raise IngestionError(f'Bulk run {run_id} was started by someone else.')
+    db.session.refresh(run)
+
+    # Failed items are retried, so they no longer count
+    # 'fetch' also drops the deleted rows from the session, so new items that
+    # reuse their ids don't collide with them in the identity map
+    run.items.filter_by(status='failed').delete(synchronize_session='fetch')
+    run.failed = 0
+    db.session.commit()
+
+    source = None
+    try:
+        source = _Source(run.source)
+        run.total = len(source.names)
+        BulkPipeline(run, progress=progress).execute(source)
+        run.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        print(f"[ERROR] Bulk analysis run {run_id} failed: {e}")
+        run.status, run.error = 'failed', str(e)
+    finally:
+        if source is not None:
+            source.close()
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    if run.status == 'completed' and not run.failed and os.path.dirname(os.path.abspath(run.source)) == os.path.abspath(bulk_config.UPLOAD_DIR):
+        # Uploaded ZIPs are only kept while there is something to resume
+        try:
+            os.remove(run.source)
+        except OSError:
+            pass
+    return run
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Runs started from the web process execute one at a time, in order."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-analysis')
+    return _executor
+
+
+def _run_in_background(app, run_id: int):
+    with app.app_context():
+        try:
+            run_bulk_analysis(run_id)
+        except Exception as e:
+            print(f"[ERROR] Bulk analysis run {run_id} could not start: {e}")
+
+
+def start_bulk_analysis(run: BulkAnalysisRun):
+    """Process ``run`` on a background thread of this process."""
+    if run.status != 'queued':
+        run.status = 'queued'
+        db.session.commit()
+    _get_executor().submit(_run_in_background, current_app._get_current_object(), run.id)
+
+
+def bulk_run_summary(run: BulkAnalysisRun, items: bool = False) -> Dict[str, object]:
+    """Progress of a run, optionally with its failed items."""
+    summary = dict(run.to_dict(), resumable=is_resumable(run) and run.status != 'queued')
+    if items:
+        summary['failed_items'] = [item.to_dict() for item in run.items.filter_by(status='failed')]
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# CLI: flask bulk-analysis run <zip or directory> --user <id or email>
+# ---------------------------------------------------------------------------
+
+def _find_user(user: str) -> Optional[User]:
+    if user.isdigit():
+        return db.session.get(User, int(user))
+    return User.query.filter_by(email=user).first()
+
+
+def _echo_progress(run: BulkAnalysisRun):
+    click.echo(f"  {run.processed}/{run.total} processed "
+               f"({run.succeeded} analyzed, {run.duplicates} duplicates, {run.failed} failed)")
+
+
+@click.group('bulk-analysis')
+def bulk_analysis_cli():
+    """Analyze many resumes at once."""
+
+
+@bulk_analysis_cli.command('run')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--user', 'user', required=True, help='Id or email of the account the analyses belong to.')
+@with_appcontext
+def run_command(source, user):
+    """Analyze every PDF/TXT resume in a ZIP file or directory."""
+    owner = _find_user(user)
+    if owner is None:
+        raise click.ClickException(f'No user {user}.')
+    try:
+        run = create_bulk_run(owner.id, os.path.abspath(source))
+    except IngestionError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Bulk run {run.id}: {run.total} resume(s).")
+    run = run_bulk_analysis(run.id, progress=_echo_progress)
+    click.echo(f"Run {run.id} {run.status}." + (f" {run.error}" if run.error else ''))
+
+
+@bulk_analysis_cli.command('resume')
+@click.argument('run_id', type=int)
+@with_appcontext
+def resume_command(run_id):
+    """Continue an interrupted run, retrying its failed files."""
+    try:
+        run = run_bulk_analysis(run_id, progress=_echo_progress)
+    except IngestionError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Run {run.id} {run.status}." + (f" {run.error}" if run.error else ''))
+
+
+@bulk_analysis_cli.command('status')
+@click.argument('run_id', type=int)
+@with_appcontext
+def status_command(run_id):
+    """Print a run's progress and failed files."""
+    run = db.session.get(BulkAnalysisRun, run_id)
+    if run is None:
+        raise click.ClickException(f'Bulk run {run_id} does not exist.')
+    summary = bulk_run_summary(run, items=True)
+    for key, value in summary.items():
+        if key != 'failed_items':
+            click.echo(f"{key}: {value}")
+    for item in summary['failed_items']:
+        click.echo(f"  failed: {item['name']}: {item['error']}")
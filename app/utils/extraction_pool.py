@@ -0,0 +1,250 @@
+import os
+import math
+import time
+import atexit
+import threading
+import multiprocessing
+from typing import Dict, Optional, Tuple
+
+from app.utils.ai_resilience import deadline_remaining
+from app.utils.metrics import get_histogram
+from app.utils.pdf_extract import (IngestionError, ExtractionTimeout, ExtractionMemoryError,
+                                   extract_pdf, init_worker, run_task)
+
+
+class ExtractionPoolConfig:
+    def __init__(self):
+        # Parse PDFs in worker processes instead of the request thread
+        self.ENABLED = os.getenv("EXTRACTION_POOL", "true").lower() == "true"
+        self.WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", "2"))
+        # Wall-clock limit per extraction, including time spent queued
+        self.TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "20"))
+        # Address-space cap per worker; a PDF that needs more fails on its own (0 = no cap)
+        self.WORKER_MEMORY_MB = int(os.getenv("EXTRACTION_WORKER_MEMORY_MB", "1024"))
+        # Workers are replaced after this many tasks to return fragmented memory
+        self.MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACTION_MAX_TASKS_PER_CHILD", "50"))
+        # PDFs with more pages than this are split into page ranges across workers (0 = never)
+        self.PARALLEL_PAGES = int(os.getenv("EXTRACTION_PARALLEL_PAGES", "8"))
+
+
+pool_config = ExtractionPoolConfig()
+
+# Seconds past the timeout the parent waits for a worker to stop itself before killing the pool
+HARD_TIMEOUT_GRACE = 1.0
+# How often a waiting request checks whether its pool was restarted underneath it
+_POLL_INTERVAL = 0.25
+EXTRACTION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+def _fork_available() -> bool:
+    # Workers are forked: the spawn and forkserver start methods re-import
+    # __main__, which for `python run.py` would build a whole app per worker
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+class _Task:
+    def __init__(self, result, generation: int, deadline: float):
+        self.result = result
+        self.generation = generation
+        self.deadline = deadline
+
+
+class ExtractionPool:
+    """
+    Worker processes for PDF text extraction.
+
+    Parsing runs outside the request thread (and outside the GIL), with a
+    wall-clock limit per job, an address-space cap per worker and workers
+    recycled after MAX_TASKS_PER_CHILD jobs. A worker that overruns its limit
+    gets a chance to stop itself; if it doesn't (stuck in native code), the
+    whole pool is terminated and recreated on next use. Long PDFs are split
+    into page ranges extracted in parallel.
+    """
+
+    def __init__(self, config: ExtractionPoolConfig = None):
+        self.config = config or pool_config
+        self.workers = max(1, self.config.WORKERS)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._generation = 0
+        # Outstanding tasks per pool generation; a terminated pool's tasks are dropped with it
+        self._outstanding: Dict[int, int] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.memory_errors = 0
+        self.restarts = 0
+        self.split_documents = 0
+        self.peak_in_flight = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Created on first use, so only processes that serve uploads fork workers
+                context = multiprocessing.get_context('fork')
+                self._pool = context.Pool(processes=self.workers, initializer=init_worker,
+                                          initargs=(self.config.WORKER_MEMORY_MB,),
+                                          maxtasksperchild=self.config.MAX_TASKS_PER_CHILD or None)
+            return self._pool, self._generation
+
+    def _restart(self, generation: int):
+        """Terminate the pool of ``generation`` unless it was already replaced."""
+        with self._lock:
+            if self._pool is None or self._generation != generation:
+                return
+            pool, self._pool = self._pool, None
+            self._outstanding.pop(generation, None)
+            self._generation += 1
+            self.restarts += 1
+        print(f"[ERROR] Extraction worker did not stop after {self.config.TIMEOUT}s; restarting the extraction pool")
+        pool.terminate()
+
+    def _finished(self, generation: int):
+        with self._lock:
+            if generation in self._outstanding:
+                self._outstanding[generation] -= 1
+
+    def _submit(self, function_name: str, args: tuple, timeout: float) -> _Task:
+        pool, generation = self._get_pool()
+        submitted_at = time.time()
+
+        def on_result(value):
+            started = value[0]
+            get_histogram("extraction_queue_wait_seconds", buckets=EXTRACTION_BUCKETS).observe(max(0.0, started - submitted_at))
+            get_histogram("extraction_seconds", buckets=EXTRACTION_BUCKETS, task=function_name).observe(time.time() - started)
+            with self._lock:
+                self.completed += 1
+            self._finished(generation)
+
+        # Both callbacks run on the pool's result thread, concurrently with requests
+        def on_error(error):
+            with self._lock:
+                if isinstance(error, ExtractionTimeout):
+                    self.timeouts += 1
+                elif isinstance(error, ExtractionMemoryError):
+                    self.memory_errors += 1
+                else:
+                    self.failed += 1
+            self._finished(generation)
+
+        with self._lock:
+            self._outstanding[generation] = self._outstanding.get(generation, 0) + 1
+            in_flight = sum(self._outstanding.values())
+            self.peak_in_flight = max(self.peak_in_flight, in_flight)
+            self.submitted += 1
+        get_histogram("extraction_queue_depth", buckets=QUEUE_DEPTH_BUCKETS).observe(max(0, in_flight - self.workers))
+        result = pool.apply_async(run_task, (function_name, args, timeout),
+                                  callback=on_result, error_callback=on_error)
+        return _Task(result, generation, time.monotonic() + timeout + HARD_TIMEOUT_GRACE)
+
+    def _wait(self, task: _Task):
+        """The task's result; raises the worker's exception, or ExtractionTimeout past the deadline."""
+        while not task.result.ready():
+            remaining = task.deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.timeouts += 1
+                self._restart(task.generation)
+                raise ExtractionTimeout('The PDF took too long to process.')
+            if self._generation != task.generation:
+                raise IngestionError('The PDF could not be processed; please try again.')
+            task.result.wait(min(remaining, _POLL_INTERVAL))
+        return task.result.get()[2]
+
+    def extract(self, data: bytes, max_pages: int) -> Tuple[str, int, str]:
+        """(text, page count, extractor name) of an in-memory PDF, parsed in the pool."""
+        remaining = deadline_remaining()
+        timeout = self.config.TIMEOUT if remaining is None else max(0.1, min(self.config.TIMEOUT, remaining))
+        started = time.monotonic()
+        text, pages, extractor = self._wait(self._submit('extract_pdf', (data, max_pages, self.config.PARALLEL_PAGES), timeout))
+        if text is not None:
+            return text, pages, extractor
+
+        # Long document: one page range per worker, sharing what is left of the time limit
+        with self._lock:
+            self.split_documents += 1
+        timeout = max(0.1, timeout - (time.monotonic() - started))
+        chunk = math.ceil(pages / self.workers)
+        tasks = [self._submit('extract_pdf_range', (data, start, min(start + chunk, pages)), timeout)
+                 for start in range(0, pages, chunk)]
+        return "\n".join(self._wait(task) for task in tasks), pages, extractor
+
+    def _forget_inherited_pool(self):
+        """
+        In a forked child (e.g. a gunicorn worker forked from a --preload
+        master): drop the parent's pool without touching it.
+
+        Its workers and handler threads belong to the parent, so the child
+        builds its own pool on first use. The pool's exit finalizer is
+        cancelled and its workers are forgotten as children, or this
+        process would terminate (and wait for) the parent's workers on exit.
+        """
+        self._lock = threading.Lock()
+        pool, self._pool = self._pool, None
+        self._outstanding = {}
+        if pool is not None:
+            pool._terminate.cancel()
+            for worker in pool._pool:
+                multiprocessing.process._children.discard(worker)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            in_flight = sum(self._outstanding.values())
+            return {"enabled": True, "running": self._pool is not None, "workers": self.workers,
+                    "in_flight": in_flight, "queued": max(0, in_flight - self.workers),
+                    "peak_in_flight": self.peak_in_flight, "submitted": self.submitted,
+                    "completed": self.completed, "failed": self.failed, "timeouts": self.timeouts,
+                    "memory_errors": self.memory_errors, "restarts": self.restarts,
+                    "split_documents": self.split_documents,
+                    "timeout_seconds": self.config.TIMEOUT, "worker_memory_mb": self.config.WORKER_MEMORY_MB,
+                    "max_tasks_per_child": self.config.MAX_TASKS_PER_CHILD}
+
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> Optional[ExtractionPool]:
+    """Return the process-wide extraction pool, or None when PDFs are parsed inline."""
+    global _extraction_pool
+    if not pool_config.ENABLED or not _fork_available():
+        return None
+    if _extraction_pool is None:
+        with _extraction_pool_lock:
+            if _extraction_pool is None:
+                _extraction_pool = ExtractionPool()
+                atexit.register(_extraction_pool.close)
+    return _extraction_pool
+
+
+def _after_fork_in_child():
+    global _extraction_pool_lock
+    _extraction_pool_lock = threading.Lock()
+    if _extraction_pool is not None:
+        _extraction_pool._forget_inherited_pool()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def extract_pdf_pooled(data: bytes, max_pages: int) -> Tuple[str, int, str]:
+    """Extract a PDF in the pool when it is enabled, inline otherwise."""
+    pool = get_extraction_pool()
+    if pool is None:
+        return extract_pdf(data, max_pages)
+    return pool.extract(data, max_pages)
+
+
+def extraction_pool_stats() -> Dict[str, object]:
+    """Pool counters for the metrics endpoint."""
+    pool = get_extraction_pool()
+    return pool.stats() if pool is not None else {"enabled": False}
@@ -1,17 +1,48 @@
 import os
+import json
 from datetime import datetime
+from functools import wraps
 import re
 
+from flask import abort
+from flask_login import current_user
+
+from app.extensions import login_manager
+
 def get_openrouter_api_key():
     """Get the OpenRouter API key from environment variables."""
     return os.getenv('OPENROUTER_API_KEY')
 
+def get_staff_emails():
+    """Emails of career-services staff accounts (STAFF_EMAILS, comma-separated)."""
+    return {email.strip().lower() for email in os.getenv('STAFF_EMAILS', '').split(',') if email.strip()}
+
+def is_staff(user):
+    """True if ``user`` is a logged-in staff account."""
+    return bool(getattr(user, 'is_authenticated', False) and user.email
+                and user.email.lower() in get_staff_emails())
+
+def staff_required(view):
+    """Route decorator for staff-only pages: login as usual, then 403 for everyone else."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not is_staff(current_user):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapped
+
 def format_date(date_obj):
     """Format a date object to a readable string."""
     if date_obj:
         return date_obj.strftime('%B %d, %Y')
     return ''
 
+def format_sse(event, data):
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 def get_file_extension(filename):
     """Get the file extension from a filename."""
     if filename:
@@ -0,0 +1,227 @@
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import Request, has_app_context
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app.extensions import db
+from app.models import ExtractedDocument
+from app.utils.extraction_pool import extract_pdf_pooled, extraction_pool_stats
+from app.utils.pdf_extract import IngestionError
+
+
+class IngestionConfig:
+    def __init__(self):
+        # Largest resume upload accepted, in bytes
+        self.MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+        # PDFs with more pages than this are rejected rather than parsed
+        self.MAX_PAGES = int(os.getenv("UPLOAD_MAX_PAGES", "20"))
+        # Extracted documents kept in memory, keyed by the SHA-256 of the file
+        self.CACHE_ENTRIES = int(os.getenv("EXTRACTION_CACHE_ENTRIES", "256"))
+
+
+ingestion_config = IngestionConfig()
+
+ALLOWED_EXTENSIONS = ('pdf', 'txt')
+
+
+class UploadRequest(Request):
+    """
+    Request that keeps uploads of acceptable size in memory.
+
+    Werkzeug spools file uploads over 500KB to a temporary file; resumes are
+    read once and discarded, so that disk round-trip is pure overhead.
+    Requests larger than the upload limit still use the default behaviour
+    (they are rejected by the ingestion limits anyway).
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= ingestion_config.MAX_BYTES + 64 * 1024:
+            return io.BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def read_upload(file, max_bytes: int = None) -> bytes:
+    """The upload's bytes; raises IngestionError when it exceeds ``max_bytes``."""
+    max_bytes = max_bytes or ingestion_config.MAX_BYTES
+    data = file.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise IngestionError(f'The file is too large (maximum {max_bytes // (1024 * 1024) or 1} MB).')
+    return data
+
+
+def extract_pdf_text(data: bytes, max_pages: int = None) -> str:
+    """Text of an in-memory PDF; raises IngestionError for PDFs over ``max_pages`` or unreadable ones."""
+    return _extract_pdf(data, max_pages)[0]
+
+
+def _extract_pdf(data: bytes, max_pages: int = None) -> Tuple[str, int, str]:
+    """(text, page count, extractor name) of an in-memory PDF, parsed in the extraction pool when enabled."""
+    return extract_pdf_pooled(data, max_pages or ingestion_config.MAX_PAGES)
+
+
+def _extension(filename: str) -> str:
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if ext not in ALLOWED_EXTENSIONS:
+        raise IngestionError('Unsupported file type.')
+    return ext
+
+
+def extract_document(filename: str, data: bytes) -> Dict[str, object]:
+    """{'text', 'page_count', 'extractor'} for an uploaded resume given its name and contents."""
+    if _extension(filename) == 'pdf':
+        text, page_count, extractor = _extract_pdf(data)
+        return {'text': text, 'page_count': page_count, 'extractor': extractor}
+    return {'text': data.decode('utf-8', errors='ignore'), 'page_count': None, 'extractor': 'text'}
+
+
+def extract_text_from_bytes(filename: str, data: bytes) -> str:
+    """Text of an uploaded resume given its name and contents."""
+    return extract_document(filename, data)['text']
+
+
+class ExtractionCache:
+    """
+    Extracted documents by SHA-256 of the file bytes.
+
+    An in-memory LRU sits in front of the extracted_document table, so a
+    resume uploaded to the analyzer and then to the job matcher is parsed
+    once, even across processes and restarts.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or ingestion_config.CACHE_ENTRIES
+        self._entries: 'OrderedDict[str, Dict[str, object]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get_or_extract(self, filename: str, data: bytes) -> Dict[str, object]:
+        """
+        The document for ``data``: {'sha256', 'text', 'page_count', 'extractor',
+        'document_id'}. Raises IngestionError like extract_document.
+        """
+        ext = _extension(filename)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        if entry is None:
+            entry = self._load(digest)
+            if entry is not None:
+                self.db_hits += 1
+        else:
+            self.hits += 1
+
+        if entry is not None and (entry['extractor'] == 'text') != (ext == 'txt'):
+            # The same bytes under a different extension: extract them as asked, don't cache
+            return dict(extract_document(filename, data), sha256=digest, document_id=None)
+        if entry is None:
+            self.misses += 1
+            entry = dict(extract_document(filename, data), sha256=digest)
+            entry['document_id'] = self._store(digest, len(data), entry)
+        elif entry['page_count'] and entry['page_count'] > ingestion_config.MAX_PAGES:
+            raise IngestionError(f"The PDF has {entry['page_count']} pages; at most {ingestion_config.MAX_PAGES} are supported.")
+
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(entry)
+
+    @staticmethod
+    def _as_entry(document: ExtractedDocument) -> Dict[str, object]:
+        return {'sha256': document.sha256, 'text': document.text, 'page_count': document.page_count,
+                'extractor': document.extractor, 'document_id': document.id}
+
+    def _load(self, digest: str) -> Optional[Dict[str, object]]:
+        if not has_app_context():
+            return None
+        try:
+            document = ExtractedDocument.query.filter_by(sha256=digest).first()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Could not read the extraction cache: {e}")
+            return None
+        return self._as_entry(document) if document is not None else None
+
+    def _store(self, digest: str, size: int, entry: Dict[str, object]) -> Optional[int]:
+        """Persist a new extraction; returns its row id, or None if it couldn't be stored."""
+        if not has_app_context():
+            return None
+        document = ExtractedDocument(sha256=digest, size_bytes=size, page_count=entry['page_count'],
+                                     extractor=entry['extractor'], text=entry['text'])
+        try:
+            db.session.add(document)
+            db.session.commit()
+            return document.id
+        except IntegrityError:
+            # Another request stored the same file first
+            db.session.rollback()
+            existing = ExtractedDocument.query.filter_by(sha256=digest).first()
+            return existing.id if existing is not None else None
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Could not store extracted text: {e}")
+            return None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries = len(self._entries)
+        return {'entries': entries, 'max_entries': self.max_entries, 'hits': self.hits,
+                'db_hits': self.db_hits, 'misses': self.misses}
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Return the process-wide extraction cache, creating it on first use."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = ExtractionCache()
+    return _extraction_cache
+
+
+def extract_upload(file) -> Tuple[str, Optional[Dict[str, object]], Optional[str]]:
+    """
+    Extract an uploaded PDF or TXT resume without touching the disk, reusing
+    earlier extractions of the same file.
+
+    Returns:
+        Tuple of (secure filename, document dict or None, error message)
+    """
+    filename = secure_filename(file.filename or '')
+    try:
+        return filename, get_extraction_cache().get_or_extract(filename, read_upload(file)), None
+    except IngestionError as e:
+        return filename, None, str(e)
+    except Exception as e:
+        return filename, None, f'Error extracting text: {e}'
+
+
+def extract_upload_text(file) -> Tuple[str, str, Optional[str]]:
+    """
+    Extract text from an uploaded PDF or TXT resume.
+
+    Returns:
+        Tuple of (secure filename, extracted text, error message)
+    """
+    filename, document, error = extract_upload(file)
+    return filename, document['text'] if document else '', error
+
+
+def ingestion_stats() -> Dict[str, object]:
+    """Extraction cache and worker pool counters for the metrics endpoint."""
+    return dict(get_extraction_cache().stats(), pool=extraction_pool_stats())
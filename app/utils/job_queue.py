@@ -0,0 +1,248 @@
+import os
+import json
+import signal
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models import AIJob
+from app.utils.ai_resilience import deadline_scope
+from app.utils.ai_telemetry import telemetry_route
+
+
+class JobQueueConfig:
+    def __init__(self):
+        # Routes enqueue AI work instead of running it inline when enabled
+        self.ENABLED = os.getenv("AI_JOBS_ENABLED", "false").lower() == "true"
+
+        # Worker threads per worker process
+        self.CONCURRENCY = int(os.getenv("AI_JOBS_CONCURRENCY", "4"))
+        # Worker threads started inside the web process (0 = run worker.py separately)
+        self.EMBEDDED_WORKERS = int(os.getenv("AI_JOBS_EMBEDDED_WORKERS", "0"))
+
+        # A claimed job that isn't finished within this many seconds is handed to another worker
+        self.VISIBILITY_TIMEOUT = float(os.getenv("AI_JOBS_VISIBILITY_TIMEOUT", "300"))
+        self.MAX_ATTEMPTS = int(os.getenv("AI_JOBS_MAX_ATTEMPTS", "3"))
+        # Retry n waits RETRY_BACKOFF * 2**(n-1) seconds
+        self.RETRY_BACKOFF = float(os.getenv("AI_JOBS_RETRY_BACKOFF", "5"))
+        self.POLL_INTERVAL = float(os.getenv("AI_JOBS_POLL_INTERVAL", "1"))
+
+        # Queued + running jobs a single user may have at once
+        self.MAX_PENDING_PER_USER = int(os.getenv("AI_JOBS_MAX_PENDING_PER_USER", "5"))
+
+
+job_config = JobQueueConfig()
+
+# kind -> handler(user_id, payload) returning a JSON-serialisable result
+TASKS: Dict[str, Callable[[int, dict], dict]] = {}
+# Kinds of background upkeep that don't count towards MAX_PENDING_PER_USER
+UNMETERED_KINDS: Set[str] = set()
+
+
+class QueueFullError(Exception):
+    """The user already has as many pending jobs as they are allowed."""
+
+
+class PermanentJobError(Exception):
+    """Raised by a task for failures that retrying cannot fix."""
+
+
+def task(kind: str, per_user_limit: bool = True):
+    """
+    Register the decorated function as the handler for jobs of ``kind``.
+
+    ``per_user_limit=False`` is for upkeep a request triggers but the user
+    didn't ask for (e.g. question bank refills): such jobs neither count
+    towards nor are refused by the user's pending-job limit.
+    """
+    def decorator(fn):
+        TASKS[kind] = fn
+        if not per_user_limit:
+            UNMETERED_KINDS.add(kind)
+        return fn
+    return decorator
+
+
+def enqueue(kind: str, payload: dict, user_id: int, max_attempts: int = None) -> AIJob:
+    """Queue a job and return it; raises QueueFullError when the user is at their limit."""
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if kind not in UNMETERED_KINDS:
+        pending = AIJob.query.filter(
+            AIJob.user_id == user_id,
+            AIJob.status.in_(('queued', 'running')),
+            AIJob.kind.notin_(UNMETERED_KINDS)
+        ).count()
+        if pending >= job_config.MAX_PENDING_PER_USER:
+            raise QueueFullError(
+                f"You already have {pending} requests in progress. Please wait for them to finish."
+            )
+    job = AIJob(
+        user_id=user_id,
+        kind=kind,
+        payload_json=json.dumps(payload),
+        max_attempts=max_attempts or job_config.MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(AIJob.status == 'queued', AIJob.run_after <= now),
+        # A running job whose lease expired: its worker died or hung
+        and_(AIJob.status == 'running', AIJob.locked_until < now)
+    )
+
+
+def claim_next(worker_id: str, kinds: List[str] = None) -> Optional[AIJob]:
+    """
+    Lease the next runnable job to ``worker_id``.
+
+    Claiming is a conditional UPDATE, so when several workers race for the
+    same row exactly one of them wins; the others move on to the next
+    candidate. Works the same on SQLite and Postgres.
+    """
+    now = datetime.utcnow()
+    query = db.session.query(AIJob.id).filter(_claimable(now))
+    if kinds:
+        query = query.filter(AIJob.kind.in_(kinds))
+    candidates = [job_id for (job_id,) in query.order_by(AIJob.run_after, AIJob.id).limit(10).all()]
+
+    for job_id in candidates:
+        claimed = AIJob.query.filter(AIJob.id == job_id, _claimable(now)).update({
+            'status': 'running',
+            'locked_by': worker_id,
+            'locked_until': now + timedelta(seconds=job_config.VISIBILITY_TIMEOUT),
+            'attempts': AIJob.attempts + 1,
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+        job = db.session.get(AIJob, job_id)
+        if job.attempts > job.max_attempts:
+            # Lease expired on the last attempt: give up instead of running it again
+            _finish(job, worker_id, error=job.error or 'The job timed out.', retry=False)
+            continue
+        return job
+    return None
+
+
+def _finish(job: AIJob, worker_id: str, result: dict = None, error: str = None, retry: bool = True) -> bool:
+    now = datetime.utcnow()
+    values = {'locked_by': None, 'locked_until': None, 'updated_at': now}
+    if error is None:
+        values.update(status='succeeded', result_json=json.dumps(result), error=None, finished_at=now)
+    elif retry and job.attempts < job.max_attempts:
+        delay = job_config.RETRY_BACKOFF * (2 ** (job.attempts - 1))
+        values.update(status='queued', error=error, run_after=now + timedelta(seconds=delay))
+    else:
+        values.update(status='failed', error=error, finished_at=now)
+    # Only the current lease holder may finish the job; a worker whose lease
+    # expired and was taken over must not overwrite the new attempt
+    updated = AIJob.query.filter(
+        AIJob.id == job.id,
+        AIJob.locked_by == worker_id
+    ).update(values, synchronize_session=False)
+    db.session.commit()
+    return updated == 1
+
+
+def run_job(job: AIJob, worker_id: str):
+    """Run a claimed job and record its outcome."""
+    handler = TASKS.get(job.kind)
+    if handler is None:
+        _finish(job, worker_id, error=f"Unknown job kind: {job.kind}", retry=False)
+        return
+
+    try:
+        payload = json.loads(job.payload_json or '{}')
+        # AI calls inside the task give up before the lease runs out
+        with deadline_scope(job_config.VISIBILITY_TIMEOUT * 0.9), telemetry_route(f"job:{job.kind}"):
+            result = handler(job.user_id, payload)
+    except PermanentJobError as e:
+        db.session.rollback()
+        _finish(job, worker_id, error=str(e), retry=False)
+    except Exception as e:
+        db.session.rollback()
+        print(f"[ERROR] Job {job.id} ({job.kind}) attempt {job.attempts} failed: {e}")
+        traceback.print_exc()
+        _finish(job, worker_id, error=str(e))
+    else:
+        if not _finish(job, worker_id, result=result):
+            print(f"[INFO] Job {job.id} finished after its lease was taken over; result discarded")
+
+
+class Worker:
+    """
+    Pool of threads that claim and run queued AI jobs.
+
+    Each thread works inside its own app context, so it has its own
+    database session. ``concurrency`` caps how many jobs this process runs
+    at once; run more worker processes to scale out.
+    """
+
+    def __init__(self, app, concurrency: int = None, poll_interval: float = None, kinds: List[str] = None):
+        self.app = app
+        self.concurrency = concurrency or job_config.CONCURRENCY
+        self.poll_interval = poll_interval or job_config.POLL_INTERVAL
+        self.kinds = kinds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for n in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(f"{self.worker_id}-{n}",),
+                                      name=f"ai-job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self, worker_id: str):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    job = claim_next(worker_id, self.kinds)
+                    if job is None:
+                        self._stop.wait(self.poll_interval)
+                        continue
+                    run_job(job, worker_id)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[ERROR] Job worker {worker_id}: {e}")
+                    self._stop.wait(self.poll_interval)
+                finally:
+                    db.session.remove()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        """Run until SIGINT/SIGTERM, letting running jobs finish first."""
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        self.start()
+        print(f"[INFO] Job worker {self.worker_id} started with {self.concurrency} threads")
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        print("[INFO] Job worker stopping; waiting for running jobs")
+        self.stop()
+
+
+def job_queue_stats() -> Dict[str, int]:
+    """Number of jobs in each status."""
+    rows = db.session.query(AIJob.status, db.func.count(AIJob.id)).group_by(AIJob.status).all()
+    return {status: count for status, count in rows}
@@ -0,0 +1,252 @@
+import html
+import json
+import re
+from typing import Iterator, List, Optional, Tuple, Type
+
+# Opening bracket -> closing bracket
+_CLOSERS = {'{': '}', '[': ']'}
+_PY_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_SMART_QUOTES = {'“': '"', '”': '"', '‘': "'", '’': "'"}
+_DANGLING_KEY_RE = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+_TRAILING_COMMA_RE = re.compile(r',\s*$')
+# Structural characters; a backslash and the character it escapes are one token
+_TOKEN_RE = re.compile(r'\\.|["\'{}\[\]]', re.DOTALL)
+# Unbalanced values whose nested values are scanned again, see iter_json_spans
+_MAX_RESCANS = 3
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+
+
+class JSONExtractionError(ValueError):
+    """No usable JSON value of the expected type was found in the text."""
+
+
+def iter_json_spans(text: str, openers: str = '{[') -> Iterator[Tuple[int, int, bool]]:
+    """
+    Yield (start, end, balanced) for each top-level bracketed value in ``text``.
+
+    String literals (double or single quoted) and backslash escapes are
+    tracked, so brackets inside strings don't count; only structural
+    characters are visited, found with one compiled regex. After a value
+    closes, scanning resumes after it, which keeps the scan linear. A value
+    still open at the end of the text (an answer cut off by max_tokens, or
+    a stray "{" in prose) is yielded with balanced=False; scanning then
+    restarts at the first complete value nested in it, a bounded number
+    of times.
+    """
+    n = len(text)
+    i = 0
+    rescans = 0
+    while i < n:
+        start = min((p for p in (text.find(o, i) for o in openers) if p != -1), default=-1)
+        if start == -1:
+            return
+
+        depth = 0
+        quote = None
+        first_child = None
+        child_start = None
+        end = None
+        for token in _TOKEN_RE.finditer(text, start):
+            c = token.group()
+            if quote:
+                if c == quote:
+                    quote = None
+            elif c == '"' or (c == "'" and _opens_single_quoted(text, token.start())):
+                quote = c
+            elif c in '{[':
+                depth += 1
+                if depth == 2 and first_child is None:
+                    child_start = token.start()
+            elif c in '}]':
+                depth -= 1
+                if depth == 0:
+                    end = token.end()
+                    break
+                if depth == 1 and child_start is not None and first_child is None:
+                    first_child = child_start
+
+        if end is not None:
+            yield start, end, True
+            i = end
+            continue
+        yield start, n, False
+        if first_child is None or rescans >= _MAX_RESCANS:
+            return
+        rescans += 1
+        i = first_child
+
+
+def _opens_single_quoted(text: str, index: int) -> bool:
+    """A ' starts a string only where a JSON value or key could start (not in "don't")."""
+    k = index - 1
+    while k >= 0 and text[k] in ' \t\r\n':
+        k -= 1
+    return k >= 0 and text[k] in '{[,:'
+
+
+def repair_json(candidate: str, balanced: bool = True) -> str:
+    """
+    Fix common LLM JSON defects in one string-aware pass.
+
+    Outside strings: smart quotes become plain quotes, single-quoted
+    strings become double-quoted, Python literals become JSON ones,
+    // and /* */ comments and trailing commas are dropped. Inside strings:
+    raw control characters are escaped and invalid escapes such as \\'
+    are unescaped. An unbalanced value (cut off mid-answer) is closed.
+    Text inside strings is never rewritten otherwise.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    quote = None
+    i = 0
+    n = len(candidate)
+    while i < n:
+        c = candidate[i]
+        if quote:
+            if c == '\\' and i + 1 < n:
+                nxt = candidate[i + 1]
+                if nxt in '"\\/bfnrtu':
+                    out.append(c + nxt)
+                elif nxt == "'":
+                    out.append("'")
+                else:
+                    out.append('\\\\' + nxt)
+                i += 2
+                continue
+            if c == quote or (quote == '"' and c == '”'):
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')  # a double quote inside a single-quoted string
+            elif c in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[c])
+            elif ord(c) < 32:
+                out.append(f'\\u{ord(c):04x}')
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        c = _SMART_QUOTES.get(c, c)
+        if c == '"' or (c == "'" and _opens_single_quoted(candidate, i)):
+            quote = c
+            out.append('"')
+        elif c in '{[':
+            stack.append(_CLOSERS[c])
+            out.append(c)
+        elif c in '}]':
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(c)
+        elif c == '/' and candidate.startswith('//', i):
+            end = candidate.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        elif c == '/' and candidate.startswith('/*', i):
+            end = candidate.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif c.isalpha():
+            j = i
+            while j < n and candidate[j].isalpha():
+                j += 1
+            word = candidate[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    repaired = ''.join(out)
+    if not balanced or quote or stack:
+        if quote:
+            repaired += '"'
+        if stack and stack[-1] == '}':
+            # A dangling key ("key" or "key":) has no value to complete; cut it off
+            repaired = _DANGLING_KEY_RE.sub(r'\1', repaired)
+        repaired = _TRAILING_COMMA_RE.sub('', repaired) + ''.join(reversed(stack))
+    return repaired
+
+
+def _drop_trailing_comma(out: List[str]):
+    k = len(out) - 1
+    while k >= 0 and out[k].isspace():
+        k -= 1
+    if k >= 0 and out[k] == ',':
+        del out[k:]
+
+
+def _loads(candidate: str):
+    # strict=False accepts raw newlines/tabs inside strings, the most common defect
+    return json.loads(candidate, strict=False)
+
+
+def _parse_candidate(candidate: str, balanced: bool):
+    attempts = [candidate] if balanced else []
+    attempts.append(repair_json(candidate, balanced))
+    # Output that was JSON-encoded twice ({\"verdict\": ...}): undo one level and retry
+    if '\\"' in candidate and candidate.count('\\"') * 2 > candidate.count('"'):
+        unescaped = candidate.replace('\\\\', '\x00').replace('\\"', '"').replace('\x00', '\\')
+        attempts.append(repair_json(unescaped, balanced))
+    last_error = None
+    for attempt in attempts:
+        try:
+            return _loads(attempt)
+        except ValueError as e:
+            last_error = e
+    raise last_error
+
+
+def _unescape_entities(value):
+    if isinstance(value, str):
+        return html.unescape(value) if '&' in value else value
+    if isinstance(value, list):
+        return [_unescape_entities(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _unescape_entities(v) for k, v in value.items()}
+    return value
+
+
+def extract_json(text: str,
+                 expect: Optional[Type] = None,
+                 unescape_entities: bool = False):
+    """
+    Return the first JSON value in LLM output that parses.
+
+    Prose, markdown fences and other text around the value are ignored.
+    Each top-level bracketed value is tried as-is and then repaired (see
+    ``repair_json``); the scan and the repairs are linear in the length of
+    the text.
+
+    Args:
+        text: Raw model output
+        expect: dict or list to only accept values of that type
+        unescape_entities: Decode HTML entities (&quot;, &amp;, ...) in the
+            parsed strings; done after parsing so it can't break the JSON
+
+    Raises:
+        JSONExtractionError: when no value of the expected type parses
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+    openers = {dict: '{', list: '['}.get(expect, '{[')
+    # Entity-encoded delimiters (&quot;key&quot;: ...) are only decoded when there are no real quotes
+    if '&quot;' in text and '"' not in text:
+        text = html.unescape(text)
+
+    last_error = None
+    for start, end, balanced in iter_json_spans(text, openers):
+        try:
+            value = _parse_candidate(text[start:end], balanced)
+        except ValueError as e:
+            last_error = e
+            continue
+        if expect is not None and not isinstance(value, expect):
+            continue
+        return _unescape_entities(value) if unescape_entities else value
+
+    wanted = {dict: 'object', list: 'array'}.get(expect, 'value')
+    detail = f": {last_error}" if last_error else ""
+    raise JSONExtractionError(f"No JSON {wanted} found in the response{detail}")
@@ -0,0 +1,94 @@
+import bisect
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) suited to AI call latencies, from fast cache hits to slow completions
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+
+class Histogram:
+    """
+    Thread-safe latency histogram.
+
+    Keeps cumulative bucket counts for export plus a bounded window of the
+    most recent samples for percentile estimates.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, window: int = 1024):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._recent.append(value)
+            self.count += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) over the recent sample window."""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self.count, self.sum
+            low, high = self.min, self.max
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else None,
+            "min": low,
+            "max": high,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": cumulative,
+        }
+
+
+_histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def get_histogram(name: str, buckets: Sequence[float] = None, **labels) -> Histogram:
+    """Return the histogram registered under ``name`` and ``labels``, creating it on first use."""
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(buckets or DEFAULT_LATENCY_BUCKETS)
+                _histograms[key] = histogram
+    return histogram
+
+
+def histogram_snapshots(prefix: str = "") -> List[Dict[str, object]]:
+    """Snapshots of every registered histogram whose name starts with ``prefix``."""
+    with _registry_lock:
+        items = list(_histograms.items())
+    return [
+        {"name": name, "labels": dict(labels), **histogram.snapshot()}
+        for (name, labels), histogram in sorted(items, key=lambda item: item[0])
+        if name.startswith(prefix)
+    ]
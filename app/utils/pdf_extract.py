@@ -0,0 +1,135 @@
+"""
+PDF text extraction, shared by inline extraction and the extraction pool.
+
+Everything here runs inside pool worker processes too, so it must not
+touch the database or the Flask app.
+"""
+import io
+import os
+import time
+import signal
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # not available on Windows
+    HAS_RESOURCE = False
+
+
+class IngestionError(ValueError):
+    """An upload that can't be turned into text; the message is shown to the user."""
+
+
+class ExtractionTimeout(IngestionError):
+    """Extraction ran past its time limit."""
+
+
+class ExtractionMemoryError(IngestionError):
+    """Extraction ran out of the worker's memory allowance."""
+
+
+def extract_pdf(data: bytes, max_pages: int, split_above: int = None) -> Tuple[Optional[str], int, str]:
+    """
+    (text, page count, extractor name) of an in-memory PDF.
+
+    Raises IngestionError for PDFs over ``max_pages`` or unreadable ones.
+    With ``split_above``, a PDF with more pages than that is only counted:
+    the text comes back as None so the caller can extract page ranges in
+    parallel with extract_pdf_range.
+    """
+    if HAS_PYMUPDF:
+        try:
+            doc = fitz.open(stream=data, filetype='pdf')
+        except Exception as e:
+            raise IngestionError(f'Could not read the PDF: {e}')
+        try:
+            if doc.needs_pass:
+                raise IngestionError('The PDF is password protected.')
+            if doc.page_count > max_pages:
+                raise IngestionError(f'The PDF has {doc.page_count} pages; at most {max_pages} are supported.')
+            if split_above and doc.page_count > split_above:
+                return None, doc.page_count, 'pymupdf'
+            return "\n".join(page.get_text() for page in doc), doc.page_count, 'pymupdf'
+        finally:
+            doc.close()
+
+    from pdfminer.high_level import extract_text
+    from pdfminer.pdfpage import PDFPage
+    # Count one page past the limit instead of parsing the whole document
+    pages = sum(1 for _ in PDFPage.get_pages(io.BytesIO(data), maxpages=max_pages + 1))
+    if pages > max_pages:
+        raise IngestionError(f'The PDF has more than {max_pages} pages; at most {max_pages} are supported.')
+    if split_above and pages > split_above:
+        return None, pages, 'pdfminer'
+    return extract_text(io.BytesIO(data), maxpages=max_pages), pages, 'pdfminer'
+
+
+def extract_pdf_range(data: bytes, start: int, stop: int) -> str:
+    """Text of pages [start, stop) of an in-memory PDF."""
+    if HAS_PYMUPDF:
+        doc = fitz.open(stream=data, filetype='pdf')
+        try:
+            return "\n".join(doc[number].get_text() for number in range(start, min(stop, doc.page_count)))
+        finally:
+            doc.close()
+    from pdfminer.high_level import extract_text
+    return extract_text(io.BytesIO(data), page_numbers=list(range(start, stop)))
+
+
+# ---------------------------------------------------------------------------
+# Worker process side of app.utils.extraction_pool
+# ---------------------------------------------------------------------------
+
+def init_worker(memory_limit_mb: int):
+    """Pool initializer: cap the worker's address space so a runaway PDF fails alone."""
+    # Workers leave Ctrl-C to the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if HAS_RESOURCE and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            print(f"[ERROR] Could not cap extraction worker memory at {memory_limit_mb} MB: {e}")
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout('The PDF took too long to process.')
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """Interrupt the block after ``seconds`` (between Python bytecodes, so per page for PyMuPDF)."""
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_task(function_name: str, args: tuple, time_limit: float) -> Tuple[float, int, object]:
+    """
+    Run one extraction function in a worker; returns (start time, pid, result).
+
+    The start time lets the parent measure how long the task waited in the
+    queue. Memory errors from the address-space cap become IngestionError.
+    """
+    started = time.time()
+    function = {'extract_pdf': extract_pdf, 'extract_pdf_range': extract_pdf_range}[function_name]
+    try:
+        with _time_limit(time_limit):
+            return started, os.getpid(), function(*args)
+    except MemoryError:
+        raise ExtractionMemoryError('The PDF needs too much memory to process.')
@@ -0,0 +1,324 @@
+import os
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import QuestionBucket, BankQuestion, ServedBankQuestion
+from app.utils.ai_telemetry import telemetry_route
+from app.utils.ai_utils import generate_interview_questions, pick_question_count
+from app.utils.job_queue import job_config, enqueue
+from app.utils.role_matcher import get_role_matcher
+
+
+class QuestionBankConfig:
+    def __init__(self):
+        # Serve simulator questions from the bank when a user has enough unseen ones
+        self.ENABLED = os.getenv("AI_QUESTION_BANK", "true").lower() == "true"
+        # Role/skill terms that make up a fingerprint
+        self.TERMS = int(os.getenv("AI_QUESTION_BANK_TERMS", "6"))
+        # Questions generated per refill call
+        self.BATCH = int(os.getenv("AI_QUESTION_BANK_BATCH", "10"))
+        # Refill a bucket when it holds fewer questions than this...
+        self.TARGET = int(os.getenv("AI_QUESTION_BANK_TARGET", "30"))
+        # ...or when the requesting user has fewer unseen questions than this left
+        self.LOW_WATER = int(os.getenv("AI_QUESTION_BANK_LOW_WATER", "5"))
+        # Never keep more than this many questions per bucket
+        self.MAX_PER_BUCKET = int(os.getenv("AI_QUESTION_BANK_MAX_PER_BUCKET", "200"))
+        # Minimum seconds between refills of the same bucket
+        self.REFILL_COOLDOWN = float(os.getenv("AI_QUESTION_BANK_REFILL_COOLDOWN", "60"))
+        # Refill threads in the web process, used when the job queue is off
+        self.REFILL_THREADS = int(os.getenv("AI_QUESTION_BANK_REFILL_THREADS", "1"))
+
+
+bank_config = QuestionBankConfig()
+
+def question_fingerprint(text: str, terms: int = None) -> Tuple[str, str]:
+    """
+    Normalize a simulator prompt to its role/skill terms and hash them.
+
+    Terms come from the role matcher's taxonomy (role titles, skills and
+    their aliases), most frequent first with ties broken alphabetically, so
+    "Flask, Python" and "python / flask" share a bucket. Nothing
+    outside that fixed vocabulary - names, employers, other words of a
+    resume - can end up in a bucket. Returns (fingerprint, terms); terms is
+    empty when the prompt mentions no known role or skill.
+    """
+    counts = get_role_matcher().taxonomy_terms(text or '')
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:terms or bank_config.TERMS]
+    normalized = ', '.join(sorted(term for term, _ in top))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32], normalized
+
+
+def _question_hash(question: str) -> str:
+    normalized = re.sub(r'[^a-z0-9]+', ' ', question.lower()).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _get_or_create_bucket(fingerprint: str, terms: str) -> QuestionBucket:
+    bucket = QuestionBucket.query.filter_by(fingerprint=fingerprint).first()
+    if bucket is not None:
+        return bucket
+    try:
+        bucket = QuestionBucket(fingerprint=fingerprint, terms=terms)
+        db.session.add(bucket)
+        db.session.commit()
+        return bucket
+    except IntegrityError:
+        # Another request created it first
+        db.session.rollback()
+        return QuestionBucket.query.filter_by(fingerprint=fingerprint).one()
+
+
+def _unseen(user_id: int, bucket_id: int):
+    served = db.session.query(ServedBankQuestion.question_id).filter(ServedBankQuestion.user_id == user_id)
+    return BankQuestion.query.filter(BankQuestion.bucket_id == bucket_id, ~BankQuestion.id.in_(served))
+
+
+def serve_from_bank(user_id: int, prompt: str, num_questions: int) -> Optional[List[str]]:
+    """
+    ``num_questions`` questions for ``prompt`` that ``user_id`` hasn't seen, or None.
+
+    Every call counts towards the bucket's popularity and may schedule a
+    background refill; None means the caller should generate questions
+    with the AI as before. A prompt without known role/skill terms is
+    neither bucketed nor refilled, since the bank could never serve it.
+    """
+    if not bank_config.ENABLED or not prompt or not prompt.strip():
+        return None
+    fingerprint, terms = question_fingerprint(prompt)
+    if not terms:
+        return None
+    bucket = _get_or_create_bucket(fingerprint, terms)
+    QuestionBucket.query.filter_by(id=bucket.id).update({
+        'requests': QuestionBucket.requests + 1,
+        'last_requested_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+
+    # Least served first, so a bucket's questions are used evenly across users
+    picked = _unseen(user_id, bucket.id).order_by(BankQuestion.times_served, func.random()).limit(num_questions).all()
+    questions = None
+    if len(picked) == num_questions:
+        try:
+            for question in picked:
+                db.session.add(ServedBankQuestion(user_id=user_id, question_id=question.id))
+            BankQuestion.query.filter(BankQuestion.id.in_([q.id for q in picked])).update({
+                'times_served': BankQuestion.times_served + 1
+            }, synchronize_session=False)
+            QuestionBucket.query.filter_by(id=bucket.id).update({
+                'hits': QuestionBucket.hits + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            questions = [q.question for q in picked]
+        except IntegrityError:
+            # A concurrent request (double submit) served the same questions to this user
+            db.session.rollback()
+
+    inventory = bucket.questions.count()
+    if inventory < bank_config.TARGET or _unseen(user_id, bucket.id).count() < bank_config.LOW_WATER:
+        schedule_refill(bucket.id, user_id)
+    return questions
+
+
+def bank_can_serve(user_id: int, prompt: str, num_questions: int = 5) -> bool:
+    """Whether the bank already holds ``num_questions`` unseen questions for this prompt (read-only)."""
+    if not bank_config.ENABLED or not prompt or not prompt.strip():
+        return False
+    fingerprint, terms = question_fingerprint(prompt)
+    bucket = QuestionBucket.query.filter_by(fingerprint=fingerprint).first() if terms else None
+    return bucket is not None and _unseen(user_id, bucket.id).limit(num_questions).count() >= num_questions
+
+
+def serve_interview_questions(user_id: int, prompt: str) -> List[str]:
+    """
+    Questions for a simulator round: from the bank when possible, else the AI.
+
+    Questions generated from the user's own prompt are not added to the
+    bank, since the prompt may contain their resume.
+    """
+    num_questions = pick_question_count()
+    questions = serve_from_bank(user_id, prompt, num_questions)
+    if questions:
+        return questions
+    return generate_interview_questions(prompt, num_questions=num_questions)
+
+
+# ---------------------------------------------------------------------------
+# Refills
+# ---------------------------------------------------------------------------
+
+_executor = None
+_executor_lock = threading.Lock()
+_local_refills = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, bank_config.REFILL_THREADS),
+                                               thread_name_prefix='question-bank-refill')
+    return _executor
+
+
+def _run_local_refill(app, bucket_id: int):
+    global _local_refills
+    with app.app_context(), telemetry_route('question_bank_refill'):
+        try:
+            refill_bucket(bucket_id)
+            _local_refills += 1
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Question bank refill of bucket {bucket_id} failed: {e}")
+        finally:
+            db.session.remove()
+
+
+def _claim_refill(bucket_id: int) -> bool:
+    """Mark the bucket as being refilled unless a refill was requested within the cooldown."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=bank_config.REFILL_COOLDOWN)
+    # Conditional UPDATE: of several concurrent requests only one schedules the refill
+    claimed = QuestionBucket.query.filter(
+        QuestionBucket.id == bucket_id,
+        or_(QuestionBucket.refill_requested_at.is_(None), QuestionBucket.refill_requested_at < cutoff)
+    ).update({'refill_requested_at': now}, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def schedule_refill(bucket_id: int, user_id: int) -> bool:
+    """
+    Queue a refill of the bucket unless one was requested within the cooldown.
+
+    Uses the job queue when it is enabled and falls back to a background
+    thread in this process. The job is queued on behalf of ``user_id`` but
+    doesn't count towards their pending-job limit. Returns True when a
+    refill was scheduled.
+    """
+    if not _claim_refill(bucket_id):
+        return False
+    if job_config.ENABLED:
+        enqueue('question_bank_refill', {'bucket_id': bucket_id}, user_id)
+        return True
+    _get_executor().submit(_run_local_refill, current_app._get_current_object(), bucket_id)
+    return True
+
+
+def refill_bucket(bucket_id: int) -> int:
+    """
+    Generate a batch of questions for the bucket and store the new ones.
+
+    The prompt is built from the bucket's role/skill terms only, never from
+    a user's resume, so banked questions are safe to share between users.
+    A bucket whose terms aren't (or are no longer) taxonomy vocabulary is
+    never sent to the AI. Returns the number of questions added.
+    """
+    bucket = db.session.get(QuestionBucket, bucket_id)
+    if bucket is None:
+        return 0
+    if question_fingerprint(bucket.terms) != (bucket.fingerprint, bucket.terms):
+        return 0
+    room = bank_config.MAX_PER_BUCKET - bucket.questions.count()
+    if room <= 0:
+        return 0
+    prompt = f"Candidate profile (target role and key skills): {bucket.terms}"
+    generated = generate_interview_questions(prompt, cache=False, num_questions=bank_config.BATCH)
+
+    existing = {h for (h,) in db.session.query(BankQuestion.question_hash).filter_by(bucket_id=bucket.id)}
+    added = 0
+    for question in generated:
+        if not isinstance(question, str) or not question.strip() \
+                or question.startswith('Error') or question == 'Failed to generate questions':
+            continue
+        question_hash = _question_hash(question)
+        if question_hash in existing:
+            continue
+        existing.add(question_hash)
+        db.session.add(BankQuestion(bucket_id=bucket.id, question=question.strip(), question_hash=question_hash))
+        added += 1
+        if added >= room:
+            break
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent refill stored some of the same questions; keep ours out
+        db.session.rollback()
+        return 0
+    return added
+
+
+def refill_popular_buckets(limit: int = 20, days: int = 7) -> int:
+    """Schedule refills for the most requested recent buckets that are below target."""
+    since = datetime.utcnow() - timedelta(days=days)
+    inventory = db.session.query(
+        BankQuestion.bucket_id, func.count(BankQuestion.id).label('size')
+    ).group_by(BankQuestion.bucket_id).subquery()
+    buckets = db.session.query(QuestionBucket.id).outerjoin(
+        inventory, inventory.c.bucket_id == QuestionBucket.id
+    ).filter(
+        QuestionBucket.last_requested_at >= since,
+        func.coalesce(inventory.c.size, 0) < bank_config.TARGET
+    ).order_by(QuestionBucket.requests.desc()).limit(limit).all()
+    scheduled = 0
+    for (bucket_id,) in buckets:
+        # Refills outside a request are attributed to nobody; run them here
+        if _claim_refill(bucket_id):
+            with telemetry_route('question_bank_refill'):
+                refill_bucket(bucket_id)
+            scheduled += 1
+    return scheduled
+
+
+def question_bank_stats() -> dict:
+    """Bucket, question and hit counters for the metrics endpoint."""
+    try:
+        requests, hits = db.session.query(
+            func.coalesce(func.sum(QuestionBucket.requests), 0),
+            func.coalesce(func.sum(QuestionBucket.hits), 0)
+        ).one()
+        return {
+            'enabled': bank_config.ENABLED,
+            'buckets': QuestionBucket.query.count(),
+            'questions': BankQuestion.query.count(),
+            'requests': int(requests),
+            'hits': int(hits),
+            'hit_rate': round(hits / requests, 4) if requests else 0.0,
+            'local_refills': _local_refills,
+        }
+    except Exception as e:
+        return {'enabled': bank_config.ENABLED, 'error': str(e)}
+
+
+@click.group('question-bank')
+def question_bank_cli():
+    """Interview question bank maintenance."""
+
+
+@question_bank_cli.command('refill')
+@click.option('--limit', default=20, show_default=True, help='Buckets to top up.')
+@click.option('--days', default=7, show_default=True, help='Only buckets requested within this many days.')
+@with_appcontext
+def refill_command(limit, days):
+    """Top up the most popular buckets that are running low (run from cron)."""
+    refilled = refill_popular_buckets(limit=limit, days=days)
+    click.echo(f"Refilled {refilled} question bucket(s).")
+
+
+@question_bank_cli.command('stats')
+@with_appcontext
+def stats_command():
+    """Print bank size and hit rate."""
+    for key, value in question_bank_stats().items():
+        click.echo(f"{key}: {value}")
@@ -0,0 +1,214 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from app.models import UserPersonalInfo, UserSkills, UserExperience, UserEducation
+from app.utils.ai_resilience import deadline_remaining
+from app.utils.ai_telemetry import telemetry_route
+from app.utils.ai_utils import generate_interview_questions, pick_question_count
+from app.utils.question_bank import bank_can_serve
+
+
+class QuestionPrefetchConfig:
+    def __init__(self):
+        # Generate questions from the saved resume while the user looks at the simulator
+        self.ENABLED = os.getenv("AI_QUESTION_PREFETCH", "true").lower() == "true"
+        # Seconds a speculative result stays usable before it is thrown away
+        self.TTL = float(os.getenv("AI_QUESTION_PREFETCH_TTL", "300"))
+        # Longest a submit waits for a prefetch that is still running
+        self.WAIT = float(os.getenv("AI_QUESTION_PREFETCH_WAIT", "30"))
+        self.THREADS = int(os.getenv("AI_QUESTION_PREFETCH_THREADS", "2"))
+        # Users with a pending prefetch at once; further page views don't prefetch
+        self.MAX_PENDING = int(os.getenv("AI_QUESTION_PREFETCH_MAX_PENDING", "500"))
+
+
+prefetch_config = QuestionPrefetchConfig()
+
+
+def build_profile_prompt(user_id: int) -> Optional[str]:
+    """
+    Simulator prompt from the user's saved resume, or None without one.
+
+    Contact details are left out: they don't shape the questions.
+    """
+    info = UserPersonalInfo.query.filter_by(user_id=user_id).first()
+    experience = UserExperience.query.filter_by(user_id=user_id).all()
+    skills = UserSkills.query.filter_by(user_id=user_id).all()
+    education = UserEducation.query.filter_by(user_id=user_id).all()
+    if not (skills or experience or (info and info.summary)):
+        return None
+
+    parts = []
+    if info and info.summary:
+        parts.append(f"Summary: {info.summary.strip()}")
+    if experience:
+        parts.append("Experience:\n" + "\n".join(
+            f"- {e.title} at {e.company}" + (f" ({e.duration})" if e.duration else "") for e in experience))
+    if skills:
+        by_category: Dict[str, List[str]] = {}
+        for skill in skills:
+            by_category.setdefault(skill.category or 'General', []).append(skill.name)
+        parts.append("Skills:\n" + "\n".join(f"- {category}: {', '.join(names)}" for category, names in by_category.items()))
+    if education:
+        parts.append("Education:\n" + "\n".join(f"- {e.degree}, {e.institution}" for e in education))
+    return "\n\n".join(parts)
+
+
+def _normalize(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt or "").strip().lower()
+
+
+class _Prefetch:
+    def __init__(self, prompt: str, future: Future, ttl: float):
+        self.normalized = _normalize(prompt)
+        self.future = future
+        self.expires_at = time.monotonic() + ttl
+
+    def matches(self, prompt: str) -> bool:
+        # Only the exact prompt: questions for a similar profile aren't what the user asked for
+        return _normalize(prompt) == self.normalized
+
+
+class QuestionPrefetcher:
+    """
+    Speculative interview questions, one pending result per user.
+
+    Results live only in this process's memory: a result that isn't
+    claimed by a matching submit within the TTL, or that is replaced by a
+    newer prefetch, is discarded without being stored anywhere.
+    """
+
+    def __init__(self, config: QuestionPrefetchConfig = None):
+        self.config = config or prefetch_config
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.config.THREADS),
+                                            thread_name_prefix='question-prefetch')
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _Prefetch] = {}
+        # user_id -> (normalized prompt, expiry) of the last prefetch, taken or not
+        self._recent: Dict[int, Tuple[str, float]] = {}
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _discard(self, entry: _Prefetch):
+        entry.future.cancel()
+        self.discarded += 1
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for user_id in [u for u, entry in self._pending.items() if entry.expires_at <= now]:
+            self._discard(self._pending.pop(user_id))
+        for user_id in [u for u, (_, expires_at) in self._recent.items() if expires_at <= now]:
+            del self._recent[user_id]
+
+    def start(self, user_id: int, prompt: str) -> bool:
+        """
+        Start generating questions for ``prompt``.
+
+        Nothing is started while the user has a prefetch pending, or when
+        the same prompt was prefetched within the TTL (reloading the page
+        after a submit must not pay for another generation).
+        """
+        with self._lock:
+            self._purge_expired()
+            if user_id in self._pending or len(self._pending) >= self.config.MAX_PENDING:
+                return False
+            normalized = _normalize(prompt)
+            recent = self._recent.get(user_id)
+            if recent is not None and recent[0] == normalized:
+                return False
+            future = self._executor.submit(self._generate, prompt)
+            self._pending[user_id] = _Prefetch(prompt, future, self.config.TTL)
+            self._recent[user_id] = (normalized, time.monotonic() + self.config.TTL)
+            self.started += 1
+            return True
+
+    @staticmethod
+    def _generate(prompt: str) -> List[str]:
+        with telemetry_route('question_prefetch'):
+            # Never cached: a speculative result must not outlive the prefetch
+            return generate_interview_questions(prompt, cache=False, num_questions=pick_question_count())
+
+    def take(self, user_id: int, prompt: str) -> Optional[List[str]]:
+        """
+        The prefetched questions if ``prompt`` matches what was prefetched, else None.
+
+        Either way the user's pending prefetch is used up. A prefetch that is
+        still running is waited for, bounded by AI_QUESTION_PREFETCH_WAIT and
+        the request deadline, since it is further along than a new call.
+        """
+        with self._lock:
+            self._purge_expired()
+            entry = self._pending.pop(user_id, None)
+            if entry is None:
+                return None
+            if not entry.matches(prompt):
+                self.misses += 1
+                self._discard(entry)
+                return None
+        remaining = deadline_remaining()
+        timeout = self.config.WAIT if remaining is None else max(0.0, min(self.config.WAIT, remaining))
+        try:
+            questions = entry.future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            self.discarded += 1
+            return None
+        except Exception as e:
+            print(f"[ERROR] Interview question prefetch failed: {e}")
+            return None
+        if not questions or any(q.startswith('Error') for q in questions) or questions == ['Failed to generate questions']:
+            return None
+        self.hits += 1
+        return questions
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pending = len(self._pending)
+        return {"enabled": self.config.ENABLED, "pending": pending, "started": self.started,
+                "hits": self.hits, "misses": self.misses, "discarded": self.discarded}
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_question_prefetcher() -> QuestionPrefetcher:
+    """Return the process-wide question prefetcher, creating it on first use."""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = QuestionPrefetcher()
+    return _prefetcher
+
+
+def prefetch_profile_questions(user_id: int) -> Optional[str]:
+    """
+    Start a speculative question generation from the user's saved resume.
+
+    Returns the profile prompt (to pre-fill the simulator form) or None
+    when the user has no saved resume. Nothing is generated when the
+    question bank can already serve this prompt.
+    """
+    if not prefetch_config.ENABLED:
+        return None
+    prompt = build_profile_prompt(user_id)
+    if prompt and not bank_can_serve(user_id, prompt):
+        get_question_prefetcher().start(user_id, prompt)
+    return prompt
+
+
+def take_prefetched_questions(user_id: int, prompt: str) -> Optional[List[str]]:
+    """Questions prefetched for this user and prompt, or None."""
+    if not prefetch_config.ENABLED:
+        return None
+    return get_question_prefetcher().take(user_id, prompt)
+
+
+def question_prefetch_stats() -> Optional[Dict[str, object]]:
+    """Prefetch counters for the metrics endpoint (None if prefetching is off)."""
+    return get_question_prefetcher().stats() if prefetch_config.ENABLED else None
@@ -0,0 +1,271 @@
+"""
+Resume PDF rendering.
+
+Two renderers, selected per template (see PDF_TEMPLATES):
+
+  * xhtml2pdf - renders an HTML template (resume/pdf_template.html) with pisa
+  * reportlab - builds the document directly from ReportLab Platypus
+                flowables; several times faster, and paginates long resumes
+                without HTML layout quirks
+
+Both take the dict returned by get_user_resume_data.
+"""
+import io
+import os
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from flask import render_template
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether, HRFlowable, ListFlowable, ListItem
+
+from app.utils.file_utils import html_to_pdf
+
+
+class ResumePdfConfig:
+    def __init__(self):
+        # Template used when a download doesn't ask for one (a key of PDF_TEMPLATES)
+        self.DEFAULT_TEMPLATE = os.getenv("RESUME_PDF_TEMPLATE", "classic")
+        # Optional TrueType fonts for the ReportLab renderer, for text beyond Latin-1
+        self.FONT = os.getenv("RESUME_PDF_FONT", "")
+        self.FONT_BOLD = os.getenv("RESUME_PDF_FONT_BOLD", "")
+
+
+pdf_config = ResumePdfConfig()
+
+# name -> renderer and what it renders from (an HTML template, or a Platypus layout)
+PDF_TEMPLATES: Dict[str, Dict[str, str]] = {
+    'classic': {'renderer': 'xhtml2pdf', 'template': 'resume/pdf_template.html'},
+    'structured': {'renderer': 'reportlab', 'template': 'structured'},
+}
+
+# Bump when the Platypus layout or styles change, so cached PDFs are re-rendered
+LAYOUT_VERSION = '2'
+
+ACCENT = colors.HexColor('#2c5aa0')
+TEXT = colors.HexColor('#333333')
+MUTED = colors.HexColor('#555555')
+RULE = colors.HexColor('#dddddd')
+
+
+def resolve_pdf_template(name: Optional[str]) -> str:
+    """``name`` if it is a known template, else the configured default."""
+    if name in PDF_TEMPLATES:
+        return name
+    return pdf_config.DEFAULT_TEMPLATE if pdf_config.DEFAULT_TEMPLATE in PDF_TEMPLATES else 'classic'
+
+
+# ---------------------------------------------------------------------------
+# ReportLab renderer
+# ---------------------------------------------------------------------------
+
+class _Styles:
+    """Fonts and paragraph styles, registered and built once per process."""
+
+    def __init__(self):
+        self.font, self.bold = 'Helvetica', 'Helvetica-Bold'
+        if pdf_config.FONT:
+            try:
+                pdfmetrics.registerFont(TTFont('ResumeBody', pdf_config.FONT))
+                pdfmetrics.registerFont(TTFont('ResumeBold', pdf_config.FONT_BOLD or pdf_config.FONT))
+                self.font, self.bold = 'ResumeBody', 'ResumeBold'
+            except Exception as e:
+                print(f"[ERROR] Could not register resume PDF font {pdf_config.FONT}: {e}")
+        heading_font = 'Times-Bold' if self.bold == 'Helvetica-Bold' else self.bold
+
+        self.name = ParagraphStyle('ResumeName', fontName=heading_font, fontSize=22, leading=26,
+                                   textColor=ACCENT, alignment=TA_CENTER, spaceAfter=4)
+        self.contact = ParagraphStyle('ResumeContact', fontName=self.font, fontSize=9.5, leading=13,
+                                      textColor=colors.HexColor('#666666'), alignment=TA_CENTER)
+        self.section = ParagraphStyle('ResumeSection', fontName=heading_font, fontSize=12.5, leading=15,
+                                      textColor=ACCENT, spaceBefore=12, spaceAfter=3, keepWithNext=1)
+        self.body = ParagraphStyle('ResumeBody', fontName=self.font, fontSize=10, leading=14,
+                                   textColor=MUTED, alignment=TA_JUSTIFY)
+        self.title = ParagraphStyle('ResumeItemTitle', fontName=self.bold, fontSize=10.5, leading=13,
+                                    textColor=colors.black)
+        self.subtitle = ParagraphStyle('ResumeItemSubtitle', fontName=self.bold, fontSize=9.5, leading=12,
+                                       textColor=TEXT)
+        self.date = ParagraphStyle('ResumeItemDate', fontName=self.font, fontSize=9, leading=12,
+                                   textColor=colors.HexColor('#666666'), alignment=TA_RIGHT)
+        self.detail = ParagraphStyle('ResumeItemDetail', fontName=self.font, fontSize=9.5, leading=12.5,
+                                     textColor=MUTED)
+        self.footer_font = self.font
+
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def _get_styles() -> _Styles:
+    global _styles
+    if _styles is None:
+        with _styles_lock:
+            if _styles is None:
+                _styles = _Styles()
+    return _styles
+
+
+def _text(value) -> str:
+    """Paragraph markup for plain text: escaped, with line breaks kept."""
+    return escape(str(value or '')).replace('\n', '<br/>')
+
+
+def _is_web_url(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme.lower() in ('http', 'https') and bool(parts.netloc)
+
+
+def _profile_link(value, base: str) -> Optional[str]:
+    """
+    Paragraph markup linking a LinkedIn/GitHub profile (a URL or a handle).
+
+    Only http(s) URLs become links; anything else (javascript:, file:, ...)
+    is shown as plain text.
+    """
+    if not value:
+        return None
+    if isinstance(value, dict):
+        url, label = value.get('url'), value.get('display')
+        url = str(url) if url else (f'{base}{label}' if label else None)
+        label = label or url
+    else:
+        value = str(value)
+        url = value if urlsplit(value).scheme else f'{base}{value}'
+        label = value
+    if not url:
+        return None
+    if not _is_web_url(url):
+        return f'<b>{_text(label)}</b>'
+    href = escape(url, {'"': '&quot;'})
+    return f'<a href="{href}" color="black"><b>{_text(label)}</b></a>'
+
+
+def _section(title: str, styles: _Styles) -> List:
+    rule = HRFlowable(width='100%', thickness=0.6, color=RULE, spaceBefore=0, spaceAfter=6)
+    # A heading never ends a page on its own
+    rule.keepWithNext = True
+    return [Paragraph(_text(title.upper()), styles.section), rule]
+
+
+def _item(title: str, subtitle: str, date: str, detail, styles: _Styles, width: float):
+    """A heading row (title and subtitle left, date right) with an optional description, kept on one page."""
+    left = [Paragraph(_text(title), styles.title)]
+    if subtitle:
+        left.append(Paragraph(_text(subtitle), styles.subtitle))
+    header = Table([[left, Paragraph(_text(date), styles.date) if date else '']],
+                   colWidths=[width * 0.75, width * 0.25])
+    header.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                                ('LEFTPADDING', (0, 0), (-1, -1), 0), ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+                                ('TOPPADDING', (0, 0), (-1, -1), 0), ('BOTTOMPADDING', (0, 0), (-1, -1), 0)]))
+    parts = [header]
+    if isinstance(detail, (list, tuple)):
+        parts.append(ListFlowable([ListItem(Paragraph(_text(point), styles.detail), leftIndent=12) for point in detail if point],
+                                  bulletType='bullet', start='•', leftIndent=12, bulletFontSize=7))
+    elif detail:
+        parts.append(Paragraph(_text(detail), styles.detail))
+    parts.append(Spacer(1, 7))
+    return KeepTogether(parts)
+
+
+def _skill_categories(skills) -> Dict[str, List[str]]:
+    categories: Dict[str, List[str]] = {}
+    for skill in skills or []:
+        if isinstance(skill, dict):
+            categories.setdefault(skill.get('category') or 'General', []).append(skill.get('name', ''))
+        else:
+            categories.setdefault('General', []).append(str(skill))
+    return categories
+
+
+def _flowables(data: dict, styles: _Styles, width: float) -> List:
+    """The resume as flowables, in the same order and sections as pdf_template.html."""
+    personal = data.get('personal') or {}
+    story = [Paragraph(_text((personal.get('fullName') or '').upper()), styles.name)]
+    contact = [_text(personal.get('email'))] if personal.get('email') else []
+    if personal.get('phone'):
+        contact.append(_text(personal['phone']))
+    for label, key, base in (('LinkedIn', 'linkedin', 'https://linkedin.com/in/'), ('GitHub', 'github', 'https://github.com/')):
+        link = _profile_link(personal.get(key), base)
+        if link:
+            contact.append(f'{label}: {link}')
+    if contact:
+        story.append(Paragraph(' | '.join(contact), styles.contact))
+    story.append(HRFlowable(width='100%', thickness=1.5, color=ACCENT, spaceBefore=8, spaceAfter=4))
+
+    if personal.get('summary'):
+        story += _section('Profile', styles)
+        story.append(Paragraph(_text(personal['summary']), styles.body))
+
+    categories = _skill_categories(data.get('skills'))
+    if categories:
+        story += _section('Skills', styles)
+        for category, names in categories.items():
+            story.append(Paragraph(f'<b>{_text(category)}:</b> {_text(", ".join(n for n in names if n))}', styles.detail))
+            story.append(Spacer(1, 3))
+
+    if data.get('experience'):
+        story += _section('Work Experience', styles)
+        for exp in data['experience']:
+            story.append(_item(exp.get('title') or exp.get('role', ''), exp.get('company'), exp.get('duration'),
+                               exp.get('description'), styles, width))
+
+    if data.get('projects'):
+        story += _section('Projects', styles)
+        for proj in data['projects']:
+            story.append(_item(proj.get('title', ''), None, None, proj.get('description'), styles, width))
+
+    if data.get('education'):
+        story += _section('Education', styles)
+        for edu in data['education']:
+            story.append(_item(edu.get('degree', ''), edu.get('institution'), edu.get('year'),
+                               edu.get('description'), styles, width))
+    return story
+
+
+def render_resume_platypus(data: dict) -> bytes:
+    """The resume as a PDF built from Platypus flowables; long content flows onto further pages."""
+    styles = _get_styles()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=0.6 * inch, rightMargin=0.6 * inch,
+                            topMargin=0.5 * inch, bottomMargin=0.6 * inch,
+                            title=f"Resume - {(data.get('personal') or {}).get('fullName', '')}", author='CareerCraft')
+
+    def footer(canvas, document):
+        canvas.saveState()
+        canvas.setFont(styles.footer_font, 8)
+        canvas.setFillColor(colors.HexColor('#999999'))
+        canvas.drawRightString(letter[0] - doc.rightMargin, 0.35 * inch, f'Page {document.page}')
+        canvas.restoreState()
+
+    story = _flowables(data, styles, doc.width)
+    doc.build(story, onFirstPage=footer, onLaterPages=footer)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+
+def render_resume_pdf(data: dict, template: str = None) -> Optional[bytes]:
+    """
+    Render resume data with a template from PDF_TEMPLATES.
+
+    HTML templates need a Flask app context. Returns None if rendering failed.
+    """
+    spec = PDF_TEMPLATES[resolve_pdf_template(template)]
+    if spec['renderer'] == 'reportlab':
+        try:
+            return render_resume_platypus(data)
+        except Exception as e:
+            print(f"[ERROR] Rendering resume PDF failed: {e}")
+            return None
+    pdf = html_to_pdf(render_template(spec['template'], data=data))
+    return pdf.getvalue() if pdf else None
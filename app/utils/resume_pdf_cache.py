@@ -0,0 +1,162 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app
+
+from app.utils.resume_pdf import PDF_TEMPLATES, LAYOUT_VERSION
+
+
+class ResumePdfCacheConfig:
+    def __init__(self):
+        # Keep rendered resume PDFs on disk instead of rendering every download
+        self.ENABLED = os.getenv("RESUME_PDF_CACHE", "true").lower() == "true"
+        self.DIR = os.getenv("RESUME_PDF_CACHE_DIR", os.path.join('instance', 'resume_pdf_cache'))
+        # Oldest files are removed beyond this many
+        self.MAX_FILES = int(os.getenv("RESUME_PDF_CACHE_MAX_FILES", "2000"))
+
+
+pdf_cache_config = ResumePdfCacheConfig()
+
+# Bump when the PDF output changes for reasons the template source doesn't show
+RENDERER_VERSION = '1'
+
+
+class ResumePdfCache:
+    """
+    Rendered resume PDFs on disk, keyed by a hash of the resume data and
+    the template (renderer plus its HTML source or layout version) that
+    renders it.
+
+    The key doubles as the download's ETag. A new key follows from any
+    change to the data or the template, so a stale PDF is never served;
+    the resume writers additionally drop the user's files (invalidate),
+    which would otherwise never be requested again.
+    """
+
+    def __init__(self, config: ResumePdfCacheConfig = None):
+        self.config = config or pdf_cache_config
+        self._lock = threading.Lock()
+        self._template_digests: Dict[str, Tuple[str, Callable[[], bool]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def template_version(self, template: str) -> str:
+        """Digest of a template's source, recomputed when the file changes."""
+        with self._lock:
+            cached = self._template_digests.get(template)
+        if cached is not None and (cached[1] is None or cached[1]()):
+            return cached[0]
+        source, _, uptodate = current_app.jinja_env.loader.get_source(current_app.jinja_env, template)
+        digest = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            self._template_digests[template] = (digest, uptodate)
+        return digest
+
+    def key(self, data: dict, template: str) -> str:
+        """Cache key (and ETag) for ``data`` rendered with ``template`` (a PDF_TEMPLATES name)."""
+        spec = PDF_TEMPLATES[template]
+        if spec['renderer'] == 'reportlab':
+            source_version = LAYOUT_VERSION
+        else:
+            source_version = self.template_version(spec['template'])
+        payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        version = f"{spec['renderer']}:{RENDERER_VERSION}:{template}:{source_version}"
+        return hashlib.sha256(f'{version}\n{payload}'.encode('utf-8')).hexdigest()
+
+    def _path(self, user_id: int, key: str) -> str:
+        return os.path.join(os.path.abspath(self.config.DIR), f'{user_id}-{key}.pdf')
+
+    def path_if_cached(self, user_id: int, key: str) -> Optional[str]:
+        """Path of the cached PDF for ``key``, or None (not counted as a hit or miss)."""
+        path = self._path(user_id, key)
+        return path if os.path.exists(path) else None
+
+    def get(self, user_id: int, key: str) -> Optional[str]:
+        """Path of the cached PDF for ``key``, or None."""
+        path = self.path_if_cached(user_id, key)
+        if path is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return path
+
+    def put(self, user_id: int, key: str, pdf: bytes) -> Optional[str]:
+        """Store a rendered PDF; returns its path, or None if it couldn't be written."""
+        path = self._path(user_id, key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self.config.DIR, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[ERROR] Could not cache resume PDF: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+        self._prune()
+        return path
+
+    def invalidate(self, user_id: int):
+        """Remove every cached PDF of a user (their resume changed)."""
+        for path in glob.glob(os.path.join(self.config.DIR, f'{user_id}-*.pdf')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.invalidations += 1
+
+    def _prune(self):
+        paths = glob.glob(os.path.join(self.config.DIR, '*.pdf'))
+        if len(paths) <= self.config.MAX_FILES:
+            return
+        by_age = []
+        for path in paths:
+            try:
+                by_age.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        for _, path in sorted(by_age)[:len(by_age) - self.config.MAX_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, object]:
+        requests = self.hits + self.misses
+        return {'enabled': self.config.ENABLED, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 4) if requests else 0.0,
+                'not_modified': self.not_modified, 'invalidations': self.invalidations}
+
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_resume_pdf_cache() -> ResumePdfCache:
+    """Return the process-wide resume PDF cache, creating it on first use."""
+    global _pdf_cache
+    if _pdf_cache is None:
+        with _pdf_cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = ResumePdfCache()
+    return _pdf_cache
+
+
+def invalidate_resume_pdf(user_id: int):
+    """Drop a user's cached resume PDFs; called by the resume writers."""
+    if pdf_cache_config.ENABLED:
+        get_resume_pdf_cache().invalidate(user_id)
+
+
+def resume_pdf_cache_stats() -> Dict[str, object]:
+    """Cache counters for the metrics endpoint."""
+    return get_resume_pdf_cache().stats()
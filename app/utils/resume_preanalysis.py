@@ -0,0 +1,247 @@
+import re
+import math
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.role_matcher import get_role_matcher
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# Sections every resume should have, and ones that are nice to have
+CORE_SECTIONS = ("contact", "summary", "experience", "education", "skills")
+OPTIONAL_SECTIONS = ("projects", "certifications")
+_SECTION_HEADINGS = {
+    "summary": re.compile(r"^(professional |career )?(summary|profile|objective|about me)\b"),
+    "experience": re.compile(r"^((work|professional|relevant) )?(experience|employment( history)?|work history|internships?)\b"),
+    "education": re.compile(r"^(education|academic (background|qualifications)|academics|qualifications)\b"),
+    "skills": re.compile(r"^((technical|key|core) )?(skills|competencies|technologies|tech stack)\b"),
+    "projects": re.compile(r"^((academic|personal|key) )?projects\b"),
+    "certifications": re.compile(r"^(certifications?|licenses?( (and|&) certifications)?|courses)\b"),
+}
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_BULLET_RE = re.compile(r"^\s*([-*•▪◦●‣–]|\d{1,2}[.)])\s+")
+# Years, date ranges and phone numbers aren't achievements
+_NOT_METRICS_RE = re.compile(r"\b(19|20)\d{2}\b|\+?\d[\d\s().-]{7,}\d")
+_METRIC_RE = re.compile(r"\d|%|\$|₹|€|£")
+_WORD_RE = re.compile(r"\S+")
+
+WORDS_PER_PAGE = 450
+TARGET_ROLES = 3
+MISSING_KEYWORDS = 10
+
+
+def _find_sections(lines: List[str], text: str) -> Dict[str, bool]:
+    found = {name: False for name in CORE_SECTIONS + OPTIONAL_SECTIONS}
+    found["contact"] = bool(_EMAIL_RE.search(text) or _PHONE_RE.search(text))
+    for line in lines:
+        heading = line.strip().strip(":").strip().lower()
+        # Headings are short lines; skip sentences that merely start with "skills"
+        if not heading or len(heading.split()) > 5:
+            continue
+        for name, pattern in _SECTION_HEADINGS.items():
+            if pattern.match(heading):
+                found[name] = True
+    return found
+
+
+def _statements(lines: List[str]) -> Tuple[List[str], bool]:
+    """The resume's bullet points, or its longer lines when it has no bullets."""
+    bullets = [_BULLET_RE.sub("", line) for line in lines if _BULLET_RE.match(line)]
+    if bullets:
+        return bullets, True
+    return [line for line in lines if len(line.split()) >= 6], False
+
+
+class _RoleMatrix:
+    """Dense role x skill TF-IDF matrix for one version of the role index."""
+
+    def __init__(self, roles, idf):
+        self.roles = roles
+        self.skills = sorted(idf)
+        self.position = {skill: j for j, skill in enumerate(self.skills)}
+        self.idf = idf
+        self.names = {}
+        for profile in roles:
+            for skill, name in profile.skill_names.items():
+                self.names.setdefault(skill, name)
+        if HAS_NUMPY:
+            self.idf_vector = np.array([idf[s] for s in self.skills])
+            self.matrix = np.zeros((len(roles), len(self.skills)))
+            for i, profile in enumerate(roles):
+                for skill, weight in profile.weights.items():
+                    self.matrix[i, self.position[skill]] = weight * idf[skill]
+            norms = np.linalg.norm(self.matrix, axis=1)
+            self.norms = np.where(norms > 0, norms, 1.0)
+
+    def rank(self, counts) -> Tuple[List[Tuple[float, int]], List[Tuple[float, Tuple[str, ...]]], float]:
+        """
+        Best matching roles, the skills those roles weigh most that the resume
+        lacks, and the share of the roles' skill weight the resume covers.
+
+        ``counts`` may come from a newer index than this matrix (the matcher
+        learns after every AI match); skills the matrix doesn't know are left out.
+        """
+        counts = {skill: count for skill, count in counts.items() if skill in self.position}
+        if HAS_NUMPY:
+            return self._rank_numpy(counts)
+        return self._rank_python(counts)
+
+    def _rank_numpy(self, counts):
+        tf = np.zeros(len(self.skills))
+        for skill, count in counts.items():
+            tf[self.position[skill]] = 1 + math.log(count)
+        query = tf * self.idf_vector
+        query_norm = np.linalg.norm(query)
+        if not query_norm:
+            return [], [], 0.0
+        similarity = self.matrix @ query / (self.norms * query_norm)
+        top = [int(i) for i in np.argsort(-similarity)[:TARGET_ROLES] if similarity[i] > 0]
+        if not top:
+            return [], [], 0.0
+        # What the target roles look for, weighted by how close each role is
+        demand = similarity[top] @ self.matrix[top]
+        missing = np.where(tf == 0, demand, 0.0)
+        order = [int(j) for j in np.argsort(-missing)[:MISSING_KEYWORDS] if missing[j] > 0]
+        coverage = float(demand[tf > 0].sum() / demand.sum()) if demand.sum() else 0.0
+        return ([(float(similarity[i]), i) for i in top],
+                [(float(missing[j]), self.skills[j]) for j in order],
+                coverage)
+
+    def _rank_python(self, counts):
+        query = {skill: (1 + math.log(count)) * self.idf[skill] for skill, count in counts.items()}
+        query_norm = math.sqrt(sum(w * w for w in query.values()))
+        if not query_norm:
+            return [], [], 0.0
+        similarity = []
+        for i, profile in enumerate(self.roles):
+            dot = sum(w * profile.weights.get(s, 0.0) * self.idf[s] for s, w in query.items())
+            if dot > 0:
+                similarity.append((dot / ((profile.norm or 1.0) * query_norm), i))
+        top = sorted(similarity, key=lambda item: (-item[0], item[1]))[:TARGET_ROLES]
+        if not top:
+            return [], [], 0.0
+        demand: Dict[Tuple[str, ...], float] = {}
+        for score, i in top:
+            for skill, weight in self.roles[i].weights.items():
+                demand[skill] = demand.get(skill, 0.0) + score * weight * self.idf[skill]
+        missing = sorted(((w, s) for s, w in demand.items() if s not in counts), key=lambda item: (-item[0], item[1]))
+        total = sum(demand.values())
+        coverage = sum(w for s, w in demand.items() if s in counts) / total if total else 0.0
+        return top, missing[:MISSING_KEYWORDS], coverage
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def _get_role_matrix() -> _RoleMatrix:
+    """The role matrix for the current role index, rebuilt when the index changes."""
+    global _matrix
+    roles, idf = get_role_matcher().role_profiles()
+    with _matrix_lock:
+        if _matrix is None or _matrix.roles is not roles:
+            _matrix = _RoleMatrix(roles, idf)
+        return _matrix
+
+
+def preanalyze_resume(text: str) -> Dict[str, object]:
+    """
+    Fast local checks on a resume: sections, keyword gaps, quantified
+    achievements and length.
+
+    Keyword gaps compare the resume's skill mentions (TF-IDF) with the
+    closest roles in the role matcher's index (taxonomy plus past AI
+    matches) and list the skills those roles weigh most that the resume
+    never mentions. Runs in a few milliseconds, so its results can be shown
+    while the AI analysis is still running and can narrow the AI prompt.
+    """
+    started = time.perf_counter()
+    text = text or ""
+    lines = [line for line in text.splitlines() if line.strip()]
+
+    sections = _find_sections(lines, text)
+    missing_sections = [name for name in CORE_SECTIONS if not sections[name]]
+    completeness = 1 - len(missing_sections) / len(CORE_SECTIONS)
+
+    matrix = _get_role_matrix()
+    counts = get_role_matcher().skill_counts(text)
+    top_roles, missing, keyword_coverage = matrix.rank(counts)
+
+    statements, bulleted = _statements(lines)
+    quantified = [s for s in statements if _METRIC_RE.search(_NOT_METRICS_RE.sub("", s))]
+    words = len(_WORD_RE.findall(text))
+    statement_words = [len(s.split()) for s in statements]
+
+    density = len(quantified) / len(statements) if statements else 0.0
+    score = round(40 * completeness + 30 * min(1.0, density / 0.5) + 30 * keyword_coverage)
+    return {
+        "score": score,
+        "sections": sections,
+        "missing_sections": missing_sections,
+        "section_completeness": round(completeness, 2),
+        "target_roles": [matrix.roles[i].title for _, i in top_roles],
+        "keywords_found": sorted(matrix.names[s] for s in counts if s in matrix.names),
+        "missing_keywords": [matrix.names[s] for _, s in missing],
+        "keyword_coverage": round(keyword_coverage, 2),
+        "quantification": {
+            "statements": len(statements),
+            "bulleted": bulleted,
+            "quantified": len(quantified),
+            "density": round(density, 2),
+        },
+        "length": {
+            "words": words,
+            "lines": len(lines),
+            "estimated_pages": round(words / WORDS_PER_PAGE, 1),
+            "avg_statement_words": round(sum(statement_words) / len(statement_words), 1) if statement_words else 0,
+            "long_statements": sum(1 for n in statement_words if n > 30),
+        },
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def preanalysis_gaps(pre: Dict[str, object]) -> List[str]:
+    """The problems the local pass found, one short sentence each."""
+    gaps = []
+    if pre["missing_sections"]:
+        gaps.append("Missing sections: " + ", ".join(pre["missing_sections"]) + ".")
+    if pre["missing_keywords"]:
+        roles = ", ".join(pre["target_roles"]) or "the closest roles"
+        gaps.append(f"Keywords common for {roles} but absent: " + ", ".join(pre["missing_keywords"]) + ".")
+    quantification = pre["quantification"]
+    if quantification["statements"] and quantification["density"] < 0.5:
+        gaps.append(f"Only {quantification['quantified']} of {quantification['statements']} "
+                    "achievement statements include numbers or metrics.")
+    if not quantification["bulleted"]:
+        gaps.append("Experience is written as paragraphs rather than bullet points.")
+    length = pre["length"]
+    if length["words"] < 250:
+        gaps.append(f"Very short ({length['words']} words).")
+    elif length["estimated_pages"] > 2:
+        gaps.append(f"Long (about {length['estimated_pages']} pages).")
+    if length["long_statements"]:
+        gaps.append(f"{length['long_statements']} statements are longer than 30 words.")
+    return gaps
+
+
+def format_preanalysis(pre: Optional[Dict[str, object]]) -> str:
+    """Plain-text summary of a pre-analysis for the page and the feedback download."""
+    if not pre:
+        return ""
+    lines = [f"Resume score: {pre['score']}/100"]
+    if pre["target_roles"]:
+        lines.append("Closest roles: " + ", ".join(pre["target_roles"]))
+    if pre["keywords_found"]:
+        lines.append("Keywords found: " + ", ".join(pre["keywords_found"]))
+    gaps = preanalysis_gaps(pre)
+    lines.extend("- " + gap for gap in gaps)
+    if not gaps:
+        lines.append("- No structural gaps found.")
+    return "\n".join(lines)
@@ -0,0 +1,185 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FuturesTimeoutError
+from typing import Dict, Optional
+
+from flask import current_app
+
+from app.utils.resume_pdf import render_resume_pdf, resolve_pdf_template
+from app.utils.resume_pdf_cache import pdf_cache_config, get_resume_pdf_cache, invalidate_resume_pdf
+
+
+class ResumePrerenderConfig:
+    def __init__(self):
+        # Render the resume PDF in the background after a save, ahead of the download
+        self.ENABLED = os.getenv("RESUME_PDF_PRERENDER", "true").lower() == "true"
+        # Seconds without another save before rendering; step-by-step saves coalesce into one render
+        self.DEBOUNCE = float(os.getenv("RESUME_PDF_PRERENDER_DEBOUNCE", "3"))
+        # Longest a download waits for a render that is scheduled or running
+        self.WAIT = float(os.getenv("RESUME_PDF_PRERENDER_WAIT", "10"))
+        self.THREADS = int(os.getenv("RESUME_PDF_PRERENDER_THREADS", "1"))
+        # Users with a render scheduled at once; further saves don't prerender
+        self.MAX_PENDING = int(os.getenv("RESUME_PDF_PRERENDER_MAX_PENDING", "500"))
+
+
+prerender_config = ResumePrerenderConfig()
+
+
+class _Pending:
+    def __init__(self):
+        self.timer: Optional[threading.Timer] = None
+        self.future: Optional[Future] = None
+
+
+class ResumePrerenderer:
+    """
+    Debounced background renders of users' resume PDFs into the PDF cache.
+
+    Each save restarts the user's timer; when it expires the resume is
+    rendered with the default template on a worker thread. A download that
+    arrives while a render is scheduled skips the rest of the debounce and
+    waits for it rather than rendering the same PDF itself. Timers live in
+    this process only, so a save handled by another worker process is
+    prerendered there.
+    """
+
+    def __init__(self, config: ResumePrerenderConfig = None):
+        self.config = config or prerender_config
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.config.THREADS),
+                                            thread_name_prefix='resume-prerender')
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _Pending] = {}
+        self.scheduled = 0
+        self.coalesced = 0
+        self.rendered = 0
+        self.already_cached = 0
+        self.failed = 0
+        self.waited = 0
+
+    def schedule(self, user_id: int) -> bool:
+        """(Re)start the user's debounce timer; False if too many renders are pending."""
+        app = current_app._get_current_object()
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                if len(self._pending) >= self.config.MAX_PENDING:
+                    return False
+                pending = self._pending[user_id] = _Pending()
+            elif pending.timer is not None:
+                pending.timer.cancel()
+                self.coalesced += 1
+            timer = threading.Timer(self.config.DEBOUNCE, self._fire)
+            timer.args = (app, user_id, timer)
+            timer.daemon = True
+            pending.timer = timer
+            self.scheduled += 1
+        timer.start()
+        return True
+
+    def _fire(self, app, user_id: int, timer: threading.Timer = None) -> Optional[Future]:
+        """
+        Submit the user's render now; returns its future (None if nothing was
+        scheduled). Called by the debounce timer, or early by a download.
+        """
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None or (timer is not None and pending.timer is not timer):
+                # Nothing scheduled, or a timer that a later save replaced
+                return None
+            if pending.timer is not None:
+                pending.timer.cancel()
+                pending.timer = None
+                pending.future = self._executor.submit(self._render, app, user_id)
+            return pending.future
+
+    def _render(self, app, user_id: int):
+        with app.app_context():
+            # Imported here: the routes module imports this one
+            from app.routes.resume import get_user_resume_data
+            try:
+                data = get_user_resume_data(user_id)
+                if not data:
+                    return
+                template = resolve_pdf_template(None)
+                cache = get_resume_pdf_cache()
+                key = cache.key(data, template)
+                if cache.path_if_cached(user_id, key):
+                    self.already_cached += 1
+                    return
+                pdf = render_resume_pdf(data, template)
+                if pdf and cache.put(user_id, key, pdf):
+                    self.rendered += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERROR] Background resume PDF render failed for user {user_id}: {e}")
+            finally:
+                with self._lock:
+                    pending = self._pending.get(user_id)
+                    # Keep the entry if a newer save scheduled another render meanwhile
+                    if pending is not None and pending.timer is None:
+                        del self._pending[user_id]
+
+    def wait(self, user_id: int, key: str) -> Optional[str]:
+        """
+        Path of the cached PDF for ``key`` once the user's scheduled or
+        running render has finished, or None if there is none or it
+        produced something else (the data changed again).
+        """
+        with self._lock:
+            if user_id not in self._pending:
+                return None
+        future = self._fire(current_app._get_current_object(), user_id)
+        if future is None:
+            return None
+        try:
+            future.result(timeout=self.config.WAIT)
+        except FuturesTimeoutError:
+            return None
+        path = get_resume_pdf_cache().path_if_cached(user_id, key)
+        if path is not None:
+            self.waited += 1
+        return path
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pending = len(self._pending)
+        return {"enabled": self.config.ENABLED, "pending": pending, "scheduled": self.scheduled,
+                "coalesced": self.coalesced, "rendered": self.rendered, "already_cached": self.already_cached,
+                "failed": self.failed, "downloads_waited": self.waited}
+
+
+_prerenderer = None
+_prerenderer_lock = threading.Lock()
+
+
+def get_resume_prerenderer() -> ResumePrerenderer:
+    """Return the process-wide resume prerenderer, creating it on first use."""
+    global _prerenderer
+    if _prerenderer is None:
+        with _prerenderer_lock:
+            if _prerenderer is None:
+                _prerenderer = ResumePrerenderer()
+    return _prerenderer
+
+
+def refresh_resume_pdf(user_id: int):
+    """After a resume save: drop the user's cached PDFs and schedule a fresh background render."""
+    if not pdf_cache_config.ENABLED:
+        return
+    invalidate_resume_pdf(user_id)
+    if prerender_config.ENABLED:
+        get_resume_prerenderer().schedule(user_id)
+
+
+def wait_for_prerendered_pdf(user_id: int, key: str) -> Optional[str]:
+    """The prerendered PDF for ``key`` if a background render for the user is scheduled or running."""
+    if not prerender_config.ENABLED:
+        return None
+    return get_resume_prerenderer().wait(user_id, key)
+
+
+def resume_prerender_stats() -> Optional[Dict[str, object]]:
+    """Prerender counters for the metrics endpoint (None if prerendering is off)."""
+    return get_resume_prerenderer().stats() if prerender_config.ENABLED else None
@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import math
+import time
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.metrics import get_histogram
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "data", "role_taxonomy.json")
+
+# The job-match prompt asks the AI for 5-7 roles; the local matcher answers with as many
+MIN_ROLES = 5
+MAX_ROLES = 7
+SKILLS_PER_ROLE = 8
+CERTIFICATIONS_PER_ROLE = 3
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class RoleMatcherConfig:
+    def __init__(self):
+        # Answer /job-matcher locally when the matcher is confident enough
+        self.ENABLED = os.getenv("AI_ROLE_MATCHER", "true").lower() == "true"
+        # Below this confidence (0-1) the AI is asked instead
+        self.MIN_CONFIDENCE = float(os.getenv("AI_ROLE_MATCHER_MIN_CONFIDENCE", "0.5"))
+        self.TAXONOMY_PATH = os.getenv("AI_ROLE_MATCHER_TAXONOMY") or DEFAULT_TAXONOMY_PATH
+        # Most recent JobMatchResult rows learned from at startup/refresh
+        self.HISTORY_LIMIT = int(os.getenv("AI_ROLE_MATCHER_HISTORY_LIMIT", "5000"))
+        # A role title seen only in history must have been suggested this often to be indexed
+        self.HISTORY_MIN_COUNT = int(os.getenv("AI_ROLE_MATCHER_HISTORY_MIN_COUNT", "2"))
+        # Seconds between reloads of the history (picks up other processes' results)
+        self.REFRESH_INTERVAL = float(os.getenv("AI_ROLE_MATCHER_REFRESH", "3600"))
+
+
+role_matcher_config = RoleMatcherConfig()
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+# Tokens that are skills in a list ("python, go, r") but mostly ordinary words in prose
+_PROSE_AMBIGUOUS = frozenset({"go", "r", "c", "ai", "cv", "rest", "spring", "node", "tf", "ts", "dl", "ux", "sales"})
+# An input whose comma/line separated items are all this short is a skill list, not a resume
+_LIST_ITEM_WORDS = 4
+# In prose, this many recognized skills count as full coverage
+_PROSE_FULL_COVERAGE = 8
+# Mean top-role similarity that counts as a strong match
+_STRONG_SCORE = 0.3
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    return tuple(token.rstrip("./-") for token in _TOKEN_RE.findall(text.lower()) if token.rstrip("./-"))
+
+
+def _title_key(title: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9+#]+", title.lower()))
+
+
+def _is_skill_list(text: str) -> Tuple[List[str], bool]:
+    """The comma/line separated items of ``text``, and whether they are all short enough to be a skill list."""
+    items = [item for item in re.split(r"[,;\n|•]+|\band\b", text.lower()) if item.strip()]
+    return items, bool(items) and all(len(item.split()) <= _LIST_ITEM_WORDS for item in items)
+
+
+class _RoleProfile:
+    """One indexed role: skill weights (0-1) plus the names shown to the user."""
+
+    def __init__(self, title: str):
+        self.title = title
+        self.weights: Dict[Tuple[str, ...], float] = {}
+        self.skill_names: Dict[Tuple[str, ...], str] = {}
+        self.certifications: List[str] = []
+        self.norm = 0.0
+
+    def add_skill(self, key: Tuple[str, ...], name: str, weight: float):
+        if weight > self.weights.get(key, 0.0):
+            self.weights[key] = weight
+        self.skill_names.setdefault(key, name)
+
+    def add_certification(self, name: str):
+        if name and name.lower() not in {c.lower() for c in self.certifications}:
+            self.certifications.append(name)
+
+
+class _HistoryRole:
+    """Aggregated AI suggestions for one role title."""
+
+    def __init__(self):
+        self.count = 0
+        self.titles = Counter()
+        self.skills = Counter()
+        self.skill_names: Dict[Tuple[str, ...], str] = {}
+        self.certifications = Counter()
+
+
+class RoleMatcher:
+    """
+    Scores skills against an inverted index of job roles.
+
+    The index combines the bundled role taxonomy with every role the AI has
+    suggested before (JobMatchResult.matched_roles), weighting a historical
+    skill by how often the AI listed it for that title. Inputs are matched
+    by TF-IDF cosine similarity; ``match`` returns None when it isn't
+    confident enough, so the caller can ask the AI instead.
+    """
+
+    def __init__(self, config: RoleMatcherConfig = None):
+        self.config = config or role_matcher_config
+        self._lock = threading.Lock()
+        self._taxonomy = self._load_taxonomy(self.config.TAXONOMY_PATH)
+        self._aliases = {_tokens(alias): _tokens(skill) for alias, skill in self._taxonomy.get("aliases", {}).items()}
+        self._taxonomy_terms = self._build_taxonomy_terms()
+        self._history: Dict[str, _HistoryRole] = {}
+        self._history_rows = 0
+        self._loaded_at = 0.0
+        self._index = None  # (roles, postings, idf, vocabulary, max_phrase)
+        self.local_matches = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _load_taxonomy(path: str) -> dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Could not load the role taxonomy from {path}: {e}")
+            return {"roles": []}
+
+    def _build_taxonomy_terms(self) -> Dict[Tuple[str, ...], str]:
+        """Phrase -> canonical term for every role title, skill and alias in the bundled taxonomy."""
+        terms: Dict[Tuple[str, ...], str] = {}
+        for role in self._taxonomy.get("roles", []):
+            title = _tokens(role["job_title"])
+            if title:
+                terms[title] = " ".join(title)
+            for name in role.get("skills", []):
+                skill = self._canonical(_tokens(name))
+                if skill:
+                    terms[skill] = " ".join(skill)
+        for alias, skill in self._aliases.items():
+            if alias and skill:
+                terms[alias] = " ".join(skill)
+        return terms
+
+    # -- learning -----------------------------------------------------------
+
+    def learn(self, roles: Iterable[dict]):
+        """Add one match result (the 'roles' list of match_job_roles) to the history."""
+        with self._lock:
+            self._learn(roles, self._history)
+            self._index = None
+
+    def _learn(self, roles: Iterable[dict], history: Dict[str, _HistoryRole]):
+        for role in roles or []:
+            if not isinstance(role, dict) or not isinstance(role.get("job_title"), str):
+                continue
+            key = _title_key(role["job_title"])
+            if not key:
+                continue
+            entry = history.setdefault(key, _HistoryRole())
+            entry.count += 1
+            entry.titles[role["job_title"].strip()] += 1
+            for name in set(s.strip() for s in role.get("skills") or [] if isinstance(s, str) and s.strip()):
+                skill = self._canonical(_tokens(name))
+                if skill:
+                    entry.skills[skill] += 1
+                    entry.skill_names.setdefault(skill, name)
+            for name in set(c.strip() for c in role.get("certifications") or [] if isinstance(c, str) and c.strip()):
+                entry.certifications[name] += 1
+
+    def _load_history(self) -> bool:
+        """
+        Reload the aggregated history from JobMatchResult (needs an app context).
+
+        Returns False when it couldn't be read, so the next call tries again.
+        """
+        from flask import has_app_context
+        from app.extensions import db
+        from app.models import JobMatchResult
+        if not has_app_context():
+            return False  # the taxonomy alone still works
+        try:
+            rows = db.session.query(JobMatchResult.matched_roles).order_by(
+                JobMatchResult.id.desc()).limit(self.config.HISTORY_LIMIT).all()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Role matcher could not load the match history: {e}")
+            return False
+        history: Dict[str, _HistoryRole] = {}
+        for (matched_roles,) in rows:
+            try:
+                self._learn(json.loads(matched_roles) if matched_roles else [], history)
+            except (ValueError, TypeError):
+                continue
+        self._history = history
+        self._history_rows = len(rows)
+        return True
+
+    # -- index --------------------------------------------------------------
+
+    def _canonical(self, key: Tuple[str, ...]) -> Tuple[str, ...]:
+        return self._aliases.get(key, key)
+
+    def _build_index(self):
+        profiles: Dict[str, _RoleProfile] = {}
+        for role in self._taxonomy.get("roles", []):
+            profile = profiles.setdefault(_title_key(role["job_title"]), _RoleProfile(role["job_title"]))
+            for name in role.get("skills", []):
+                profile.add_skill(self._canonical(_tokens(name)), name, 1.0)
+            for name in role.get("certifications", []):
+                profile.add_certification(name)
+
+        for key, entry in self._history.items():
+            profile = profiles.get(key)
+            if profile is None:
+                if entry.count < self.config.HISTORY_MIN_COUNT:
+                    continue
+                profile = profiles[key] = _RoleProfile(entry.titles.most_common(1)[0][0])
+            for skill, count in entry.skills.items():
+                profile.add_skill(skill, entry.skill_names[skill], count / entry.count)
+            for name, _ in entry.certifications.most_common(CERTIFICATIONS_PER_ROLE):
+                profile.add_certification(name)
+
+        roles = [profile for profile in profiles.values() if profile.weights]
+        document_frequency = Counter(skill for profile in roles for skill in profile.weights)
+        idf = {skill: math.log(1 + len(roles) / df) for skill, df in document_frequency.items()}
+        postings: Dict[Tuple[str, ...], List[Tuple[int, float]]] = {}
+        for i, profile in enumerate(roles):
+            for skill, weight in profile.weights.items():
+                postings.setdefault(skill, []).append((i, weight * idf[skill]))
+            profile.norm = math.sqrt(sum((w * idf[s]) ** 2 for s, w in profile.weights.items()))
+        vocabulary = set(postings) | set(self._aliases)
+        max_phrase = max((len(phrase) for phrase in vocabulary), default=1)
+        self._index = (roles, postings, idf, vocabulary, max_phrase)
+
+    def _get_index(self):
+        with self._lock:
+            if time.time() - self._loaded_at > self.config.REFRESH_INTERVAL and self._load_history():
+                self._loaded_at = time.time()
+                self._index = None
+            if self._index is None:
+                self._build_index()
+            return self._index
+
+    # -- matching -----------------------------------------------------------
+
+    def _scan(self, text: str, is_list: bool) -> List[Tuple[str, ...]]:
+        """Every known skill mention in ``text``, canonicalized, in order (with repeats)."""
+        _, _, _, vocabulary, max_phrase = self._get_index()
+        tokens = _tokens(text)
+        found = []
+        i = 0
+        while i < len(tokens):
+            # Longest known phrase starting here ("power bi" before "power")
+            for size in range(min(max_phrase, len(tokens) - i), 0, -1):
+                phrase = tokens[i:i + size]
+                if phrase in vocabulary and (is_list or size > 1 or phrase[0] not in _PROSE_AMBIGUOUS):
+                    found.append(self._canonical(phrase))
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def extract_skills(self, text: str) -> Tuple[List[Tuple[str, ...]], float]:
+        """Known skills in ``text`` (in order of appearance) and how much of the input they cover."""
+        items, is_list = _is_skill_list(text)
+
+        found: List[Tuple[str, ...]] = []
+        covered_items = 0
+        for item in items if is_list else [text]:
+            mentions = self._scan(item, is_list)
+            found.extend(skill for skill in dict.fromkeys(mentions) if skill not in found)
+            covered_items += bool(mentions)
+
+        if is_list:
+            coverage = covered_items / len(items)
+        else:
+            coverage = min(1.0, len(found) / _PROSE_FULL_COVERAGE)
+        return found, coverage
+
+    def taxonomy_terms(self, text: str) -> Counter:
+        """
+        How often each role title and skill of the bundled taxonomy is
+        mentioned in ``text``, by canonical term ("python", "data analyst").
+
+        Unlike ``skill_counts`` the learned history is left out: the result
+        only ever contains fixed vocabulary, never words taken from the text
+        itself, so it is safe to use as a shared key.
+        """
+        _, is_list = _is_skill_list(text)
+        tokens = _tokens(text)
+        max_phrase = max((len(phrase) for phrase in self._taxonomy_terms), default=1)
+        found = Counter()
+        i = 0
+        while i < len(tokens):
+            for size in range(min(max_phrase, len(tokens) - i), 0, -1):
+                phrase = tokens[i:i + size]
+                if phrase in self._taxonomy_terms and (is_list or size > 1 or phrase[0] not in _PROSE_AMBIGUOUS):
+                    found[self._taxonomy_terms[phrase]] += 1
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def skill_counts(self, text: str) -> Counter:
+        """How often each known skill is mentioned in free text such as a resume."""
+        return Counter(self._scan(text, False))
+
+    def role_profiles(self) -> Tuple[List[_RoleProfile], Dict[Tuple[str, ...], float]]:
+        """The indexed roles and skill IDF weights; rebuilt (as new objects) when the index changes."""
+        roles, _, idf, _, _ = self._get_index()
+        return roles, idf
+
+    def score(self, skills: List[Tuple[str, ...]]) -> List[Tuple[float, _RoleProfile]]:
+        """Roles by cosine similarity to ``skills``, best first."""
+        roles, postings, idf, _, _ = self._get_index()
+        query_norm = math.sqrt(sum(idf[s] ** 2 for s in skills if s in idf))
+        if not query_norm:
+            return []
+        scores: Dict[int, float] = {}
+        for skill in skills:
+            for i, weight in postings.get(skill, ()):
+                scores[i] = scores.get(i, 0.0) + idf[skill] * weight
+        ranked = [(total / (roles[i].norm * query_norm), roles[i]) for i, total in scores.items()]
+        ranked.sort(key=lambda item: (-item[0], item[1].title))
+        return ranked
+
+    def match(self, input_text: str) -> Tuple[Optional[Dict[str, object]], float]:
+        """
+        ``({'roles': [...]}, confidence)`` in the shape match_job_roles returns,
+        or ``(None, confidence)`` when the AI should be asked instead.
+        """
+        skills, coverage = self.extract_skills(input_text or "")
+        ranked = self.score(skills)
+        if len(skills) < 2 or len(ranked) < MIN_ROLES:
+            confidence = 0.0
+        else:
+            strength = sum(score for score, _ in ranked[:MIN_ROLES]) / MIN_ROLES
+            confidence = round(coverage * min(1.0, strength / _STRONG_SCORE), 4)
+        get_histogram("role_match_confidence", buckets=CONFIDENCE_BUCKETS).observe(confidence)
+
+        if confidence < self.config.MIN_CONFIDENCE:
+            self.fallbacks += 1
+            return None, confidence
+        self.local_matches += 1
+
+        # Like the AI, suggest 5-7 roles: the extra two only if they are close to the best one
+        best = ranked[0][0]
+        chosen = ranked[:MIN_ROLES] + [item for item in ranked[MIN_ROLES:MAX_ROLES] if item[0] >= best * 0.5]
+        wanted = set(skills)
+        roles = []
+        for _, profile in chosen:
+            # The user's matching skills first, then the role's most important ones
+            ordered = sorted(profile.weights, key=lambda s: (s not in wanted, -profile.weights[s]))
+            roles.append({
+                "job_title": profile.title,
+                "skills": [profile.skill_names[s] for s in ordered[:SKILLS_PER_ROLE]],
+                "certifications": profile.certifications[:CERTIFICATIONS_PER_ROLE],
+            })
+        return {"roles": roles}, confidence
+
+    def stats(self) -> Dict[str, object]:
+        roles, postings, _, _, _ = self._get_index()
+        return {
+            "enabled": self.config.ENABLED,
+            "min_confidence": self.config.MIN_CONFIDENCE,
+            "roles": len(roles),
+            "skills": len(postings),
+            "history_titles": len(self._history),
+            "history_rows": self._history_rows,
+            "local_matches": self.local_matches,
+            "fallbacks": self.fallbacks,
+        }
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_role_matcher() -> RoleMatcher:
+    """Return the process-wide role matcher, creating it on first use."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = RoleMatcher()
+    return _matcher
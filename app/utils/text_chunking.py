@@ -0,0 +1,115 @@
+import re
+from typing import List
+
+# Rough English average for chat-model tokenizers; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+# Lines that start a new resume section ("EXPERIENCE", "Work History:", ...)
+SECTION_HEADINGS = (
+    'summary', 'profile', 'objective', 'about', 'experience', 'work experience',
+    'employment', 'work history', 'professional experience', 'education',
+    'skills', 'technical skills', 'projects', 'certifications', 'certificates',
+    'awards', 'achievements', 'publications', 'languages', 'interests',
+    'volunteer', 'volunteering', 'activities', 'references', 'courses', 'training',
+)
+_HEADING_RE = re.compile(
+    r'^\s*(?:' + '|'.join(re.escape(h) for h in SECTION_HEADINGS) + r')\s*:?\s*$',
+    re.IGNORECASE
+)
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens ``text`` takes up in a prompt."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if _HEADING_RE.match(stripped):
+        return True
+    # Short all-caps lines ("WORK EXPERIENCE") are headings in most resume layouts
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters)
+
+
+def split_sections(text: str) -> List[str]:
+    """Split a resume into sections at its headings; text before the first heading is its own section."""
+    sections = []
+    current = []
+    for line in text.splitlines():
+        if _is_heading(line) and any(l.strip() for l in current):
+            sections.append('\n'.join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        sections.append('\n'.join(current).strip())
+    return sections
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """Split a block that is over budget on line, then sentence, then hard boundaries."""
+    pieces = []
+    for unit in block.splitlines() or [block]:
+        if len(unit) <= max_chars:
+            pieces.append(unit)
+            continue
+        for sentence in _SENTENCE_END_RE.split(unit):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+    return _pack(pieces, max_chars, '\n')
+
+
+def _pack(pieces: List[str], max_chars: int, joiner: str) -> List[str]:
+    """Greedily join consecutive pieces into chunks of at most ``max_chars``."""
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        candidate = f"{current}{joiner}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int, max_chunks: int = None) -> List[str]:
+    """
+    Split ``text`` into chunks of at most ``max_tokens`` (estimated).
+
+    Section boundaries are preferred, so an "Experience" section stays in
+    one chunk when it fits; small neighbouring sections are packed
+    together, and oversized ones are split on lines and sentences. With
+    ``max_chunks`` the budget per chunk grows instead of the chunk count,
+    which keeps the number of concurrent calls bounded.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if max_chunks:
+        max_tokens = max(max_tokens, -(-estimate_tokens(text) // max_chunks))
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    sections = split_sections(text)
+
+    while True:
+        blocks = []
+        for section in sections:
+            if len(section) <= max_chars:
+                blocks.append(section)
+            else:
+                blocks.extend(_split_oversized(section, max_chars))
+        chunks = _pack(blocks, max_chars, '\n\n')
+        # Greedy packing can overshoot the chunk count slightly; loosen the budget until it fits
+        if not max_chunks or len(chunks) <= max_chunks:
+            return chunks
+        max_chars = int(max_chars * 1.25) + 1
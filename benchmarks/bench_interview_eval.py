@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compare the per-question and batched interview evaluation paths.
+
+The AI provider is replaced by a simulated one whose latency grows with
+prompt and completion size, so the numbers reflect request count, token
+volume and wall time without needing API keys.
+
+Usage:
+    python benchmarks/bench_interview_eval.py [--questions 5] [--rounds 3]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import ai_utils
+
+
+class SimulatedProvider:
+    """Stand-in for ai_request with a simple prefill + decode latency model."""
+
+    def __init__(self, base_latency, prefill_per_token, decode_per_token):
+        self.base_latency = base_latency
+        self.prefill_per_token = prefill_per_token
+        self.decode_per_token = decode_per_token
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @staticmethod
+    def _tokens(text):
+        return max(1, len(text) // 4)
+
+    def __call__(self, messages, temperature=0.7, max_tokens=512, provider=None, **kwargs):
+        prompt = "".join(m["content"] for m in messages)
+        items = re.findall(r"^Item (\d+)$", messages[-1]["content"], re.MULTILINE)
+        evaluation = {
+            "verdict": "Partially Correct",
+            "feedback": "Good structure, but add a concrete example and the measurable outcome. " * 2,
+            "model_answer": "A strong answer names the situation, the action taken and the result. " * 2,
+        }
+        if items:
+            content = json.dumps([dict(evaluation, item=int(n)) for n in items])
+        else:
+            content = json.dumps(evaluation)
+
+        prompt_tokens = self._tokens(prompt)
+        completion_tokens = self._tokens(content)
+        with self.lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        time.sleep(self.base_latency
+                   + prompt_tokens * self.prefill_per_token
+                   + completion_tokens * self.decode_per_token)
+        return {"choices": [{"message": {"content": content}}]}, None
+
+
+def run(mode, concurrency, questions, answers, provider, rounds):
+    timings = []
+    provider.reset()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        evaluations = ai_utils.evaluate_interview_answers(
+            questions, answers, concurrency=concurrency, mode=mode
+        )
+        timings.append(time.perf_counter() - start)
+        assert len(evaluations) == len(questions)
+    return {
+        "mean_s": sum(timings) / len(timings),
+        "requests": provider.requests / rounds,
+        "prompt_tokens": provider.prompt_tokens / rounds,
+        "completion_tokens": provider.completion_tokens / rounds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--base-latency", type=float, default=0.30)
+    parser.add_argument("--prefill", type=float, default=0.0002, help="seconds per prompt token")
+    parser.add_argument("--decode", type=float, default=0.004, help="seconds per completion token")
+    args = parser.parse_args()
+
+    questions = [f"Question {i + 1}: describe a time you improved a slow system?" for i in range(args.questions)]
+    answers = [f"Answer {i + 1}: I profiled the service and cached the hot queries." for i in range(args.questions)]
+
+    provider = SimulatedProvider(args.base_latency, args.prefill, args.decode)
+    ai_utils.ai_request = provider
+    # Keep per-call log lines out of the report
+    ai_utils.log_info = lambda message: None
+
+    scenarios = [
+        ("sequential", "parallel", 1),
+        ("parallel", "parallel", args.questions),
+        ("batch", "batch", args.questions),
+    ]
+    print(f"{'mode':<12}{'wall (s)':>10}{'requests':>10}{'prompt tok':>12}{'completion tok':>16}")
+    for label, mode, concurrency in scenarios:
+        stats = run(mode, concurrency, questions, answers, provider, args.rounds)
+        print(f"{label:<12}{stats['mean_s']:>10.3f}{stats['requests']:>10.1f}"
+              f"{stats['prompt_tokens']:>12.0f}{stats['completion_tokens']:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compare the shared JSON extractor with the old greedy-regex parsing.
+
+Three reports:
+  * corpus   - how many provider outputs in data/llm_json_corpus.jsonl each
+               approach turns into the expected value
+  * scaling  - time per call as the text grows, including text with many
+               unclosed braces, where a greedy ``\\{.*\\}`` search is quadratic
+  * fuzz     - random truncations and noise over the corpus; the extractor
+               must only ever return a value or raise JSONExtractionError
+
+Usage:
+    python benchmarks/bench_json_extract.py [--sizes 1000 10000 100000] [--fuzz 2000]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.json_extract import extract_json, JSONExtractionError
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_json_corpus.jsonl')
+TYPES = {'dict': dict, 'list': list}
+
+
+def legacy_extract(text, expect):
+    """The parsing ai_utils did before: greedy regex, blind clean-up passes, json.loads."""
+    pattern = r'\{.*\}' if expect is dict else r'\[.*\]'
+    match = re.search(pattern, text, re.DOTALL)
+    if not match:
+        raise ValueError("no match")
+    json_str = match.group(0)
+    if expect is dict:
+        for entity, char in (('&quot;', '"'), ('&amp;', '&'), ('&lt;', '<'), ('&gt;', '>')):
+            json_str = json_str.replace(entity, char)
+        json_str = ''.join(char for char in json_str if ord(char) >= 32 or char in '\n\r\t')
+        json_str = json_str.replace('\\"', '"').replace('\\\\', '\\')
+    return json.loads(json_str)
+
+
+def new_extract(text, expect):
+    return extract_json(text, expect=expect, unescape_entities=True)
+
+
+def load_corpus():
+    with open(CORPUS, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def outcome(extract, row):
+    try:
+        return extract(row['output'], TYPES[row['expect']])
+    except ValueError:
+        return None
+
+
+def report_corpus(corpus):
+    print(f"corpus: {len(corpus)} provider outputs")
+    print(f"{'name':<32}{'legacy':>8}{'new':>8}")
+    totals = {'legacy': 0, 'new': 0}
+    for row in corpus:
+        marks = []
+        for label, extract in (('legacy', legacy_extract), ('new', new_extract)):
+            ok = outcome(extract, row) == row['value']
+            totals[label] += ok
+            marks.append('ok' if ok else '-')
+        print(f"{row['name']:<32}{marks[0]:>8}{marks[1]:>8}")
+    print(f"{'expected value recovered':<32}{totals['legacy']:>8}{totals['new']:>8}\n")
+
+
+def time_call(extract, text, expect, budget=2.0):
+    """Mean seconds per call, running for up to ``budget`` seconds (at least once)."""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            extract(text, expect)
+        except ValueError:
+            pass
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget or runs >= 200:
+            return elapsed / runs
+
+
+def report_scaling(sizes):
+    evaluation = json.dumps({"verdict": "Correct", "feedback": "Clear answer.", "model_answer": ""})
+    cases = {
+        # A normal answer surrounded by a lot of prose
+        'prose + object': lambda n: "Here is my evaluation. " * (n // 23) + evaluation,
+        # Markdown/code with braces that never close before the real answer
+        'unclosed braces': lambda n: "{ if (x) " * (n // 9) + evaluation,
+        # The answer was cut off before its closing brace
+        'never closed': lambda n: "{ if (x) " * (n // 9) + evaluation[:-1],
+    }
+    print(f"{'case':<18}{'chars':>9}{'legacy (ms)':>14}{'new (ms)':>11}")
+    for label, make in cases.items():
+        for size in sizes:
+            text = make(size)
+            legacy = time_call(legacy_extract, text, dict) * 1000
+            new = time_call(new_extract, text, dict) * 1000
+            print(f"{label:<18}{len(text):>9}{legacy:>14.3f}{new:>11.3f}")
+    print()
+
+
+def mutate(text, rng):
+    choice = rng.randrange(4)
+    if choice == 0:
+        return text[:rng.randrange(len(text) + 1)]  # cut off like max_tokens
+    if choice == 1:
+        at = rng.randrange(len(text) + 1)
+        return text[:at] + rng.choice(['{', '}', '[', ']', '"', "'", '\\', ',', '\n', '\x00']) + text[at:]
+    if choice == 2:
+        at = rng.randrange(len(text) + 1)
+        return text[:at] + text[at + rng.randrange(1, 8):]
+    return "Note: " + text + " {extra}"
+
+
+def report_fuzz(corpus, iterations, seed):
+    rng = random.Random(seed)
+    parsed = failed = 0
+    slowest = 0.0
+    for _ in range(iterations):
+        row = rng.choice(corpus)
+        text = row['output']
+        for _ in range(rng.randrange(1, 4)):
+            text = mutate(text, rng)
+        start = time.perf_counter()
+        try:
+            extract_json(text, expect=TYPES[row['expect']], unescape_entities=True)
+            parsed += 1
+        except JSONExtractionError:
+            failed += 1
+        # Any other exception propagates and fails the run
+        slowest = max(slowest, time.perf_counter() - start)
+    print(f"fuzz: {iterations} mutated outputs, {parsed} parsed, {failed} rejected cleanly, "
+          f"slowest {slowest * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--fuzz", type=int, default=2000, help="mutated outputs to try (0 to skip)")
+    parser.add_argument("--seed", type=int, default=12)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    report_corpus(corpus)
+    report_scaling(args.sizes)
+    if args.fuzz:
+        report_fuzz(corpus, args.fuzz, args.seed)
+
+
+if __name__ == "__main__":
+    main()
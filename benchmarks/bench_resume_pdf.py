@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare the Platypus resume renderer with the xhtml2pdf (pisa) path.
+
+Renders the same get_user_resume_data-shaped resume with both templates
+at growing sizes (more experience, projects and skills) and reports the
+mean and best render time, the PDF size and the page count. Long
+resumes show whether each renderer paginates or loses content.
+
+Usage:
+    python benchmarks/bench_resume_pdf.py [--sizes 1 5 20 50] [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.utils.resume_pdf import render_resume_pdf
+
+BULLET = ("Led the migration of the billing service to Python 3 and PostgreSQL, cutting p95 latency "
+          "from 900ms to 250ms and saving $40k a year in hosting.")
+
+
+def resume_data(size):
+    """A resume with ``size`` experience entries and as many projects."""
+    return {
+        'personal': {
+            'fullName': 'Jane Doe',
+            'email': 'jane@example.com',
+            'phone': '+1 555 0100',
+            'summary': 'Backend engineer with eight years of experience building reliable services.\n' * 3,
+            'linkedin': 'janedoe',
+            'github': 'https://github.com/janedoe',
+        },
+        'education': [{'institution': 'State University', 'degree': 'B.Sc. Computer Science', 'year': '2016'}],
+        'experience': [{'title': f'Software Engineer {i}', 'company': f'Example Corp {i}',
+                        'duration': f'{2010 + i % 14} - {2011 + i % 14}', 'description': [BULLET] * 3}
+                       for i in range(size)],
+        'projects': [{'title': f'Project {i}', 'description': BULLET * 2} for i in range(size)],
+        'skills': [{'name': f'Skill {i}', 'category': ('Languages', 'Frameworks', 'Cloud')[i % 3]}
+                   for i in range(10 + size)],
+    }
+
+
+def page_count(pdf):
+    try:
+        import fitz
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            return doc.page_count
+    except ImportError:
+        return pdf.count(b'/Type /Page') - pdf.count(b'/Type /Pages')
+
+
+def measure(data, template, rounds):
+    timings = []
+    pdf = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        pdf = render_resume_pdf(data, template)
+        timings.append(time.perf_counter() - start)
+        assert pdf, f'{template} failed to render'
+    return sum(timings) / len(timings), min(timings), len(pdf), page_count(pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.test_request_context():
+        # Warm up: template compilation and font/style setup happen once per process
+        for template in ('classic', 'structured'):
+            render_resume_pdf(resume_data(1), template)
+
+        print(f"{'entries':>7}  {'template':<11}{'mean (ms)':>10}{'best (ms)':>10}{'bytes':>9}{'pages':>7}")
+        for size in args.sizes:
+            data = resume_data(size)
+            results = {}
+            for template in ('classic', 'structured'):
+                results[template] = measure(data, template, args.rounds)
+                mean, best, size_bytes, pages = results[template]
+                print(f"{size:>7}  {template:<11}{mean * 1000:>10.1f}{best * 1000:>10.1f}{size_bytes:>9}{pages:>7}")
+            print(f"{'':>7}  {'speedup':<11}{results['classic'][0] / results['structured'][0]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
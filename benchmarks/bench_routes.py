@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load-test the AI routes end to end against the local stub provider.
+
+Starts app.utils.ai_stub_server in-process, points the app at it and
+drives /resume-analyzer, /job-matcher and the interview simulator
+(question generation, then answer evaluation) from concurrent simulated
+users, each with its own account and session. No API keys or network
+access are needed; with --cassette the stub replays recorded real
+responses. The response cache is off so every request reaches the stub.
+
+Usage:
+    python benchmarks/bench_routes.py [--users 8] [--iterations 5] [--latency lognormal:0.5,0.4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ai_stub_server import start_stub_server
+
+RESUME = """CANDIDATE {user} (round {round})
+candidate{user}@example.com
+
+EXPERIENCE
+Software Engineer, Example Corp (2020 - 2024)
+- Built the billing service in Python and PostgreSQL.
+- Cut p95 checkout latency from 900ms to 250ms.
+
+SKILLS
+Python, Flask, SQL, Docker, AWS
+"""
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def simulate_user(app, user_id, iterations, timings, failures):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    def timed(route, send):
+        start = time.perf_counter()
+        response = send()
+        timings[route].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            failures[route] += 1
+        return response
+
+    for n in range(iterations):
+        # Distinct text per user and round, so single-flight doesn't merge the load
+        resume = RESUME.format(user=user_id, round=n)
+        timed('/resume-analyzer', lambda: client.post('/resume-analyzer', data={
+            'resume_file': (io.BytesIO(resume.encode('utf-8')), 'resume.txt')
+        }, content_type='multipart/form-data'))
+        timed('/job-matcher', lambda: client.post('/job-matcher', data={
+            'manual_input': f'Python, Flask, SQL, Docker; interested in backend roles (user {user_id}, round {n})'
+        }))
+        timed('/interview/interview-simulator', lambda: client.post('/interview/interview-simulator', data={
+            'prompt': resume
+        }))
+        with client.session_transaction() as session:
+            questions = session.get('generated_questions') or []
+        if questions:
+            timed('/interview/evaluate-answers', lambda: client.post('/interview/evaluate-answers', data={
+                f'answer_{i}': f'I would start by measuring, then fix the biggest bottleneck first ({user_id}/{n}/{i}).'
+                for i in range(len(questions))
+            }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=5, help="route rounds per user")
+    parser.add_argument("--latency", default="lognormal:0.5,0.4", help="stub time to first token (see ai_stub_server)")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="stub seconds per completion token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub requests failing with 503")
+    parser.add_argument("--cassette", help="replay recorded responses from this .jsonl file")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, token_delay=args.token_delay,
+                                    error_rate=args.error_rate, seed=args.seed, cassette=args.cassette)
+    # Configure the app before it is imported: stub provider only, no cache, throwaway database
+    os.environ.update({
+        'TOGETHER_API_URL': url,
+        'TOGETHER_API_KEY': 'stub',
+        'OPENROUTER_API_KEY': '',
+        'DEFAULT_AI_PROVIDER': 'together',
+        'AI_CACHE_BACKEND': 'none',
+        'AI_SINGLEFLIGHT_SHARED': 'false',
+        'AI_JOBS_ENABLED': 'false',
+        'DATABASE_URL': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_routes.db'),
+    })
+    random.seed(args.seed)  # number of generated interview questions
+
+    from app import create_app, db
+    from app.models import User
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        user_ids = []
+        for n in range(args.users):
+            user = User(name=f"Bench {n}", email=f"bench{n}@example.com")
+            user.set_password("bench")
+            db.session.add(user)
+            db.session.commit()
+            user_ids.append(user.id)
+
+    timings = defaultdict(list)
+    failures = defaultdict(int)
+    threads = [
+        threading.Thread(target=simulate_user, args=(app, user_id, args.iterations, timings, failures))
+        for user_id in user_ids
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    print(f"{args.users} users x {args.iterations} rounds, stub latency {args.latency}, "
+          f"token delay {args.token_delay}s, error rate {args.error_rate}")
+    print(f"{'route':<32}{'requests':>9}{'failed':>8}{'p50 (s)':>9}{'p95 (s)':>9}{'max (s)':>9}")
+    total = 0
+    for route, values in timings.items():
+        total += len(values)
+        print(f"{route:<32}{len(values):>9}{failures[route]:>8}{percentile(values, 50):>9.3f}"
+              f"{percentile(values, 95):>9.3f}{max(values):>9.3f}")
+    print(f"\n{total} requests in {wall:.2f}s ({total / wall:.1f} req/s); stub: {server.RequestHandlerClass.provider.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
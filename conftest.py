@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+import pytest
+
+# Configuration is read from the environment when the app modules are
+# imported, so the test settings must be in place before the first import
+_tmpdir = tempfile.mkdtemp(prefix='careercraft-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmpdir, 'test.db')
+os.environ['AI_CACHE_BACKEND'] = 'memory'
+os.environ['AI_ROUTING'] = 'static'
+os.environ['AI_JOBS_EMBEDDED_WORKERS'] = '0'
+os.environ['AI_QUESTION_PREFETCH'] = 'false'
+os.environ['EXTRACTION_POOL'] = 'false'
+os.environ['RESUME_PDF_CACHE_DIR'] = os.path.join(_tmpdir, 'resume_pdf_cache')
+os.environ['RESUME_PDF_PRERENDER'] = 'false'
+
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(name='Test User', email='test@example.com', current_role='tester')
+    user.set_password('testpassword123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as ``user``."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,60 @@
+"""Add extracted_document table and job_match_result.document_id
+
+Revision ID: 1d1c402eb5ef
+Revises: 5768750b2c96
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d1c402eb5ef'
+down_revision = '5768750b2c96'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if not _has_table('extracted_document'):
+        op.create_table('extracted_document',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('extractor', sa.String(length=20), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('extracted_document', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_extracted_document_sha256'), ['sha256'], unique=True)
+
+    if not _has_column('job_match_result', 'document_id'):
+        with op.batch_alter_table('job_match_result', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('document_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_job_match_result_document_id', 'extracted_document', ['document_id'], ['id'])
+
+
+def downgrade():
+    # Named by this revision, or by the database when create_all added the column
+    names = [fk['name'] for fk in sa.inspect(op.get_bind()).get_foreign_keys('job_match_result')
+             if fk['constrained_columns'] == ['document_id'] and fk['name']]
+    with op.batch_alter_table('job_match_result', schema=None) as batch_op:
+        for name in names:
+            batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.drop_column('document_id')
+
+    with op.batch_alter_table('extracted_document', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_extracted_document_sha256'))
+
+    op.drop_table('extracted_document')
@@ -0,0 +1,32 @@
+"""Add resume_analyzer.preanalysis
+
+Revision ID: 5768750b2c96
+Revises: d941629114f7
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5768750b2c96'
+down_revision = 'd941629114f7'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if _has_column('resume_analyzer', 'preanalysis'):
+        return
+    with op.batch_alter_table('resume_analyzer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preanalysis', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('resume_analyzer', schema=None) as batch_op:
+        batch_op.drop_column('preanalysis')
@@ -0,0 +1,76 @@
+"""Add bulk_analysis_run and bulk_analysis_item tables
+
+Revision ID: 67df9444656d
+Revises: 1d1c402eb5ef
+Create Date: 2026-10-18 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '67df9444656d'
+down_revision = '1d1c402eb5ef'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('bulk_analysis_run'):
+        op.create_table('bulk_analysis_run',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=500), nullable=False),
+        sa.Column('label', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('succeeded', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('duplicates', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('bulk_analysis_run', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_bulk_analysis_run_status'), ['status'], unique=False)
+            batch_op.create_index(batch_op.f('ix_bulk_analysis_run_user_id'), ['user_id'], unique=False)
+
+    if not _has_table('bulk_analysis_item'):
+        op.create_table('bulk_analysis_item',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=500), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('analysis_id', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['analysis_id'], ['resume_analyzer.id'], ),
+        sa.ForeignKeyConstraint(['run_id'], ['bulk_analysis_run.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_id', 'name', name='uq_bulk_analysis_item_run_name')
+        )
+        with op.batch_alter_table('bulk_analysis_item', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_bulk_analysis_item_run_id'), ['run_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_bulk_analysis_item_sha256'), ['sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bulk_analysis_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bulk_analysis_item_sha256'))
+        batch_op.drop_index(batch_op.f('ix_bulk_analysis_item_run_id'))
+
+    op.drop_table('bulk_analysis_item')
+    with op.batch_alter_table('bulk_analysis_run', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bulk_analysis_run_user_id'))
+        batch_op.drop_index(batch_op.f('ix_bulk_analysis_run_status'))
+
+    op.drop_table('bulk_analysis_run')
@@ -0,0 +1,62 @@
+"""Add ai_job table for the background AI job queue
+
+Databases are normally created with db.create_all (init_db.py), so each
+revision in this series only creates what is missing: it brings a
+database created before the change up to date and is a no-op on one
+created after it.
+
+Revision ID: a73cb711caa2
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a73cb711caa2'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if _has_table('ai_job'):
+        return
+    op.create_table('ai_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('payload_json', sa.Text(), server_default='{}', nullable=False),
+    sa.Column('result_json', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ai_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ai_job_run_after'), ['run_after'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ai_job_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ai_job_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ai_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ai_job_user_id'))
+        batch_op.drop_index(batch_op.f('ix_ai_job_status'))
+        batch_op.drop_index(batch_op.f('ix_ai_job_run_after'))
+
+    op.drop_table('ai_job')
@@ -0,0 +1,83 @@
+"""Add question_bucket, bank_question and served_bank_question tables
+
+Revision ID: d941629114f7
+Revises: a73cb711caa2
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd941629114f7'
+down_revision = 'a73cb711caa2'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('question_bucket'):
+        op.create_table('question_bucket',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('terms', sa.Text(), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False),
+        sa.Column('last_requested_at', sa.DateTime(), nullable=True),
+        sa.Column('refill_requested_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('question_bucket', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_question_bucket_fingerprint'), ['fingerprint'], unique=True)
+            batch_op.create_index(batch_op.f('ix_question_bucket_last_requested_at'), ['last_requested_at'], unique=False)
+
+    if not _has_table('bank_question'):
+        op.create_table('bank_question',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket_id', sa.Integer(), nullable=False),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('question_hash', sa.String(length=64), nullable=False),
+        sa.Column('times_served', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['bucket_id'], ['question_bucket.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bucket_id', 'question_hash', name='uq_bank_question_bucket_hash')
+        )
+        with op.batch_alter_table('bank_question', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_bank_question_bucket_id'), ['bucket_id'], unique=False)
+
+    if not _has_table('served_bank_question'):
+        op.create_table('served_bank_question',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('served_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['bank_question.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'question_id', name='uq_served_bank_question_user_question')
+        )
+        with op.batch_alter_table('served_bank_question', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_served_bank_question_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('served_bank_question', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_served_bank_question_user_id'))
+
+    op.drop_table('served_bank_question')
+    with op.batch_alter_table('bank_question', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bank_question_bucket_id'))
+
+    op.drop_table('bank_question')
+    with op.batch_alter_table('question_bucket', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_bucket_last_requested_at'))
+        batch_op.drop_index(batch_op.f('ix_question_bucket_fingerprint'))
+
+    op.drop_table('question_bucket')
@@ -0,0 +1,219 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import ai_resilience, ai_utils
+from app.utils.ai_client import AIClientConfig, AsyncProviderClient, ProviderClient, HAS_HTTPX
+from app.utils.ai_resilience import CircuitBreaker, ai_deadline, deadline_remaining, deadline_scope, is_provider_failure
+from app.utils.ai_router import ProviderRouter
+from app.utils.ai_stub_server import start_stub_server
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()['rejected'] == 1
+    assert breaker.snapshot()['times_opened'] == 1
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05, half_open_max_calls=1)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()['times_opened'] == 2
+
+
+def test_released_probe_can_be_taken_again():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_nested_deadline_can_only_shorten():
+    assert deadline_remaining() is None
+    with deadline_scope(1.0):
+        with deadline_scope(10.0):
+            assert deadline_remaining() <= 1.0
+        with deadline_scope(0.2):
+            assert deadline_remaining() <= 0.2
+    assert deadline_remaining() is None
+
+
+def test_deadline_reaches_worker_threads_through_copied_context():
+    with deadline_scope(2.0):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            copied = executor.submit(contextvars.copy_context().run, deadline_remaining).result()
+            plain = executor.submit(deadline_remaining).result()
+    assert 0 < copied <= 2.0
+    assert plain is None
+
+
+def test_route_decorator_uses_the_app_budget(app):
+    app.config['AI_REQUEST_BUDGET'] = 3
+
+    @ai_deadline()
+    def view():
+        return deadline_remaining()
+
+    with app.test_request_context():
+        assert 0 < view() <= 3
+
+
+def test_ai_request_fails_fast_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(ai_utils, 'together_ai_request', lambda *args: pytest.fail('provider called'))
+    with deadline_scope(0):
+        result, error = ai_utils.ai_request([{'role': 'user', 'content': 'hi'}], provider='together', cache=False)
+    assert result is None
+    assert 'deadline' in error
+
+
+def test_open_breaker_skips_the_provider(monkeypatch):
+    breaker = CircuitBreaker('together', failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setitem(ai_resilience._breakers, 'together', breaker)
+    monkeypatch.setattr(ai_utils, 'together_ai_request', lambda *args: pytest.fail('provider called'))
+    result, error = ai_utils.ai_request([{'role': 'user', 'content': 'hi'}], provider='together', cache=False)
+    assert result is None
+    assert error
+
+
+@pytest.fixture
+def failing_provider():
+    server, url = start_stub_server(error_rate=1.0, latency='fixed:0.1')
+    yield server, url
+    server.shutdown()
+
+
+def _client(retries=2, backoff=0.5):
+    config = AIClientConfig()
+    config.MAX_RETRIES = retries
+    config.BACKOFF_FACTOR = backoff
+    return ProviderClient(config)
+
+
+def test_status_retries_without_a_deadline(failing_provider):
+    server, url = failing_provider
+    response = _client(backoff=0.01).post(url, json={'messages': []})
+    assert response.status_code == 503
+    assert server.RequestHandlerClass.provider.requests == 3
+
+
+def test_status_retries_stay_within_the_budget(failing_provider):
+    server, url = failing_provider
+    started = time.monotonic()
+    response = _client(retries=5, backoff=0.3).post(url, timeout=1.0, json={'messages': []})
+    assert response.status_code == 503
+    assert time.monotonic() - started < 1.0
+    # 0.1s call, 0.3s wait, 0.1s call; the next 0.6s wait no longer fits
+    assert server.RequestHandlerClass.provider.requests == 2
+
+
+def test_retry_after_longer_than_the_budget_is_not_waited_for():
+    server, url = start_stub_server(rate_limit_rate=1.0)
+    try:
+        started = time.monotonic()
+        response = _client().post(url, timeout=0.5, json={'messages': []})
+        assert response.status_code == 429
+        assert time.monotonic() - started < 0.5
+        assert server.RequestHandlerClass.provider.requests == 1
+    finally:
+        server.shutdown()
+
+
+@pytest.mark.skipif(not HAS_HTTPX, reason='httpx is not installed')
+def test_async_retries_stay_within_the_budget(failing_provider):
+    server, url = failing_provider
+    config = AIClientConfig()
+    config.MAX_RETRIES = 5
+    config.BACKOFF_FACTOR = 0.3
+
+    async def post():
+        client = AsyncProviderClient(config)
+        try:
+            return await client.post(url, timeout=1.0, json={'messages': []})
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(post())
+    assert response.status_code == 503
+    assert time.monotonic() - started < 1.0
+    assert server.RequestHandlerClass.provider.requests == 2
+
+
+@pytest.mark.parametrize('error, counts', [
+    ('Connection refused', True),
+    ('503 Service Unavailable', True),
+    ('Together API error: 429 slow down', True),
+    ('OpenRouter API error: 500 upstream', True),
+    ('400 {"error": "context length exceeded"}', False),
+    ('OpenRouter API error: 422 invalid request', False),
+])
+def test_only_provider_side_errors_count_against_the_breaker(error, counts):
+    assert is_provider_failure(error) is counts
+
+
+def _routes(monkeypatch, outcomes):
+    """Two providers with fresh breakers; ``outcomes`` maps provider -> (result, error)."""
+    calls = []
+    for name in ('together', 'openrouter'):
+        monkeypatch.setitem(ai_resilience._breakers, name, CircuitBreaker(name, failure_threshold=2))
+
+    def fn(route):
+        calls.append(route[0])
+        return outcomes[route[0]]
+    return [('together', 'a'), ('openrouter', 'b')], fn, calls
+
+
+def test_request_errors_neither_trip_the_breaker_nor_fail_over(monkeypatch):
+    routes, fn, calls = _routes(monkeypatch, {'together': (None, '400 context length exceeded'),
+                                              'openrouter': ({'ok': True}, None)})
+    router = ProviderRouter()
+    for _ in range(3):
+        assert router.call(routes, fn) == (None, '400 context length exceeded')
+    assert calls == ['together'] * 3
+    assert ai_resilience._breakers['together'].state == CircuitBreaker.CLOSED
+
+
+def test_server_errors_trip_the_breaker_and_fail_over(monkeypatch):
+    routes, fn, calls = _routes(monkeypatch, {'together': (None, '503 unavailable'),
+                                              'openrouter': ({'ok': True}, None)})
+    router = ProviderRouter()
+    for _ in range(2):
+        assert router.call(routes, fn) == ({'ok': True}, None)
+    assert ai_resilience._breakers['together'].state == CircuitBreaker.OPEN
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import ai_utils
+from app.utils.ai_resilience import deadline_scope
+from app.utils.ai_singleflight import SingleFlight, SharedFlightRegistry, build_singleflight_from_env
+
+
+def _slow_call(counter, outcome=({'ok': True}, None), delay=0.2):
+    def call():
+        with counter['lock']:
+            counter['calls'] += 1
+        time.sleep(delay)
+        return outcome
+    return call
+
+
+def _counter():
+    return {'calls': 0, 'lock': threading.Lock()}
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    singleflight = SingleFlight()
+    counter = _counter()
+    call = _slow_call(counter)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outcomes = list(executor.map(lambda _: singleflight.do('key', call), range(8)))
+    assert counter['calls'] == 1
+    assert outcomes == [({'ok': True}, None)] * 8
+    stats = singleflight.stats()
+    assert stats['upstream_calls'] == 1
+    assert stats['coalesced_in_process'] == 7
+    assert stats['in_flight'] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    singleflight = SingleFlight()
+    counter = _counter()
+    call = _slow_call(counter, delay=0.05)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda i: singleflight.do(f'key-{i}', call), range(4)))
+    assert counter['calls'] == 4
+
+
+def test_follower_gives_up_at_its_deadline():
+    singleflight = SingleFlight()
+    counter = _counter()
+    leader = threading.Thread(target=singleflight.do, args=('key', _slow_call(counter, delay=1.0)))
+    leader.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    with deadline_scope(0.1):
+        result, error = singleflight.do('key', _slow_call(counter))
+    waited = time.monotonic() - started
+    leader.join()
+    assert result is None
+    assert 'deadline' in error
+    assert waited < 0.5
+    assert counter['calls'] == 1
+
+
+def test_shared_registry_coalesces_across_instances(tmp_path):
+    path = str(tmp_path / 'inflight.sqlite3')
+    # Two instances stand in for two worker processes on one host
+    first = SingleFlight(SharedFlightRegistry(path, poll_interval=0.01))
+    second = SingleFlight(SharedFlightRegistry(path, poll_interval=0.01))
+    counter = _counter()
+    leader = threading.Thread(target=first.do, args=('key', _slow_call(counter, outcome=({'n': 1}, None))))
+    leader.start()
+    time.sleep(0.05)
+    assert second.do('key', _slow_call(counter, outcome=({'n': 2}, None))) == ({'n': 1}, None)
+    leader.join()
+    assert counter['calls'] == 1
+    assert second.stats()['coalesced_across_processes'] == 1
+
+
+def test_shared_registry_is_opt_in(monkeypatch):
+    monkeypatch.delenv('AI_SINGLEFLIGHT_SHARED', raising=False)
+    monkeypatch.setenv('AI_SINGLEFLIGHT', 'true')
+    assert build_singleflight_from_env().registry is None
+
+
+def test_uncached_requests_are_never_merged(monkeypatch):
+    counter = _counter()
+
+    def together(messages, temperature, max_tokens):
+        with counter['lock']:
+            counter['calls'] += 1
+        time.sleep(0.2)
+        return {'choices': [{'message': {'content': str(counter['calls'])}}]}, None
+
+    monkeypatch.setattr(ai_utils, 'together_ai_request', together)
+    messages = [{'role': 'user', 'content': 'Evaluate this answer'}]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: ai_utils.ai_request(messages, provider='together', cache=False), range(3)))
+    assert counter['calls'] == 3
+
+
+def test_cacheable_requests_are_merged(monkeypatch):
+    counter = _counter()
+
+    def together(messages, temperature, max_tokens):
+        with counter['lock']:
+            counter['calls'] += 1
+        time.sleep(0.2)
+        return {'choices': [{'message': {'content': 'shared'}}]}, None
+
+    monkeypatch.setattr(ai_utils, 'together_ai_request', together)
+    messages = [{'role': 'user', 'content': f'Match roles {os.getpid()} {time.time()}'}]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(lambda _: ai_utils.ai_request(messages, provider='together', cache=True), range(3)))
+    assert counter['calls'] == 1
+    assert all(result for result, _ in results)
+
+
+def test_shared_registry_wait_is_bounded_by_the_deadline(tmp_path):
+    registry = SharedFlightRegistry(str(tmp_path / 'inflight.sqlite3'), claim_timeout=30, poll_interval=0.01)
+    # Another process owns the flight and never finishes within our budget
+    assert registry.claim('key', time.time()) == (True, None)
+    other = SharedFlightRegistry(registry.path, claim_timeout=30, poll_interval=0.01)
+    started = time.monotonic()
+    with deadline_scope(0.2):
+        owner, outcome = other.claim('key', time.time())
+    assert time.monotonic() - started < 1.0
+    assert not owner
+    assert outcome == (None, 'AI request deadline exceeded')
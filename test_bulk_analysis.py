@@ -0,0 +1,212 @@
+import io
+import zipfile
+import warnings
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import SAWarning
+
+from app import db
+from app.models import BulkAnalysisRun, BulkAnalysisItem, ResumeAnalyzer
+from app.utils import bulk_analysis
+
+
+@pytest.fixture
+def staff(monkeypatch, user):
+    monkeypatch.setenv('STAFF_EMAILS', user.email)
+
+
+@pytest.fixture
+def no_background_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk_analysis.bulk_config, 'UPLOAD_DIR', str(tmp_path))
+    started = []
+    monkeypatch.setattr('app.routes.resume.start_bulk_analysis', started.append)
+    return started
+
+
+def _zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('a.txt', 'Jane Doe\nPython developer with Flask and SQL experience.')
+    buffer.seek(0)
+    return {'archive': (buffer, 'resumes.zip')}
+
+
+def test_bulk_runs_are_staff_only(client, no_background_runs):
+    assert client.get('/resume-analyzer/bulk').status_code == 403
+    response = client.post('/resume-analyzer/bulk', data=_zip(), content_type='multipart/form-data')
+    assert response.status_code == 403
+    assert not no_background_runs
+
+
+def test_bulk_runs_need_a_login(app, no_background_runs):
+    response = app.test_client().get('/resume-analyzer/bulk')
+    assert response.status_code in (302, 401)
+
+
+def test_staff_can_start_one_run_at_a_time(client, user, staff, no_background_runs):
+    response = client.post('/resume-analyzer/bulk', data=_zip(), content_type='multipart/form-data')
+    assert response.status_code == 202
+    response = client.post('/resume-analyzer/bulk', data=_zip(), content_type='multipart/form-data')
+    assert response.status_code == 429
+    assert len(no_background_runs) == 1
+
+    run = BulkAnalysisRun.query.filter_by(user_id=user.id).one()
+    run.status = 'completed'
+    db.session.commit()
+    response = client.post('/resume-analyzer/bulk', data=_zip(), content_type='multipart/form-data')
+    assert response.status_code == 202
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+RESUMES = {
+    'a.txt': 'Jane Doe\nPython developer with Flask and SQL experience.',
+    'b.txt': 'John Roe\nData analyst with Excel, Tableau and SQL.',
+    'c.txt': 'Ann Poe\nFrontend engineer with React and TypeScript.',
+}
+
+
+@pytest.fixture
+def resumes(tmp_path):
+    def write(files):
+        for name, text in files.items():
+            (tmp_path / name).write_text(text)
+        return str(tmp_path)
+    return write
+
+
+@pytest.fixture
+def failing():
+    """Resume texts the stubbed analyze_resume fails on."""
+    return set()
+
+
+@pytest.fixture
+def analyzed(monkeypatch, failing):
+    """Stub analyze_resume; records the texts it was called with."""
+    calls = []
+
+    def analyze_resume(text, preanalysis=None):
+        calls.append(text)
+        if text in failing:
+            return {'error': 'AI service unavailable'}
+        return {'feedback': f'Feedback for {text.splitlines()[0]}'}
+
+    monkeypatch.setattr(bulk_analysis, 'analyze_resume', analyze_resume)
+    return calls
+
+
+def _items(run):
+    return {item.name: item for item in BulkAnalysisItem.query.filter_by(run_id=run.id)}
+
+
+def test_identical_files_are_analyzed_once(user, resumes, analyzed):
+    source = resumes({**RESUMES, 'copy-of-a.txt': RESUMES['a.txt']})
+    run = bulk_analysis.run_bulk_analysis(bulk_analysis.create_bulk_run(user.id, source).id)
+
+    assert run.status == 'completed'
+    assert (run.total, run.succeeded, run.duplicates, run.failed) == (4, 3, 1, 0)
+    assert sorted(analyzed) == sorted(RESUMES.values())
+    items = _items(run)
+    assert items['copy-of-a.txt'].status == 'duplicate'
+    assert items['copy-of-a.txt'].analysis_id == items['a.txt'].analysis_id
+    assert ResumeAnalyzer.query.filter_by(user_id=user.id).count() == 3
+
+
+def test_duplicate_waits_for_an_analysis_still_in_flight(monkeypatch, user, resumes, analyzed):
+    # Hold the AI call until the reader is done, so the duplicate's result
+    # reaches the writer before the analysis it shares
+    read = bulk_analysis.BulkPipeline._read
+    done_reading = threading.Event()
+
+    def _read(self, *args):
+        try:
+            read(self, *args)
+        finally:
+            done_reading.set()
+
+    stub = bulk_analysis.analyze_resume
+
+    def analyze_resume(text, preanalysis=None):
+        done_reading.wait(5)
+        return stub(text, preanalysis=preanalysis)
+
+    monkeypatch.setattr(bulk_analysis.BulkPipeline, '_read', _read)
+    monkeypatch.setattr(bulk_analysis, 'analyze_resume', analyze_resume)
+    monkeypatch.setattr(bulk_analysis.bulk_config, 'BATCH_SIZE', 1)
+    source = resumes({'a.txt': RESUMES['a.txt'], 'z.txt': RESUMES['a.txt']})
+    run = bulk_analysis.run_bulk_analysis(bulk_analysis.create_bulk_run(user.id, source).id)
+
+    assert (run.succeeded, run.duplicates, run.failed) == (1, 1, 0)
+    items = _items(run)
+    assert items['z.txt'].status == 'duplicate'
+    assert items['z.txt'].analysis_id == items['a.txt'].analysis_id is not None
+
+
+def test_results_are_written_in_batches(monkeypatch, user, resumes, analyzed):
+    monkeypatch.setattr(bulk_analysis.bulk_config, 'BATCH_SIZE', 2)
+    monkeypatch.setattr(bulk_analysis.bulk_config, 'FLUSH_INTERVAL', 60)
+    source = resumes({**RESUMES, 'd.txt': 'Sam Loe\nDevOps engineer.', 'e.txt': 'Kim Moe\nQA engineer.'})
+    checkpoints = []
+    run = bulk_analysis.run_bulk_analysis(bulk_analysis.create_bulk_run(user.id, source).id,
+                                          progress=lambda run: checkpoints.append(run.succeeded))
+
+    assert checkpoints == [2, 4, 5]
+    assert run.succeeded == 5
+
+
+def test_resume_retries_failed_items_and_skips_finished_ones(user, resumes, analyzed, failing):
+    source = resumes({**RESUMES, 'copy-of-b.txt': RESUMES['b.txt']})
+    failing.add(RESUMES['b.txt'])
+    run = bulk_analysis.run_bulk_analysis(bulk_analysis.create_bulk_run(user.id, source).id)
+
+    assert run.status == 'completed'
+    assert (run.succeeded, run.duplicates, run.failed) == (2, 0, 2)
+    assert bulk_analysis.is_resumable(run)
+
+    analyzed.clear()
+    failing.clear()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', SAWarning)
+        run = bulk_analysis.run_bulk_analysis(run.id)
+
+    assert analyzed == [RESUMES['b.txt']]
+    assert (run.succeeded, run.duplicates, run.failed) == (3, 1, 0)
+    assert {name: item.status for name, item in _items(run).items()} == {
+        'a.txt': 'succeeded', 'b.txt': 'succeeded', 'c.txt': 'succeeded', 'copy-of-b.txt': 'duplicate'}
+    assert not bulk_analysis.is_resumable(run)
+
+
+def test_interrupted_run_resumes_after_its_checkpoint(user, resumes, analyzed):
+    source = resumes({**RESUMES, 'copy-of-a.txt': RESUMES['a.txt']})
+    run = bulk_analysis.create_bulk_run(user.id, source)
+    # What a run that stopped after its first checkpoint leaves behind
+    analysis = ResumeAnalyzer(user_id=user.id, filename='a.txt', suggestions='Earlier feedback')
+    db.session.add(analysis)
+    db.session.flush()
+    sha256 = bulk_analysis.hashlib.sha256(RESUMES['a.txt'].encode()).hexdigest()
+    # Kept in the session, as it is after a run is shown: the retry's items must not clash with it
+    failed = BulkAnalysisItem(run_id=run.id, name='b.txt', status='failed', error='AI service unavailable')
+    db.session.add_all([
+        BulkAnalysisItem(run_id=run.id, name='a.txt', sha256=sha256, status='succeeded', analysis_id=analysis.id),
+        failed,
+    ])
+    run.status, run.succeeded, run.failed = 'running', 1, 1
+    run.updated_at = datetime.utcnow() - timedelta(seconds=bulk_analysis.bulk_config.STALE_AFTER + 60)
+    db.session.commit()
+    assert bulk_analysis.is_resumable(run)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', SAWarning)
+        run = bulk_analysis.run_bulk_analysis(run.id)
+
+    assert sorted(analyzed) == sorted([RESUMES['b.txt'], RESUMES['c.txt']])
+    assert run.status == 'completed'
+    assert (run.succeeded, run.duplicates, run.failed) == (3, 1, 0)
+    items = _items(run)
+    assert len(items) == 4
+    assert items['copy-of-a.txt'].analysis_id == analysis.id
@@ -0,0 +1,30 @@
+import os
+from multiprocessing import util
+
+import pytest
+
+from app.utils import extraction_pool
+from app.utils.extraction_pool import ExtractionPool, ExtractionPoolConfig
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_child_drops_the_inherited_pool(monkeypatch):
+    config = ExtractionPoolConfig()
+    config.WORKERS = 1
+    pool = ExtractionPool(config)
+    monkeypatch.setattr(extraction_pool, '_extraction_pool', pool)
+    inherited = pool._get_pool()[0]
+    try:
+        pid = os.fork()
+        if pid == 0:
+            # Like a gunicorn worker forked from a --preload master, exiting normally
+            dropped = pool._pool is None
+            util._exit_function()
+            os._exit(0 if dropped else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        # The child's exit left the parent's workers alone
+        assert pool._pool is inherited
+        assert all(worker.is_alive() for worker in inherited._pool)
+    finally:
+        pool.close()
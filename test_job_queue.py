@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import AIJob
+from app.utils import job_queue
+from app.utils.job_queue import PermanentJobError, QueueFullError, claim_next, enqueue, job_config, run_job
+
+
+@pytest.fixture
+def echo_task(monkeypatch):
+    """A registered task whose behaviour each test sets through ``calls``."""
+    calls = []
+
+    def handler(user_id, payload):
+        calls.append(payload)
+        if payload.get('fail') == 'permanent':
+            raise PermanentJobError('bad input')
+        if payload.get('fail'):
+            raise RuntimeError('provider down')
+        return {'echo': payload}
+
+    monkeypatch.setitem(job_queue.TASKS, 'echo', handler)
+    return calls
+
+
+def test_enqueue_rejects_unknown_kinds(app, user):
+    with pytest.raises(ValueError):
+        enqueue('no-such-task', {}, user.id)
+
+
+def test_queue_full_error_at_the_per_user_limit(app, user, echo_task, monkeypatch):
+    monkeypatch.setattr(job_config, 'MAX_PENDING_PER_USER', 2)
+    enqueue('echo', {}, user.id)
+    enqueue('echo', {}, user.id)
+    with pytest.raises(QueueFullError):
+        enqueue('echo', {}, user.id)
+
+
+def test_finished_jobs_free_the_users_slots(app, user, echo_task, monkeypatch):
+    monkeypatch.setattr(job_config, 'MAX_PENDING_PER_USER', 1)
+    job = enqueue('echo', {'n': 1}, user.id)
+    run_job(claim_next('w1'), 'w1')
+    assert db.session.get(AIJob, job.id).status == 'succeeded'
+    enqueue('echo', {'n': 2}, user.id)
+
+
+def test_claim_leases_the_job_to_one_worker(app, user, echo_task):
+    job = enqueue('echo', {}, user.id)
+    claimed = claim_next('w1')
+    assert claimed.id == job.id
+    assert claimed.status == 'running'
+    assert claimed.locked_by == 'w1'
+    assert claimed.attempts == 1
+    assert claim_next('w2') is None
+
+
+def test_claim_respects_run_after(app, user, echo_task):
+    job = enqueue('echo', {}, user.id)
+    job.run_after = datetime.utcnow() + timedelta(minutes=5)
+    db.session.commit()
+    assert claim_next('w1') is None
+
+
+def test_expired_lease_is_taken_over(app, user, echo_task):
+    job = enqueue('echo', {}, user.id)
+    claim_next('w1')
+    AIJob.query.filter_by(id=job.id).update({'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    claimed = claim_next('w2')
+    assert claimed.id == job.id
+    assert claimed.locked_by == 'w2'
+    assert claimed.attempts == 2
+
+
+def test_stale_worker_cannot_finish_a_taken_over_job(app, user, echo_task):
+    job = enqueue('echo', {'n': 1}, user.id)
+    stale = claim_next('w1')
+    AIJob.query.filter_by(id=job.id).update({'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    claim_next('w2')
+    run_job(stale, 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.status == 'running'
+    assert job.locked_by == 'w2'
+
+
+def test_lease_expiring_on_the_last_attempt_fails_the_job(app, user, echo_task):
+    job = enqueue('echo', {}, user.id, max_attempts=1)
+    claim_next('w1')
+    AIJob.query.filter_by(id=job.id).update({'locked_until': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert claim_next('w2') is None
+    db.session.expire_all()
+    assert db.session.get(AIJob, job.id).status == 'failed'
+
+
+def test_successful_job_stores_its_result(app, user, echo_task):
+    job = enqueue('echo', {'n': 1}, user.id)
+    run_job(claim_next('w1'), 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.status == 'succeeded'
+    assert job.to_dict()['result'] == {'echo': {'n': 1}}
+    assert job.locked_by is None
+
+
+def test_failed_attempt_is_retried_with_backoff(app, user, echo_task, monkeypatch):
+    monkeypatch.setattr(job_config, 'RETRY_BACKOFF', 10)
+    job = enqueue('echo', {'fail': True}, user.id, max_attempts=3)
+
+    before = datetime.utcnow()
+    run_job(claim_next('w1'), 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.status == 'queued'
+    assert job.error == 'provider down'
+    assert timedelta(seconds=9) < job.run_after - before < timedelta(seconds=12)
+    # Not runnable again until the backoff has passed
+    assert claim_next('w1') is None
+
+    job.run_after = datetime.utcnow()
+    db.session.commit()
+    before = datetime.utcnow()
+    run_job(claim_next('w1'), 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.attempts == 2
+    assert timedelta(seconds=19) < job.run_after - before < timedelta(seconds=22)
+
+
+def test_job_fails_after_its_last_attempt(app, user, echo_task):
+    job = enqueue('echo', {'fail': True}, user.id, max_attempts=1)
+    run_job(claim_next('w1'), 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.status == 'failed'
+    assert job.finished_at is not None
+
+
+def test_permanent_errors_are_not_retried(app, user, echo_task):
+    job = enqueue('echo', {'fail': 'permanent'}, user.id, max_attempts=3)
+    run_job(claim_next('w1'), 'w1')
+    db.session.expire_all()
+    job = db.session.get(AIJob, job.id)
+    assert job.status == 'failed'
+    assert job.attempts == 1
+    assert len(echo_task) == 1
+
+
+def test_unmetered_kinds_ignore_the_per_user_limit(app, user, echo_task, monkeypatch):
+    monkeypatch.setattr(job_config, 'MAX_PENDING_PER_USER', 1)
+    monkeypatch.setitem(job_queue.TASKS, 'upkeep', lambda user_id, payload: {})
+    monkeypatch.setattr(job_queue, 'UNMETERED_KINDS', {'upkeep'})
+    enqueue('upkeep', {}, user.id)
+    enqueue('upkeep', {}, user.id)
+    # Upkeep jobs don't take the user's own slot either
+    enqueue('echo', {}, user.id)
+    with pytest.raises(QueueFullError):
+        enqueue('echo', {}, user.id)
@@ -0,0 +1,76 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from app.utils.json_extract import JSONExtractionError, extract_json, iter_json_spans
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'data', 'llm_json_corpus.jsonl')
+TYPES = {'dict': dict, 'list': list}
+
+
+def load_corpus():
+    with open(CORPUS, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize('row', load_corpus(), ids=lambda row: row['name'])
+def test_corpus_output_yields_the_expected_value(row):
+    expect = TYPES[row['expect']]
+    if row['value'] is None:
+        with pytest.raises(JSONExtractionError):
+            extract_json(row['output'], expect=expect, unescape_entities=True)
+    else:
+        assert extract_json(row['output'], expect=expect, unescape_entities=True) == row['value']
+
+
+def test_expect_skips_values_of_the_other_type():
+    text = 'Meta: {"note": "x"} Answer: ["a", "b"]'
+    assert extract_json(text, expect=list) == ['a', 'b']
+    assert extract_json(text, expect=dict) == {'note': 'x'}
+
+
+def test_empty_text_is_rejected():
+    with pytest.raises(JSONExtractionError):
+        extract_json('')
+
+
+def test_spans_ignore_brackets_inside_strings():
+    text = 'x {"a": "}{", "b": [1]} y'
+    assert list(iter_json_spans(text)) == [(2, len(text) - 2, True)]
+
+
+def test_unclosed_braces_scan_in_linear_time():
+    evaluation = json.dumps({'verdict': 'Correct', 'feedback': 'Clear.', 'model_answer': ''})
+    small = '{ if (x) ' * 1000 + evaluation
+    large = '{ if (x) ' * 20000 + evaluation
+    timings = []
+    for text in (small, large):
+        started = time.perf_counter()
+        try:
+            extract_json(text, expect=dict)
+        except JSONExtractionError:
+            pass  # the value is nested in one that never closes; only the time matters here
+        timings.append(time.perf_counter() - started)
+    # 20x the text; a quadratic scan would take ~400x as long
+    assert timings[1] < max(timings[0], 0.001) * 100
+
+
+def test_mangled_outputs_parse_or_raise_extraction_errors():
+    rng = random.Random(12)
+    corpus = load_corpus()
+    for _ in range(500):
+        row = rng.choice(corpus)
+        text = row['output']
+        at = rng.randrange(len(text) + 1)
+        text = rng.choice([
+            text[:at],
+            text[:at] + rng.choice('{}[]"\'\\,\n\x00') + text[at:],
+            text[:at] + text[at + rng.randrange(1, 8):],
+        ])
+        try:
+            extract_json(text, expect=TYPES[row['expect']], unescape_entities=True)
+        except JSONExtractionError:
+            pass
@@ -0,0 +1,22 @@
+from app.utils.question_bank import question_fingerprint
+
+
+def test_fingerprint_ignores_order_case_and_punctuation():
+    assert question_fingerprint('Flask, Python') == question_fingerprint('python / FLASK')
+
+
+def test_fingerprint_keeps_only_taxonomy_terms():
+    prompt = 'Candidate: Priya Raman. Experience: Acme Corp, built APIs in Python and Flask.'
+    _, terms = question_fingerprint(prompt)
+    assert terms
+    assert 'priya' not in terms
+    assert 'acme' not in terms
+
+
+def test_prompt_without_known_terms_has_no_terms():
+    assert question_fingerprint('Priya Raman, Acme Corp, Springfield')[1] == ''
+
+
+def test_terms_fingerprint_to_themselves():
+    fingerprint, terms = question_fingerprint('Senior Data Analyst with SQL, Python, Tableau and Excel')
+    assert question_fingerprint(terms) == (fingerprint, terms)
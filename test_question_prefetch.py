@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from app.utils.question_prefetch import QuestionPrefetchConfig, QuestionPrefetcher
+
+
+@pytest.fixture
+def prefetcher(monkeypatch):
+    """A prefetcher whose generations block until ``release`` is set."""
+    config = QuestionPrefetchConfig()
+    config.TTL = 60
+    config.WAIT = 1
+    prefetcher = QuestionPrefetcher(config)
+    prefetcher.calls = []
+    prefetcher.release = threading.Event()
+
+    def generate(prompt):
+        prefetcher.calls.append(prompt)
+        prefetcher.release.wait(1)
+        return [f'Question about {prompt}']
+
+    monkeypatch.setattr(prefetcher, '_generate', generate)
+    return prefetcher
+
+
+def test_matching_submit_takes_the_prefetched_questions(prefetcher):
+    assert prefetcher.start(1, 'Python developer')
+    prefetcher.release.set()
+    assert prefetcher.take(1, '  python   DEVELOPER ') == ['Question about Python developer']
+
+
+def test_similar_prompt_does_not_take_the_prefetch(prefetcher):
+    prefetcher.start(1, 'Python developer at Acme')
+    prefetcher.release.set()
+    assert prefetcher.take(1, 'Python developer at Initech') is None
+    assert prefetcher.misses == 1
+
+
+def test_no_second_prefetch_while_one_is_live(prefetcher):
+    assert prefetcher.start(1, 'Python developer')
+    assert not prefetcher.start(1, 'Python developer')
+    assert not prefetcher.start(1, 'Data analyst')
+    assert len(prefetcher.calls) <= 1
+
+
+def test_recent_prompt_is_not_prefetched_again(prefetcher):
+    prefetcher.start(1, 'Python developer')
+    prefetcher.release.set()
+    prefetcher.take(1, 'Python developer')
+    # Reloading the simulator after the submit
+    assert not prefetcher.start(1, 'Python developer')
+    assert prefetcher.start(1, 'Data analyst')
+
+
+def test_real_generation_bypasses_the_response_cache(monkeypatch):
+    from app.utils import ai_utils
+
+    def provider(messages, temperature, max_tokens, *args):
+        return {'choices': [{'message': {'content': '1. Tell me about Flask?\n2. How do you test Python code?'}}]}, None
+
+    monkeypatch.setattr(ai_utils, 'together_ai_request', provider)
+    monkeypatch.setattr(ai_utils, 'openrouter_request', provider)
+    monkeypatch.setattr(ai_utils, 'get_ai_cache', lambda: pytest.fail('prefetch used the response cache'))
+    config = QuestionPrefetchConfig()
+    config.WAIT = 5
+    prefetcher = QuestionPrefetcher(config)
+    assert prefetcher.start(1, 'Python developer')
+    questions = prefetcher.take(1, 'Python developer')
+    assert questions
+    assert not any(q.startswith('Error') for q in questions)
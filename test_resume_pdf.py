@@ -0,0 +1,86 @@
+import pytest
+
+from app import db
+from app.models import UserPersonalInfo
+from app.utils import resume_pdf_cache
+from app.utils.resume_pdf import _profile_link, render_resume_pdf
+from app.utils.resume_pdf_cache import ResumePdfCache
+
+DATA = {
+    'personal': {'fullName': 'Jane Doe', 'email': 'jane@example.com', 'summary': 'Backend developer.'},
+    'experience': [{'title': 'Engineer', 'company': 'Acme', 'duration': '2020-2024', 'description': 'Built APIs.'}],
+    'skills': [{'name': 'Python'}],
+}
+
+
+def test_cache_key_is_stable_for_the_same_data(app):
+    cache = ResumePdfCache()
+    reordered = dict(reversed(list(DATA.items())))
+    assert cache.key(DATA, 'structured') == cache.key(reordered, 'structured')
+
+
+def test_cache_key_changes_with_the_data(app):
+    cache = ResumePdfCache()
+    changed = dict(DATA, personal=dict(DATA['personal'], summary='Frontend developer.'))
+    assert cache.key(DATA, 'structured') != cache.key(changed, 'structured')
+
+
+def test_cache_key_changes_with_the_template(app, monkeypatch):
+    cache = ResumePdfCache()
+    keys = {cache.key(DATA, 'structured'), cache.key(DATA, 'classic')}
+    monkeypatch.setattr(resume_pdf_cache, 'LAYOUT_VERSION', 'next')
+    keys.add(cache.key(DATA, 'structured'))
+    assert len(keys) == 3
+
+
+@pytest.fixture
+def personal_info(user):
+    info = UserPersonalInfo(user_id=user.id, full_name='Jane Doe', email='jane@example.com', summary='Backend developer.')
+    db.session.add(info)
+    db.session.commit()
+    return info
+
+
+def test_download_is_revalidated_with_its_etag(client, personal_info):
+    first = client.get('/resume/download?template=structured')
+    assert first.status_code == 200
+    assert first.data.startswith(b'%PDF')
+    etag = first.headers['ETag']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    again = client.get('/resume/download?template=structured', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+
+    personal_info.summary = 'Frontend developer.'
+    db.session.commit()
+    changed = client.get('/resume/download?template=structured', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+HOSTILE = [
+    {'personal': {'fullName': 'Jane "Tables" <Doe> & Sons', 'linkedin': 'jane" onclick="x', 'github': '<b>'}},
+    {'personal': {'fullName': 'Jane', 'linkedin': {'url': 'javascript:alert(1)', 'display': 'jane'},
+                  'github': {'url': 'https://github.com/jane" color="red', 'display': 'jane & co'}}},
+    {'personal': {'fullName': 'Jane', 'summary': '<para>unclosed <b>tag & stray ]]> </font>'},
+     'skills': [{'name': '<C++>', 'category': 'A & B'}, '"quoted"'],
+     'experience': [{'title': '<script>', 'company': None, 'duration': 5, 'description': ['a < b', '', 'c & d']}]},
+    {'personal': {'fullName': 'Jane', 'summary': 'word ' * 5000},
+     'experience': [{'title': 'Engineer', 'description': 'x' * 5000}] * 10},
+]
+
+
+@pytest.mark.parametrize('data', HOSTILE)
+def test_structured_renderer_survives_hostile_input(data):
+    pdf = render_resume_pdf(data, 'structured')
+    assert isinstance(pdf, bytes)
+    assert pdf.startswith(b'%PDF')
+
+
+def test_only_web_urls_become_links():
+    assert 'href' not in _profile_link({'url': 'javascript:alert(1)', 'display': 'jane'}, 'https://x/')
+    assert 'href' not in _profile_link('file:///etc/passwd', 'https://x/')
+    assert 'href="https://github.com/jane"' in _profile_link('jane', 'https://github.com/')
+    link = _profile_link({'url': 'https://github.com/a" color="red', 'display': 'a'}, 'https://github.com/')
+    assert '&quot; color=&quot;red' in link
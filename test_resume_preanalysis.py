@@ -0,0 +1,51 @@
+import pytest
+
+from app.utils import resume_preanalysis
+from app.utils.role_matcher import RoleMatcher, RoleMatcherConfig
+
+RESUME = """Jane Doe
+jane@example.com
+
+Summary
+Backend developer.
+
+Experience
+- Built Python and Flask APIs serving 2M requests a day
+- Cut PostgreSQL query time by 40%
+
+Education
+B.Sc. Computer Science
+
+Skills
+Python, Flask, PostgreSQL, Zorblax
+"""
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def matcher(request, monkeypatch):
+    """A private role matcher behind preanalyze_resume, with and without numpy."""
+    if request.param and not resume_preanalysis.HAS_NUMPY:
+        pytest.skip('numpy is not installed')
+    monkeypatch.setattr(resume_preanalysis, 'HAS_NUMPY', request.param)
+    matcher = RoleMatcher(RoleMatcherConfig())
+    monkeypatch.setattr(resume_preanalysis, 'get_role_matcher', lambda: matcher)
+    monkeypatch.setattr(resume_preanalysis, '_matrix', None)
+    return matcher
+
+
+def test_preanalysis_finds_sections_roles_and_metrics(matcher):
+    result = resume_preanalysis.preanalyze_resume(RESUME)
+    assert result['missing_sections'] == []
+    assert result['target_roles']
+    assert 'Python' in result['keywords_found']
+    assert result['quantification']['quantified'] == 2
+
+
+def test_skills_learned_after_the_matrix_was_built_are_ignored(matcher):
+    matrix = resume_preanalysis._get_role_matrix()
+    # An AI job match finishing between building the matrix and counting the resume's skills
+    matcher.learn([{'job_title': 'Zorblax Engineer', 'skills': ['Zorblax', 'Python']}] * 2)
+    counts = matcher.skill_counts(RESUME)
+    assert ('zorblax',) in counts
+    top_roles, _, _ = matrix.rank(counts)
+    assert top_roles
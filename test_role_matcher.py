@@ -0,0 +1,55 @@
+import json
+
+from app import db
+from app.models import JobMatchResult
+from app.utils.role_matcher import MAX_ROLES, MIN_ROLES, RoleMatcher, RoleMatcherConfig
+
+STRONG = 'Python, SQL, Tableau, Excel, Power BI, Statistics'
+
+
+def _matcher(min_confidence=0.5):
+    config = RoleMatcherConfig()
+    config.MIN_CONFIDENCE = min_confidence
+    return RoleMatcher(config)
+
+
+def test_strong_skill_list_is_matched_locally():
+    matched, confidence = _matcher().match(STRONG)
+    assert confidence >= 0.5
+    titles = [role['job_title'] for role in matched['roles']]
+    assert MIN_ROLES <= len(titles) <= MAX_ROLES
+    assert 'Data Analyst' in titles
+    assert all(role['skills'] for role in matched['roles'])
+
+
+def test_fewer_than_two_skills_is_left_to_the_ai():
+    matcher = _matcher(min_confidence=0.01)
+    assert matcher.match('python') == (None, 0.0)
+    assert matcher.match('I like cooking and hiking') == (None, 0.0)
+
+
+def test_confidence_below_the_threshold_is_left_to_the_ai():
+    text = 'Python, SQL, cooking, hiking, gardening, knitting'
+    matched, confidence = _matcher(min_confidence=0.5).match(text)
+    assert matched is None
+    assert 0 < confidence < 0.5
+    matched, _ = _matcher(min_confidence=confidence).match(text)
+    assert matched is not None
+
+
+def test_history_not_loaded_outside_an_app_context_is_retried():
+    matcher = _matcher()
+    matcher.stats()
+    assert matcher._loaded_at == 0.0
+
+
+def test_history_roles_are_indexed(app, user):
+    roles = [{'job_title': 'Analytics Engineer', 'skills': ['dbt', 'SQL', 'Python'], 'certifications': []}]
+    for _ in range(2):
+        db.session.add(JobMatchResult(user_id=user.id, matched_roles=json.dumps(roles)))
+    db.session.commit()
+    matcher = _matcher()
+    stats = matcher.stats()
+    assert matcher._loaded_at > 0
+    assert stats['history_rows'] == 2
+    assert 'Analytics Engineer' in [profile.title for profile in matcher.role_profiles()[0]]
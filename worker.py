@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Run the background AI job worker.
+
+Routes queue AI work when AI_JOBS_ENABLED=true; this process claims and
+runs it. Start as many as you need, e.g.:
+
+    python worker.py --concurrency 8
+"""
+import argparse
+from app import create_app
+from app.utils.job_queue import Worker
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the CareerCraft AI job worker.')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Jobs run at once by this process (defaults to AI_JOBS_CONCURRENCY)')
+    parser.add_argument('--kind', action='append', dest='kinds',
+                        help='Only run jobs of this kind (repeatable)')
+    args = parser.parse_args()
+    
+    app = create_app()
+    Worker(app, concurrency=args.concurrency, kinds=args.kinds).run_forever()
+
+if __name__ == '__main__':
+    main()